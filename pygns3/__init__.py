@@ -1,5 +1,16 @@
-from .controller import GNS3API, GNS3Compute, GNS3Controller, GNS3Project, GNS3VM
+from .controller import (DeadlineExceeded, GNS3API, GNS3Compute, GNS3Controller, GNS3Project,
+                         GNS3ProjectListener, GNS3VM)
+from .aio import AsyncGNS3API, AsyncGNS3Compute, AsyncGNS3Controller, AsyncGNS3Project
+from .cache import ResponseCache
+from .compression import Compression
+from .limiter import AdaptiveLimiter
+from .metrics import Metrics
+from .orchestrator import NodeOrchestrator
+from .topology import TopologyBuilder
 from requests.auth import HTTPBasicAuth
 
-__all__ = ['GNS3API', 'GNS3Compute', 'GNS3Controller', 'GNS3Project', 'GNS3VM']
-
+__all__ = ['DeadlineExceeded', 'GNS3API', 'GNS3Compute', 'GNS3Controller', 'GNS3Project',
+           'GNS3ProjectListener', 'GNS3VM',
+           'AsyncGNS3API', 'AsyncGNS3Compute', 'AsyncGNS3Controller', 'AsyncGNS3Project',
+           'AdaptiveLimiter', 'Compression', 'Metrics', 'NodeOrchestrator', 'ResponseCache',
+           'TopologyBuilder']
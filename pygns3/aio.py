@@ -0,0 +1,727 @@
+"""
+Asyncio counterparts of the GNS3 wrapper classes.
+
+The classes in `pygns3.controller` block on every request, so a single thread can only talk to one
+controller, one request at a time. The classes in this module are built on aiohttp and can be
+awaited concurrently, e.g. to load many projects (or many controllers) from a single process:
+
+    >>> GNS3API.load_configuration()
+    >>> controller = await AsyncGNS3Controller.load()
+    >>> projects = await asyncio.gather(*[AsyncGNS3Project.from_id(p) for p in project_ids])
+
+Connection details are taken from the (synchronous) GNS3API configuration. The async wrapper
+classes subclass their synchronous counterparts so attributes and string representations are
+identical, but all I/O is done up front by the `load()` / `from_id()` coroutines instead of in
+`__init__`. Every method which makes requests is a coroutine (e.g. AsyncGNS3Node.start()) or an
+async generator (e.g. AsyncGNS3Project.iter_nodes()). AsyncGNS3Controller does not subclass
+GNS3Controller, its state cache and export_all() are synchronous only.
+
+aiohttp is an optional dependency: pip install pygns3[async]
+"""
+import asyncio
+import time
+import uuid
+from contextlib import asynccontextmanager
+from pathlib import Path
+from urllib.parse import urlencode
+
+from .codec import ArrayParser
+from .controller import (GNS3API, GNS3Compute, GNS3Controller, GNS3Drawing, GNS3Image, GNS3Link,
+                         GNS3Node, GNS3Project, GNS3ProjectListener, PcapParser)
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover - optional dependency
+    aiohttp = None
+
+
+class AsyncGNS3API:
+    """
+    Asyncio version of GNS3API. Holds one aiohttp session per event loop which is shared by all
+    async wrapper classes. `limit` is the maximum number of concurrent connections and
+    `limit_per_host` the maximum per controller (0 means unlimited), any requests above that are
+    queued by aiohttp.
+    """
+    limit = 100
+    limit_per_host = 0
+    # {event loop: aiohttp session}, a session can only be used on the loop it was created on
+    sessions = {}
+    # {event loop: async generator which closes the session of the loop when finalized}
+    _closers = {}
+
+    @staticmethod
+    async def get_session():
+        """Return the session of the running event loop, creating it on first use."""
+        if aiohttp is None:
+            raise ImportError('AsyncGNS3API requires aiohttp: pip install pygns3[async]')
+
+        loop = asyncio.get_running_loop()
+        session = AsyncGNS3API.sessions.get(loop)
+        if session is None or session.closed:
+            for other in [l for l in AsyncGNS3API.sessions if l.is_closed()]:
+                AsyncGNS3API._forget(other)
+            auth = None
+            if GNS3API.user is not None:
+                auth = aiohttp.BasicAuth(GNS3API.user, GNS3API.password or '')
+            connector = aiohttp.TCPConnector(limit=int(AsyncGNS3API.limit),
+                                             limit_per_host=int(AsyncGNS3API.limit_per_host))
+            session = aiohttp.ClientSession(auth=auth, connector=connector)
+            AsyncGNS3API.sessions[loop] = session
+            # Loops finalize their async generators before they are closed (asyncio.run() does),
+            # which closes the session while its loop still runs
+            closer = AsyncGNS3API._close_with_loop(loop, session)
+            await closer.asend(None)
+            AsyncGNS3API._closers[loop] = closer
+
+        return session
+
+    @staticmethod
+    async def _close_with_loop(loop, session):
+        try:
+            yield
+        finally:
+            if AsyncGNS3API.sessions.get(loop) is session:
+                del AsyncGNS3API.sessions[loop]
+                del AsyncGNS3API._closers[loop]
+            await session.close()
+
+    @staticmethod
+    def _forget(loop):
+        """Drop the session of `loop`, which has been closed"""
+        session = AsyncGNS3API.sessions.pop(loop)
+        AsyncGNS3API._closers.pop(loop, None)
+        if not session.closed:
+            # The loop was closed without finalizing its async generators, so the session can
+            # not be awaited anymore. Its detached connector closes the connections when freed.
+            session.detach()
+
+    @staticmethod
+    async def close():
+        """Close the session of the running event loop and all of its connections."""
+        loop = asyncio.get_running_loop()
+        AsyncGNS3API.sessions.pop(loop, None)
+        closer = AsyncGNS3API._closers.pop(loop, None)
+        if closer is not None:
+            await closer.aclose()
+
+    @staticmethod
+    async def request(method, path, data=None):
+        """
+        Perform a request and return the response with its body already read, so `json()` and
+        `text()` can be awaited after the connection has been released back to the pool.
+        """
+        url = f'{GNS3API.base}{path}'
+        session = await AsyncGNS3API.get_session()
+        try:
+            # Not `async with`: aiohttp refuses read() on a response released by the context
+            # manager, reading the whole body releases the connection all the same
+            response = await session.request(method, url, data=data)
+            await response.read()
+        except Exception as e:
+            raise Exception(f'AsyncGNS3API {method} Error at URL: {url}') from e
+
+        return response
+
+    @staticmethod
+    async def delete_request(path):
+        """performs a DELETE request to `path`"""
+        return await AsyncGNS3API.request('DELETE', path)
+
+    @staticmethod
+    async def get_request(path):
+        """performs a GET request to `path`"""
+        return await AsyncGNS3API.request('GET', path)
+
+    @staticmethod
+    async def post_request(path, data):
+        """performs a POST request to `path`"""
+        return await AsyncGNS3API.request('POST', path, data=data)
+
+    @staticmethod
+    @asynccontextmanager
+    async def stream_request(path):
+        """
+        performs a GET request to `path` without reading the body, for endpoints which stream
+        (notifications, captures, exports). Use as `async with` and read the body from
+        response.content, the response is closed on exit.
+        """
+        url = f'{GNS3API.base}{path}'
+        session = await AsyncGNS3API.get_session()
+        try:
+            # Streams may be quiet for long or take long to read, no total timeout
+            response = await session.request('GET', url, timeout=aiohttp.ClientTimeout())
+        except Exception as e:
+            raise Exception(f'AsyncGNS3API GET Error at URL: {url}') from e
+        try:
+            yield response
+        finally:
+            response.close()
+
+    @staticmethod
+    async def iter_request(path, chunk_size=64 * 1024):
+        """
+        performs a GET request to `path` and yields the items of the JSON array it returns while
+        the body is being received, see GNS3API.iter_request(). Raises a ValueError with the
+        message of an error response.
+        """
+        async with AsyncGNS3API.stream_request(path) as response:
+            await _raise_for_error(response)
+            parser = ArrayParser()
+            async for chunk in response.content.iter_chunked(chunk_size):
+                for item in parser.feed(chunk):
+                    yield item
+            for item in parser.close():
+                yield item
+
+    @staticmethod
+    async def get_json(path):
+        """performs a GET request to `path` and returns the decoded json body"""
+        response = await AsyncGNS3API.get_request(path)
+        content = GNS3API.codec.loads(await response.read())
+        if not response.ok:
+            raise ValueError(content['message'])
+        return content
+
+
+async def _raise_for_error(response):
+    """Raise a ValueError with the message of an error response"""
+    if not response.ok:
+        raise ValueError(GNS3API.codec.loads(await response.read())['message'])
+
+
+async def _created(response):
+    """Return the json of a 201 Created response, raise ValueError with the message otherwise"""
+    content = GNS3API.codec.loads(await response.read())
+    if response.status != 201:
+        raise ValueError(content['message'])
+    return content
+
+
+class AsyncGNS3Compute(GNS3Compute):
+    """Compute endpoint which handles the actual simulation."""
+
+    # pylint: disable=super-init-not-called
+    def __init__(self, compute):
+        self.id = compute['compute_id']
+        self._response = dict(compute)
+        # Pulling up the capabilities one level, same as GNS3Compute
+        if self._response['connected']:
+            self._response.update(self._response['capabilities'])
+        del self._response['capabilities']
+
+    def __repr__(self):
+        return f'AsyncGNS3Compute(\'{self.id}\')'
+
+    @classmethod
+    async def from_id(cls, compute_id):
+        """Return an AsyncGNS3Compute object from its compute id"""
+        return cls(await AsyncGNS3API.get_json(f'/computes/{compute_id}'))
+
+    async def images(self, emulator):
+        """Return a list of available image files for the given emaulator."""
+        images = []
+        if self.connected:
+            response = await AsyncGNS3API.get_request(f'/computes/{self.id}/{emulator}/images')
+            if response.ok:
+                for i in GNS3API.codec.loads(await response.read()):
+                    images.append(GNS3Image(i))
+
+        return images
+
+
+class AsyncGNS3Controller:
+    """
+    Asyncio version of GNS3Controller. Use `await AsyncGNS3Controller.load()` to create one, all
+    computes and projects are fetched concurrently. The state cache and export_all() are only
+    available on GNS3Controller.
+    """
+
+    def __init__(self, version, computes, projects):
+        self.version = version
+        self.computes = computes
+        self.projects = projects
+
+    def __repr__(self):
+        return 'AsyncGNS3Controller()'
+
+    __str__ = GNS3Controller.__str__
+
+    @classmethod
+    async def load(cls):
+        """Fetch the version, computes and projects of the controller concurrently."""
+        version, computes, projects = await asyncio.gather(
+            AsyncGNS3API.get_json('/version'),
+            AsyncGNS3API.get_json('/computes'),
+            AsyncGNS3API.get_json('/projects'))
+
+        computes = await asyncio.gather(
+            *[AsyncGNS3Compute.from_id(c['compute_id']) for c in computes])
+        projects = await asyncio.gather(
+            *[AsyncGNS3Project.from_id(p['project_id']) for p in projects])
+        return cls(version['version'], list(computes), list(projects))
+
+    async def refresh(self):
+        """Re-fetch the version, computes and projects of the controller concurrently."""
+        fresh = await self.load()
+        self.version, self.computes, self.projects = fresh.version, fresh.computes, fresh.projects
+
+    @staticmethod
+    async def assert_version(version_string: str):
+        """Checks if the server is running version corresponding to 'version_string'"""
+        data = GNS3API.codec.dumps({'version': version_string})
+        response = await AsyncGNS3API.post_request('/version', data)
+        return response.ok
+
+    @staticmethod
+    async def debug():
+        """Dump debug information to disk (debug directory in config directory)."""
+        response = await AsyncGNS3API.post_request('/debug', {})
+        if response.status == 201:
+            print('Debug information written to configuration directory')
+        else:
+            print(f'Failed to write debug information {response}')
+
+    @staticmethod
+    async def shutdown():
+        """Shutdown the local server"""
+        response = await AsyncGNS3API.post_request('/shutdown', {})
+        if response.status == 201:
+            print('Controller accepted the shutdown command')
+        else:
+            print(f'The server refused the command {response}')
+
+
+class AsyncGNS3Drawing(GNS3Drawing):
+    """An SVG object inside an AsyncGNS3Project"""
+    __slots__ = ()
+
+    def __repr__(self):
+        return f'AsyncGNS3Drawing({self.project_id}, {self.drawing_id})'
+
+    @classmethod
+    async def create(cls, project_id, svg, x=0, y=0, **kwargs):
+        """Creates a new drawing in the project with `project_id` and returns it
+
+        Additional properties (z, rotation) may be given through **kwargs"""
+        data = {'svg': svg, 'x': x, 'y': y}
+        data.update(kwargs)
+        response = await AsyncGNS3API.post_request(f'/projects/{project_id}/drawings',
+                                                   GNS3API.codec.dumps(data))
+        return cls(await _created(response))
+
+    async def delete(self):
+        """Deletes a drawing"""
+        await _raise_for_error(await AsyncGNS3API.delete_request(
+            f'/projects/{self.project_id}/drawings/{self.drawing_id}'))
+
+
+class AsyncGNS3Link(GNS3Link):
+    """A link between two AsyncGNS3Node objects"""
+    __slots__ = ()
+
+    def __init__(self, link, nodes):
+        """`nodes` maps node ids to the AsyncGNS3Node objects of the project"""
+        missing = {n['node_id'] for n in link['nodes']} - nodes.keys()
+        if missing:
+            raise KeyError(f'Link {link["link_id"]} refers to unknown nodes {missing}')
+        super().__init__(link, nodes)
+
+    def __repr__(self):
+        return f'AsyncGNS3Link({self.project_id}, {self.link_id})'
+
+    @classmethod
+    async def create(cls, from_node, from_port, to_node, to_port):
+        """Creates a link between two AsyncGNS3Node objects and returns it
+
+        Ports are given as a name (e.g. 'f0/0') or an (adapter_number, port_number) tuple"""
+        data = cls._endpoints(from_node, from_port, to_node, to_port)
+        response = await AsyncGNS3API.post_request(f'/projects/{from_node.project_id}/links',
+                                                   GNS3API.codec.dumps(data))
+        nodes = {from_node.node_id: from_node, to_node.node_id: to_node}
+        return cls(await _created(response), nodes)
+
+    async def delete(self):
+        """Deletes a link"""
+        await _raise_for_error(await AsyncGNS3API.delete_request(
+            f'/projects/{self.project_id}/links/{self.link_id}'))
+
+    async def start_capture(self, capture_file_name=None, data_link_type='DLT_EN10MB'):
+        """Start a packet capture on the link"""
+        data = {'data_link_type': data_link_type}
+        if capture_file_name is not None:
+            data['capture_file_name'] = capture_file_name
+        await self._capture_request('start_capture', data)
+
+    async def stop_capture(self):
+        """Stop the packet capture on the link"""
+        await self._capture_request('stop_capture', {})
+
+    async def _capture_request(self, action, data):
+        path = f'/projects/{self.project_id}/links/{self.link_id}/{action}'
+        response = await AsyncGNS3API.post_request(path, GNS3API.codec.dumps(data))
+        # Refresh in place from the returned link, e.g. capturing and capture_file_path
+        nodes = {self.from_node.node_id: self.from_node, self.to_node.node_id: self.to_node}
+        self.__init__(await _created(response), nodes)
+
+    async def capture_stream(self, tee=None, chunk_size=64 * 1024, tee_buffer_size=1024 * 1024):
+        """
+        Async generator which yields the captured packets (PcapPacket tuples) as they arrive,
+        see GNS3Link.capture_stream(). Stop iterating (or close the generator) when done.
+        """
+        path = f'/projects/{self.project_id}/links/{self.link_id}/pcap'
+        async with AsyncGNS3API.stream_request(path) as response:
+            if not response.ok:
+                raise ValueError(f'No capture available on link {self.link_id}')
+            parser = PcapParser()
+            tee_file = None if tee is None else open(tee, 'wb', buffering=tee_buffer_size)
+            try:
+                async for chunk in response.content.iter_chunked(chunk_size):
+                    if tee_file is not None:
+                        tee_file.write(chunk)
+                    for packet in parser.feed(chunk):
+                        yield packet
+            finally:
+                if tee_file is not None:
+                    tee_file.close()
+
+
+class AsyncGNS3Node(GNS3Node):
+    """Represents a node in an AsyncGNS3Project"""
+    __slots__ = ()
+
+    def __repr__(self):
+        return f'AsyncGNS3Node({self._node})'
+
+    @classmethod
+    async def create(cls, project_id, name, node_type, compute_id='local', **kwargs):
+        """Creates a new node in the project with `project_id` and returns it
+
+        Additional settings (properties, symbol, x, y, ...) may be given through **kwargs"""
+        data = {'name': name, 'node_type': node_type, 'compute_id': compute_id}
+        data.update(kwargs)
+        response = await AsyncGNS3API.post_request(f'/projects/{project_id}/nodes',
+                                                   GNS3API.codec.dumps(data))
+        return cls(await _created(response))
+
+    @classmethod
+    async def from_id(cls, project_id, node_id):
+        """Return an AsyncGNS3Node object from project- and node id"""
+        return cls(await AsyncGNS3API.get_json(f'/projects/{project_id}/nodes/{node_id}'))
+
+    async def delete(self):
+        """Deletes a node"""
+        await _raise_for_error(await AsyncGNS3API.delete_request(
+            f'/projects/{self.project_id}/nodes/{self.node_id}'))
+
+    async def refresh(self):
+        """Re-fetch the node and update it in place"""
+        self.__init__(await AsyncGNS3API.get_json(
+            f'/projects/{self.project_id}/nodes/{self.node_id}'))
+
+    async def start(self):
+        """Start the node, the status may still be 'stopped' when this returns"""
+        await self._action('start')
+
+    async def stop(self):
+        """Stop the node"""
+        await self._action('stop')
+
+    async def suspend(self):
+        """Suspend the node"""
+        await self._action('suspend')
+
+    async def reload(self):
+        """Reload (restart) the node"""
+        await self._action('reload')
+
+    async def _action(self, action):
+        path = f'/projects/{self.project_id}/nodes/{self.node_id}/{action}'
+        response = await AsyncGNS3API.post_request(path, data={})
+        await _raise_for_error(response)
+        # Controllers return the updated node, older ones answer 204 without a body
+        if response.status != 204:
+            self.__init__(GNS3API.codec.loads(await response.read()))
+
+
+class AsyncProjectListener(GNS3ProjectListener):
+    """
+    Applies the notifications followed by AsyncGNS3Project.listen() to the project, in the task
+    which receives them rather than in a thread of its own.
+    """
+    wrappers = {
+        'drawing': ('drawings', 'drawing_id', AsyncGNS3Drawing),
+        'link': ('links', 'link_id', AsyncGNS3Link),
+        'node': ('nodes', 'node_id', AsyncGNS3Node),
+    }
+
+    def restored(self):
+        # The project is refreshed before the notification is applied, refresh() is a coroutine
+        pass
+
+
+class AsyncGNS3Project(GNS3Project):
+    """
+    Asyncio version of GNS3Project. Use `await AsyncGNS3Project.from_id(project_id)` to create one,
+    the project settings and its drawings, links, nodes and snapshots are fetched concurrently.
+    """
+
+    # pylint: disable=super-init-not-called,too-many-arguments
+    def __init__(self, settings, drawings, links, nodes, snapshots):
+        self.project_id = settings['project_id']
+        self._update_settings(settings)
+        self.drawings = self._load_drawings(drawings)
+        self.nodes = self._load_nodes(nodes)
+        self.links = self._load_links(links)
+        self.snapshots = self._load_snapshots(snapshots)
+
+    def __repr__(self):
+        return f'AsyncGNS3Project(\'{self.project_id}\')'
+
+    def _get_collection(self, name, response):
+        # The collections are fetched by from_id() and refresh(), `response` is the decoded json
+        return response
+
+    def _load_drawings(self, response=None):
+        self._drawings = self._get_collection('drawings', response)
+        return [AsyncGNS3Drawing(d) for d in self._drawings]
+
+    def _load_links(self, response=None):
+        self._links = self._get_collection('links', response)
+        node_index = {n.node_id: n for n in self.nodes}
+        return [AsyncGNS3Link(l, node_index) for l in self._links]
+
+    def _load_nodes(self, response=None):
+        self._nodes = self._get_collection('nodes', response)
+        return [AsyncGNS3Node(n) for n in self._nodes]
+
+    async def refresh(self):
+        """
+        Re-fetch the project settings and its collections concurrently. Objects which still
+        exist are updated in place, so references to them stay valid.
+        """
+        settings, *collections = await asyncio.gather(
+            *[AsyncGNS3API.get_json(p) for p in self.paths(self.project_id)])
+        self._update_settings(settings)
+        # Nodes are merged before the links are resolved against them
+        for name, items in zip(self.collections, collections):
+            self._merge(name, getattr(self, f'_load_{name}')(items))
+
+    async def iter_nodes(self):
+        """
+        Yield the nodes one by one while they are being received, see GNS3Project.iter_nodes().
+        """
+        async for n in AsyncGNS3API.iter_request(f'/projects/{self.project_id}/nodes'):
+            yield AsyncGNS3Node(n)
+
+    async def iter_links(self):
+        """Yield the links one by one while they are being received, see iter_nodes()"""
+        node_index = {n.node_id: n for n in self.nodes}
+        async for l in AsyncGNS3API.iter_request(f'/projects/{self.project_id}/links'):
+            yield AsyncGNS3Link(l, node_index)
+
+    def listen(self, callback=None):
+        """
+        Start a task on the running event loop which applies the project notifications to this
+        object, like GNS3Project.listen(). `callback` is called with every notification.
+        Returns the asyncio.Task, stop_listening() cancels it.
+        """
+        if self.listener is None or self.listener.done():
+            self.listener = asyncio.get_running_loop().create_task(
+                self._follow(AsyncProjectListener(self, callback)))
+        return self.listener
+
+    def stop_listening(self):
+        """Stop the task started with listen()"""
+        if self.listener is not None:
+            self.listener.cancel()
+            self.listener = None
+
+    async def _follow(self, listener):
+        path = f'/projects/{self.project_id}/notifications'
+        while True:
+            try:
+                async with AsyncGNS3API.stream_request(path) as response:
+                    await _raise_for_error(response)
+                    # Catch up on whatever happened since the project was fetched or the
+                    # connection dropped, notifications are only sent from now on
+                    await self.refresh()
+                    async for line in response.content:
+                        if not line.strip():
+                            continue
+                        notification = GNS3API.codec.loads(line)
+                        if notification.get('action') == 'snapshot.restored':
+                            await self.refresh()
+                        listener.apply(notification)
+            except Exception:  # pylint: disable=broad-except
+                await asyncio.sleep(listener.retry_interval)
+
+    async def add_drawing(self, svg, x=0, y=0, **kwargs):
+        """adds a drawing to the project, see AsyncGNS3Drawing.create()"""
+        drawing = await AsyncGNS3Drawing.create(self.project_id, svg, x, y, **kwargs)
+        self._add_to_collection('drawings', drawing)
+        return drawing
+
+    async def add_link(self, from_node, from_port, to_node, to_port):
+        """adds a link to the project, see AsyncGNS3Link.create()"""
+        link = await AsyncGNS3Link.create(from_node, from_port, to_node, to_port)
+        self._add_to_collection('links', link)
+        return link
+
+    async def add_node(self, name, node_type, compute_id='local', **kwargs):
+        """adds a node to the project, see AsyncGNS3Node.create()"""
+        node = await AsyncGNS3Node.create(self.project_id, name, node_type, compute_id, **kwargs)
+        self._add_to_collection('nodes', node)
+        return node
+
+    async def _load_settings(self):
+        # A running listener keeps the settings current, no need to poll
+        if self.listener is not None and not self.listener.done():
+            return
+        self._update_settings(await AsyncGNS3API.get_json(f'/projects/{self.project_id}'))
+
+    @classmethod
+    async def from_id(cls, project_id):
+        """Fetch the project with `project_id` and all of its collections concurrently."""
+        settings, *collections = await asyncio.gather(
+            *[AsyncGNS3API.get_json(p) for p in cls.paths(project_id)])
+        return cls(settings, **dict(zip(cls.collections, collections)))
+
+    @classmethod
+    async def from_name(cls, name):
+        """Returns an AsyncGNS3Project with `name`"""
+        for p in await AsyncGNS3API.get_json('/projects'):
+            if p['name'] == name:
+                return await cls.from_id(p['project_id'])
+        raise FileNotFoundError(f'No project found with name {name}')
+
+    @classmethod
+    async def create(cls, name, **kwargs):
+        """Create a new project.
+
+        Requires a name, additional properties may be given through **kwargs
+        Returns an AsyncGNS3Project instance"""
+        data = {'name': name}
+        data.update(kwargs)
+        response = await AsyncGNS3API.post_request('/projects', GNS3API.codec.dumps(data))
+        return await cls.from_id((await _created(response))['project_id'])
+
+    async def delete(self):
+        """Delete the project from the compute"""
+        response = await AsyncGNS3API.delete_request(f'/projects/{self.project_id}')
+        if response.status == 404:
+            msg = GNS3API.codec.loads(await response.read())['message']
+            raise ValueError(msg)
+
+    async def close(self):
+        """closes a project"""
+        await AsyncGNS3API.post_request(f'/projects/{self.project_id}/close', data={})
+        await self._load_settings()
+
+    @staticmethod
+    async def load(path):
+        """loads a project (local only)"""
+        response = await AsyncGNS3API.post_request('/projects/load', data={'path': path})
+        if not response.ok:
+            raise Exception('Unable to open project')
+
+    async def open(self):
+        """opens a project"""
+        await AsyncGNS3API.post_request(f'/projects/{self.project_id}/open', data={})
+        await self._load_settings()
+
+    async def start_all_nodes(self):
+        """Start all nodes in a project"""
+        await AsyncGNS3API.post_request(f'/projects/{self.project_id}/nodes/start', data={})
+        await self._load_settings()
+
+    async def stop_all_nodes(self):
+        """Stop all nodes in a project"""
+        await AsyncGNS3API.post_request(f'/projects/{self.project_id}/nodes/stop', data={})
+        await self._load_settings()
+
+    async def suspend_all_nodes(self):
+        """Suspend all nodes in a project"""
+        await AsyncGNS3API.post_request(f'/projects/{self.project_id}/nodes/suspend', data={})
+        await self._load_settings()
+
+    @classmethod
+    async def import_project(cls, source, name=None, project_id=None, path=None,
+                             chunk_size=1024 * 1024, progress=None):
+        """
+        Import a portable project archive (.gns3project) and return the new AsyncGNS3Project,
+        see GNS3Project.import_project().
+        """
+        project_id = project_id or str(uuid.uuid4())
+        query = {k: v for k, v in (('name', name), ('path', path)) if v is not None}
+        url = f'/projects/{project_id}/import'
+        if query:
+            url += f'?{urlencode(query)}'
+        file = open(source, 'rb') if isinstance(source, (str, Path)) else source
+        try:
+            chunks = _with_progress(_aiter(iter(lambda: file.read(chunk_size), b'')), progress)
+            response = await AsyncGNS3API.post_request(url, chunks)
+        finally:
+            if file is not source:
+                file.close()
+        if not response.ok:
+            raise ValueError(f'Unable to import project: {await response.text()}')
+        return await cls.from_id(GNS3API.codec.loads(await response.read())['project_id'])
+
+    async def export(self, path, include_images=False, chunk_size=1024 * 1024, progress=None):
+        """
+        Export the project as a portable archive (.gns3project) to the file at `path`, streamed
+        to disk in chunks of `chunk_size` bytes, see GNS3Project.export(). Returns the number of
+        bytes written.
+        """
+        url = f'/projects/{self.project_id}/export'
+        if include_images:
+            url += '?include_images=1'
+        async with AsyncGNS3API.stream_request(url) as response:
+            if not response.ok:
+                raise ValueError(f'Unable to export project {self.project_id}: '
+                                 f'{await response.text()}')
+            written = 0
+            with open(path, 'wb') as file:
+                chunks = response.content.iter_chunked(chunk_size)
+                async for chunk in _with_progress(chunks, progress):
+                    written += file.write(chunk)
+        return written
+
+    async def get_file(self, file):
+        """Get a file from a project, see GNS3Project.get_file()"""
+        response = await AsyncGNS3API.get_request(f'/projects/{self.project_id}/files/{file}')
+        if not response.ok:
+            raise FileNotFoundError(f'No file {file} in project {self.project_id}')
+        return await response.read()
+
+    async def write_file(self, file, data):
+        """
+        Write a file to a project. `data` is bytes, a binary file-like object or an (async)
+        iterable of bytes, the latter three are uploaded in chunks.
+        """
+        if not isinstance(data, (bytes, bytearray, str)) and not hasattr(data, 'read') \
+                and not hasattr(data, '__aiter__'):
+            data = _aiter(data)
+        response = await AsyncGNS3API.post_request(f'/projects/{self.project_id}/files/{file}',
+                                                   data)
+        if not response.ok:
+            raise ValueError(f'Unable to write {file} to project {self.project_id}: '
+                             f'{await response.text()}')
+
+
+async def _aiter(chunks):
+    """Pass the chunks of a synchronous iterable on as an async iterable, e.g. for aiohttp"""
+    for chunk in chunks:
+        yield chunk
+
+
+async def _with_progress(chunks, progress):
+    """Pass async chunks on, calling progress(total_bytes, bytes_per_second) after each of them"""
+    start = time.perf_counter()
+    total = 0
+    async for chunk in chunks:
+        yield chunk
+        if progress is not None:
+            total += len(chunk)
+            elapsed = time.perf_counter() - start
+            progress(total, total / elapsed if elapsed > 0 else 0.0)
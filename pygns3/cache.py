@@ -0,0 +1,119 @@
+"""
+Response cache for GNS3API.get_request.
+
+Only paths matching one of the configured routes are cached, each route with its own time to
+live. Routes are written like the GNS3 API documentation, with {placeholders} for path segments:
+
+    >>> GNS3API.cache = ResponseCache({'/version': 3600,
+    ...                                '/computes/{compute_id}/{emulator}/images': 300},
+    ...                               max_size=256)
+
+Any POST, PUT or DELETE through GNS3API invalidates the cached responses of the same resource,
+e.g. a POST to /projects/{id}/nodes/start drops everything cached under /projects/{id} as well as
+the /projects listing.
+"""
+import re
+import threading
+import time
+from collections import OrderedDict
+
+# Routes of resources which rarely change, with their time to live in seconds
+DEFAULT_ROUTES = {
+    '/version': 3600,
+    '/computes/{compute_id}/{emulator}/images': 300,
+    '/gns3vm/engines': 3600,
+    '/gns3vm/engines/{engine}/vms': 300,
+    '/symbols': 3600,
+    '/projects/{project_id}': 5,
+}
+
+
+class ResponseCache:
+    """
+    LRU cache of responses, bounded to `max_size` entries. `routes` maps route templates to their
+    time to live in seconds, paths which match none of them are not cached.
+    """
+
+    def __init__(self, routes=None, max_size=512):
+        self.routes = [(_route_regex(route), ttl)
+                       for route, ttl in (DEFAULT_ROUTES if routes is None else routes).items()]
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __repr__(self):
+        return f'ResponseCache({len(self.routes)} routes, max_size={self.max_size})'
+
+    def ttl(self, path):
+        """Return the time to live for `path`, None if it is not cacheable"""
+        route = path.split('?', 1)[0]
+        for regex, ttl in self.routes:
+            if regex.match(route):
+                return ttl
+        return None
+
+    def get(self, path):
+        """Return the cached response for `path`, or None"""
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[path]
+            if self.ttl(path) is not None:
+                self.misses += 1
+        return None
+
+    def put(self, path, response):
+        """Store `response` for `path` if the path is cacheable"""
+        ttl = self.ttl(path)
+        if ttl is None:
+            return
+        with self._lock:
+            self._entries[path] = (time.monotonic() + ttl, response)
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, path=None):
+        """Drop the responses of the resource `path` belongs to, or everything without `path`"""
+        with self._lock:
+            if path is None:
+                keys = list(self._entries)
+            else:
+                segments = path.split('?', 1)[0].strip('/').split('/')
+                collection = f'/{segments[0]}'
+                resource = '/' + '/'.join(segments[:2])
+                keys = [k for k in self._entries
+                        if k.split('?', 1)[0] == collection or k.startswith(resource)]
+            for key in keys:
+                del self._entries[key]
+            self.invalidations += len(keys)
+
+    def stats(self):
+        """Return the cache counters as a dict"""
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+        }
+
+
+def _route_regex(route):
+    """Compile a route template like /projects/{project_id}/nodes to a regex"""
+    return re.compile('^' + re.sub(r'\\{[^/}]+\\}', '[^/]+', re.escape(route)) + '$')
@@ -0,0 +1,189 @@
+"""
+Record and replay GNS3API traffic.
+
+In record mode every request made through GNS3API is passed on to the controller and appended,
+with its response and timing, to a cassette: a JSON lines file (gzip compressed when the name ends
+in .gz). In replay mode the responses are served from the cassette without any network access,
+at full speed or with the latencies as recorded:
+
+    >>> GNS3API.use_cassette('session.jsonl.gz')                   # record
+    >>> controller = GNS3Controller(preload=True)
+    >>> GNS3API.use_cassette('session.jsonl.gz', mode='replay', realtime=True)
+    >>> controller = GNS3Controller(preload=True)                  # same requests, offline
+    >>> GNS3API.use_cassette(None)
+
+Requests are matched on method and path, repeated requests get the recorded responses in order
+(and the last one once they run out), preferring a response to the same request body. The bodies
+of streamed responses (notifications, pcap and export streams) are not recorded.
+"""
+import base64
+import gzip
+import io
+import json
+import threading
+import time
+from urllib.parse import urlsplit
+
+from requests import Response
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+MODES = ('record', 'replay')
+
+
+class Cassette:
+    """
+    Recorded requests in the file at `path`. With `mode` 'record' new requests are appended to
+    it, with 'replay' it is read and served back, sleeping the recorded time per request when
+    `realtime` is set.
+    """
+
+    def __init__(self, path, mode='record', realtime=False):
+        if mode not in MODES:
+            raise ValueError(f'Unknown cassette mode {mode}, use one of {MODES}')
+        self.path = str(path)
+        self.mode = mode
+        self.realtime = realtime
+        self.entries = []
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+        self._replayed = {}
+        self._by_request = {}
+        self._file = None
+        if mode == 'replay':
+            self.entries = [json.loads(line) for line in self._lines() if line.strip()]
+            for entry in self.entries:
+                self._by_request.setdefault((entry['method'], entry['path']), []).append(entry)
+
+    def __repr__(self):
+        return f'Cassette({self.path!r}, {self.mode!r}, {len(self.entries)} entries)'
+
+    def _open(self, mode):
+        if self.path.endswith('.gz'):
+            return gzip.open(self.path, mode, encoding='utf-8')
+        return open(self.path, mode, encoding='utf-8')
+
+    def _lines(self):
+        lines = []
+        with self._open('rt') as f:
+            try:
+                for line in f:
+                    lines.append(line)
+            except EOFError:
+                # A gzip cassette whose recording process stopped without closing it
+                pass
+        return lines
+
+    def close(self):
+        """Close the file being recorded to, the next entry opens it again"""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def record(self, method, path, body, response, seconds, streamed):
+        """Append a request and its response"""
+        entry = {'method': method, 'path': path, 'body': _text(body),
+                 'status': response.status_code,
+                 'headers': {k: v for k, v in response.headers.items()
+                             if k.lower() in ('content-type', 'content-encoding')},
+                 'started': round(time.perf_counter() - self._start - seconds, 6),
+                 'seconds': round(seconds, 6)}
+        if streamed:
+            entry['streamed'] = True
+        else:
+            content = response.content
+            try:
+                entry['content'] = content.decode('utf-8')
+            except UnicodeDecodeError:
+                entry['content_b64'] = base64.b64encode(content).decode('ascii')
+        line = json.dumps(entry, separators=(',', ':')) + '\n'
+        with self._lock:
+            self.entries.append(entry)
+            if self._file is None:
+                self._file = self._open('at')
+            self._file.write(line)
+            # Flushed per entry so the cassette is usable whenever the process stops
+            self._file.flush()
+
+    def find(self, method, path, body):
+        """Return the recorded entry for a request, raise LookupError if there is none"""
+        candidates = self._by_request.get((method, path))
+        if not candidates:
+            raise LookupError(f'No recorded response for {method} {path}')
+        body = _text(body)
+        with self._lock:
+            replayed = self._replayed.setdefault((method, path), set())
+            unused = [i for i in range(len(candidates)) if i not in replayed]
+            matching = [i for i in unused if candidates[i]['body'] == body]
+            index = (matching or unused or [len(candidates) - 1])[0]
+            replayed.add(index)
+        return candidates[index]
+
+    def responses(self):
+        """Return {path: content} of the recorded successful GETs, like test/mock_api.py"""
+        return {e['path']: e['content'] for e in self.entries
+                if e['method'] == 'GET' and e['status'] < 400 and 'content' in e}
+
+
+class CassetteAdapter(HTTPAdapter):
+    """Transport adapter which records requests to, or replays them from, a Cassette"""
+
+    # Class of the replayed responses, recorded ones are built by build_response()
+    response_class = Response
+
+    def __init__(self, cassette, base, **kwargs):
+        super().__init__(**kwargs)
+        self.cassette = cassette
+        self.base = base or ''
+
+    def send(self, request, stream=False, **kwargs):  # pylint: disable=arguments-differ
+        path = _path(request.url, self.base)
+        if self.cassette.mode == 'replay':
+            entry = self.cassette.find(request.method, path, request.body)
+            if self.cassette.realtime:
+                time.sleep(entry['seconds'])
+            return _response(request, entry, self)
+
+        start = time.perf_counter()
+        response = super().send(request, stream=stream, **kwargs)
+        if not stream:
+            response.content  # pylint: disable=pointless-statement
+        self.cassette.record(request.method, path, request.body, response,
+                             time.perf_counter() - start, stream)
+        return response
+
+
+def _path(url, base):
+    """Path of `url` relative to the API base, so cassettes replay against any controller"""
+    if base and url.startswith(base):
+        return url[len(base):]
+    parts = urlsplit(url)
+    return parts.path + (f'?{parts.query}' if parts.query else '')
+
+
+def _text(body):
+    """Request body as text for the cassette, None for streamed (generator) bodies"""
+    if isinstance(body, bytes):
+        return body.decode('utf-8', errors='replace')
+    return body if isinstance(body, str) else None
+
+
+def _response(request, entry, adapter):
+    """Build a requests.Response from a cassette entry"""
+    if 'content_b64' in entry:
+        content = base64.b64decode(entry['content_b64'])
+    else:
+        content = (entry.get('content') or '').encode('utf-8')
+    response = adapter.response_class()
+    response.status_code = entry['status']
+    response.headers = CaseInsensitiveDict(entry['headers'])
+    response.encoding = get_encoding_from_headers(response.headers)
+    # Read through raw, so both streamed and regular requests work
+    response.raw = io.BytesIO(content)
+    response.url = request.url
+    response.request = request
+    response.connection = adapter
+    response.reason = 'Replayed'
+    return response
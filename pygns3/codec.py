@@ -0,0 +1,166 @@
+"""
+JSON codecs for GNS3API.
+
+Every response body and most request bodies are JSON, and decoding the node and link listings of
+large projects is a noticeable part of loading them. GNS3API encodes and decodes through a codec,
+which uses orjson when it is installed and the standard library json module otherwise:
+
+    >>> GNS3API.codec
+    OrjsonCodec()
+    >>> GNS3API.use_codec('json')      # force the standard library
+
+orjson is an optional dependency: pip install pygns3[fast]
+
+Codecs decode bytes as well as str, so responses are decoded straight from their body without
+building an intermediate str first. Both raise a json.JSONDecodeError (a ValueError) on invalid
+input.
+
+iter_array() and ArrayParser parse a JSON array incrementally while it is being received, for
+the listings of very large projects, see GNS3API.iter_request().
+"""
+import codecs
+import json
+import re
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+class JSONCodec:
+    """Codec built on the standard library json module"""
+
+    name = 'json'
+
+    def __repr__(self):
+        return f'{type(self).__name__}()'
+
+    @staticmethod
+    def loads(data):
+        """Decode JSON from bytes or str"""
+        return json.loads(data)
+
+    @staticmethod
+    def dumps(obj):
+        """Encode `obj` as a compact UTF-8 JSON request body"""
+        return json.dumps(obj, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+class OrjsonCodec(JSONCodec):
+    """Codec built on orjson, several times faster at decoding large responses"""
+
+    name = 'orjson'
+
+    @staticmethod
+    def loads(data):
+        """Decode JSON from bytes or str"""
+        return orjson.loads(data)
+
+    @staticmethod
+    def dumps(obj):
+        """Encode `obj` as a compact UTF-8 JSON request body"""
+        return orjson.dumps(obj)
+
+
+CODECS = {'json': JSONCodec, 'orjson': OrjsonCodec}
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_DELIMITERS = ',] \t\n\r'
+_DECODER = json.JSONDecoder()
+
+
+def available():
+    """Return the names of the codecs which can be used in this environment"""
+    return [name for name in CODECS if name != 'orjson' or orjson is not None]
+
+
+def get_codec(name=None):
+    """Return codec `name`, or the fastest available one if `name` is None"""
+    if name is None:
+        name = 'orjson' if orjson is not None else 'json'
+    if name not in CODECS:
+        raise ValueError(f'Unknown JSON codec {name}, use one of {list(CODECS)}')
+    if name not in available():
+        raise ImportError(f'JSON codec {name} is not installed: pip install {name}')
+    return CODECS[name]()
+
+
+def iter_array(chunks):
+    """
+    Yield the items of a JSON array as they are parsed from `chunks`, an iterable of bytes such
+    as response.iter_content(), so only the current chunk and item are held in memory. Raises a
+    json.JSONDecodeError if the chunks do not form a JSON array.
+
+    Items are decoded by the standard library scanner whatever the codec, orjson can not decode
+    part of a document.
+    """
+    parser = ArrayParser()
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+    yield from parser.close()
+
+
+class ArrayParser:
+    """
+    Incremental parser of a JSON array, fed the chunks of the document as they arrive, see
+    iter_array(). For sources which can not be iterated over synchronously, e.g. aiohttp.
+    """
+
+    def __init__(self):
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._buffer = ''
+        self._expect = '['
+
+    def feed(self, chunk):
+        """Return the items completed by bytes `chunk`"""
+        return list(self._parse(chunk, False))
+
+    def close(self):
+        """Return the last items, raises a json.JSONDecodeError if the array is incomplete"""
+        items = list(self._parse(b'', True))
+        if self._expect != 'end':
+            raise json.JSONDecodeError('Unterminated JSON array', self._buffer, len(self._buffer))
+        return items
+
+    def _parse(self, chunk, final):
+        buffer = self._buffer + self._decoder.decode(chunk, final)
+        position, expect = 0, self._expect
+        try:
+            while True:
+                position = _WHITESPACE.match(buffer, position).end()
+                if position == len(buffer):
+                    break
+                if expect == '[':
+                    if buffer[position] != '[':
+                        raise json.JSONDecodeError('Expecting a JSON array', buffer, position)
+                    position += 1
+                    expect = 'first'
+                elif expect == 'first' and buffer[position] == ']':
+                    position += 1
+                    expect = 'end'
+                elif expect in ('first', 'item'):
+                    try:
+                        item, end = _DECODER.raw_decode(buffer, position)
+                    except json.JSONDecodeError:
+                        if final:
+                            raise
+                        break  # the item continues in the next chunk
+                    # A scalar is only complete once a delimiter follows it, a number cut off
+                    # after its '.' or exponent is otherwise decoded as far as it goes
+                    if not final and (_WHITESPACE.match(buffer, end).end() == len(buffer) or
+                                      not isinstance(item, (dict, list)) and
+                                      buffer[end] not in _DELIMITERS):
+                        break
+                    yield item
+                    position = end
+                    expect = 'separator'
+                elif expect == 'separator':
+                    if buffer[position] not in ',]':
+                        raise json.JSONDecodeError("Expecting ',' delimiter", buffer, position)
+                    expect = 'item' if buffer[position] == ',' else 'end'
+                    position += 1
+                else:
+                    raise json.JSONDecodeError('Extra data', buffer, position)
+        finally:
+            self._buffer, self._expect = buffer[position:], expect
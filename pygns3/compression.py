@@ -0,0 +1,244 @@
+"""
+Compression of GNS3API traffic, for controllers behind a slow (WAN) link.
+
+    >>> GNS3API.use_compression(Compression(threshold=64 * 1024))
+    >>> GNS3Project.import_project('lab.gns3project')
+    >>> GNS3API.compression.stats()
+    {'sent': {'bytes': 52428800, 'wire_bytes': 9175040, 'ratio': 0.175, ...}, ...}
+
+Responses: the session asks for the encodings listed in `accept`, by default brotli (when brotli
+or brotlicffi is installed), gzip and deflate. They are decoded by urllib3 while the body is read,
+so streamed responses such as exports are never held in memory as a whole.
+
+Requests: bodies of at least `threshold` bytes and streamed uploads (project imports, file
+writes) are compressed with `encoding`, streamed uploads chunk by chunk. Bodies which do not
+compress well, like archives which are compressed already, are sent as they are; for streamed
+uploads the first chunk decides. The controller has to accept compressed request bodies, which
+is why this is opt-in.
+
+stats() reports the compression ratios and an estimate of the transfer time saved at
+`bandwidth` bytes per second, less the time spent compressing.
+"""
+import itertools
+import threading
+import time
+import zlib
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+# Bandwidth assumed for the time saved, in bytes per second (a 20 Mbit/s link)
+DEFAULT_BANDWIDTH = 2.5e6
+
+# zlib wbits of the HTTP content encodings: gzip header or zlib header
+_WBITS = {'gzip': 31, 'deflate': 15}
+
+
+def encodings():
+    """Return the content encodings available in this environment, preferred first"""
+    return (['br'] if brotli is not None else []) + ['gzip', 'deflate']
+
+
+class _BrotliCompressor:
+    """brotli.Compressor with the compress() and flush() methods of a zlib compressor"""
+
+    def __init__(self, quality):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def flush(self):
+        return self._compressor.finish()
+
+
+def compressor(encoding='gzip', level=None):
+    """Return a streaming compressor for `encoding`, with compress(data) and flush() methods"""
+    if encoding not in encodings():
+        raise ValueError(f'Unsupported content encoding {encoding}, use one of {encodings()}')
+    if encoding == 'br':
+        # The default quality of 11 is meant for static content, far too slow on the fly
+        return _BrotliCompressor(5 if level is None else level)
+    return zlib.compressobj(6 if level is None else level, zlib.DEFLATED, _WBITS[encoding])
+
+
+def compress(chunks, encoding='gzip', level=None):
+    """Compress the bytes in iterable `chunks`, yielding the compressed data as it comes"""
+    c = compressor(encoding, level)
+    for chunk in chunks:
+        data = c.compress(chunk)
+        if data:
+            yield data
+    yield c.flush()
+
+
+def decompress(chunks, encoding):
+    """Decompress the bytes in iterable `chunks` encoded with `encoding`, yielding as it comes"""
+    if encoding == 'identity':
+        yield from chunks
+        return
+    if encoding not in encodings():
+        raise ValueError(f'Unsupported content encoding {encoding}, use one of {encodings()}')
+    if encoding == 'br':
+        d = brotli.Decompressor()
+        process = getattr(d, 'process', None) or d.decompress
+        for chunk in chunks:
+            yield process(chunk)
+        return
+    d = zlib.decompressobj(_WBITS[encoding])
+    for chunk in chunks:
+        yield d.decompress(chunk)
+    yield d.flush()
+
+
+class Compression:
+    """
+    Compression settings and statistics for GNS3API, see GNS3API.use_compression().
+
+    Request bodies of at least `threshold` bytes (None compresses no requests) are compressed
+    with `encoding` at `level`, unless that saves less than `min_saving` (a fraction of the
+    size). `accept` is the Accept-Encoding header of all requests. `bandwidth` in bytes per
+    second is used to estimate the time saved.
+    """
+
+    def __init__(self, threshold=64 * 1024, encoding='gzip', level=None, min_saving=0.1,
+                 accept=None, bandwidth=DEFAULT_BANDWIDTH):
+        compressor(encoding, level)  # Fail early on unsupported settings
+        self.threshold = threshold
+        self.encoding = encoding
+        self.level = level
+        self.min_saving = min_saving
+        self.accept = ', '.join(encodings()) if accept is None else accept
+        self.bandwidth = bandwidth
+        self._lock = threading.Lock()
+        self.reset()
+
+    def __repr__(self):
+        return f'Compression(threshold={self.threshold}, encoding={self.encoding!r})'
+
+    def reset(self):
+        """Clear the statistics"""
+        with self._lock:
+            self.counts = {direction: {'messages': 0, 'compressed': 0, 'bytes': 0,
+                                       'wire_bytes': 0} for direction in ('sent', 'received')}
+            self.compress_seconds = 0.0
+
+    def _count(self, direction, size, wire_size, compressed, seconds=0.0):
+        with self._lock:
+            counts = self.counts[direction]
+            counts['messages'] += 1
+            counts['compressed'] += compressed
+            counts['bytes'] += size
+            counts['wire_bytes'] += wire_size
+            self.compress_seconds += seconds
+
+    def prepare(self, kwargs):
+        """Compress the body of a request given as requests keyword arguments, in place"""
+        data = kwargs.get('data')
+        headers = kwargs.get('headers') or {}
+        if self.threshold is None or data is None or isinstance(data, dict) \
+                or 'Content-Encoding' in headers:
+            return
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+
+        if isinstance(data, (bytes, bytearray)):
+            if len(data) < self.threshold:
+                return
+            start = time.perf_counter()
+            c = compressor(self.encoding, self.level)
+            body = c.compress(data) + c.flush()
+            seconds = time.perf_counter() - start
+            if len(body) > (1 - self.min_saving) * len(data):
+                self._count('sent', len(data), len(data), False, seconds)
+                return
+            self._count('sent', len(data), len(body), True, seconds)
+            kwargs['data'] = body
+        else:
+            # Streamed upload of unknown size, the first chunk decides
+            chunks = iter(lambda: data.read(64 * 1024), b'') if hasattr(data, 'read') \
+                else iter(data)
+            first = next(chunks, b'')
+            start = time.perf_counter()
+            c = compressor(self.encoding, self.level)
+            trial = len(c.compress(first) + c.flush())
+            seconds = time.perf_counter() - start
+            chunks = itertools.chain([first], chunks)
+            if trial > (1 - self.min_saving) * len(first):
+                kwargs['data'] = self._count_stream(chunks, seconds)
+                return
+            kwargs['data'] = self._compress_stream(chunks, seconds)
+
+        kwargs['headers'] = dict(headers, **{'Content-Encoding': self.encoding})
+
+    def _count_stream(self, chunks, seconds):
+        size = 0
+        try:
+            for chunk in chunks:
+                size += len(chunk)
+                yield chunk
+        finally:
+            self._count('sent', size, size, False, seconds)
+
+    def _compress_stream(self, chunks, seconds):
+        c = compressor(self.encoding, self.level)
+        size = wire_size = 0
+        try:
+            for chunk in itertools.chain(chunks, [None]):
+                start = time.perf_counter()
+                data = c.flush() if chunk is None else c.compress(chunk)
+                seconds += time.perf_counter() - start
+                size += len(chunk or b'')
+                wire_size += len(data)
+                # An empty chunk would end a chunked request body
+                if data:
+                    yield data
+        finally:
+            self._count('sent', size, wire_size, True, seconds)
+
+    def received(self, response, stream):
+        """Count a response, streamed responses are counted once their body has been read"""
+        if not hasattr(response.raw, 'tell'):
+            return
+        encoded = response.headers.get('Content-Encoding', 'identity') != 'identity'
+        if stream:
+            response._compression = (self, encoded)
+        else:
+            self._count('received', len(response.content), response.raw.tell(), encoded)
+
+    def count_received(self, response, encoded, chunks):
+        """Pass on the decoded `chunks` of a streamed response, counting them once read"""
+        size = 0
+        try:
+            for chunk in chunks:
+                size += len(chunk)
+                yield chunk
+        finally:
+            self._count('received', size, response.raw.tell(), encoded)
+
+    def stats(self):
+        """Return the bytes before and on the wire per direction, their ratio and time saved"""
+        with self._lock:
+            stats = {direction: dict(counts, ratio=_ratio(counts))
+                     for direction, counts in self.counts.items()}
+            saved = sum(c['bytes'] - c['wire_bytes'] for c in self.counts.values())
+            stats['compress_seconds'] = self.compress_seconds
+            stats['seconds_saved'] = saved / self.bandwidth - self.compress_seconds
+        return stats
+
+    def register(self, metrics):
+        """Export the compression ratios and time saved as gauges of a pygns3.metrics.Metrics"""
+        metrics.add_gauge('compression_sent_ratio', lambda: self.stats()['sent']['ratio'])
+        metrics.add_gauge('compression_received_ratio',
+                          lambda: self.stats()['received']['ratio'])
+        metrics.add_gauge('compression_seconds_saved', lambda: self.stats()['seconds_saved'])
+
+
+def _ratio(counts):
+    """Wire bytes per byte, 1.0 when nothing has been transferred"""
+    return counts['wire_bytes'] / counts['bytes'] if counts['bytes'] else 1.0
@@ -9,18 +9,52 @@ While the priority is to attain complete coverage of the underlying GNS3 API, ad
 functionality will be added such as easier interaction with nodes throygh telnet/SSH. Possibly
 even some cookie cutter style setup for Projects. Time will tell.
 """
+import bz2
+import contextvars
+import gzip
+import hashlib
 import json
+import lzma
+import marshal
+import os
 import platform
+import shutil
+import tempfile
+import uuid
+import struct
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from concurrent.futures import (FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor,
+                                as_completed, wait)
 from configparser import ConfigParser
 from pathlib import Path
-from requests import delete, get, post
+from urllib.parse import urlencode
+from requests import Response, Session
+from requests.adapters import HTTPAdapter
 from requests.auth import HTTPBasicAuth
 
+from .cassette import Cassette, CassetteAdapter
+from .codec import get_codec, iter_array
+from .metrics import LatencyWindow, RequestRecord, Trace, route_of
+
+# Absolute time.monotonic() deadline of the current operation, see GNS3API.deadline()
+_DEADLINE = contextvars.ContextVar('gns3api_deadline', default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a request can not complete within the deadline of its operation"""
+
 
 class GNS3API:
     """
     Global object which is dynamically populated with the configuration file.
     Explicitly used attributes are defined to avoid unresolved references in code inspection.
+
+    All requests go through a single shared `requests.Session` so TCP (and TLS) connections are
+    kept alive and reused by every wrapper class. The pool can be tuned through the attributes
+    below, either in the configuration file or with `configure_pool()`.
     """
     base = None
     cred = None
@@ -31,6 +65,51 @@ class GNS3API:
     protocol = None
     user = None
 
+    # Connection pool settings
+    keep_alive = True
+    pool_block = False
+    pool_connections = 10
+    pool_maxsize = 10
+    session = None
+
+    # Optional ResponseCache for get_request, see pygns3.cache
+    cache = None
+
+    # Concurrent identical GETs share a single request (see get_request)
+    coalesce = True
+    coalesced_requests = 0
+    _in_flight = {}
+    _in_flight_lock = threading.Lock()
+
+    # Timeout in seconds of every request, None waits forever. See also deadline().
+    timeout = None
+
+    # Hedged GETs: a duplicate request is sent when the first one has not answered within the
+    # hedge_quantile of the recent latencies of its route, whichever answers first is used
+    hedge = False
+    hedge_quantile = 0.95
+    hedge_min_delay = 0.01
+    hedged_requests = 0
+    hedge_wins = 0
+    _latencies = LatencyWindow()
+    _hedge_executor = None
+
+    # Optional AdaptiveLimiter for the number of requests in flight, see pygns3.limiter
+    limiter = None
+
+    # JSON codec for request and response bodies, orjson when installed, see use_codec()
+    codec = get_codec()
+
+    # Optional Compression of request and response bodies, see use_compression()
+    compression = None
+
+    # Cassette requests are recorded to or replayed from, see use_cassette()
+    cassette = None
+
+    # Optional Metrics, see pygns3.metrics, and the active traces (see trace())
+    metrics = None
+    traces = []
+
     @staticmethod
     def load_configuration(section='Server'):
         """
@@ -62,6 +141,7 @@ class GNS3API:
 
             GNS3API.cred = HTTPBasicAuth(GNS3API.user, GNS3API.password)
             GNS3API.base = f'{GNS3API.protocol}://{GNS3API.host}:{str(GNS3API.port)}/v2'
+            GNS3API.close()
         else:
             print(f'Platform: {system_platform}\n'
                   'Looked for configuration files at these locations:\n')
@@ -71,65 +151,515 @@ class GNS3API:
             raise FileNotFoundError('No Valid Configuration File Found')
 
     @staticmethod
-    def delete_request(path):
-        """performs a DELETE request to `path`"""
+    def configure_pool(pool_connections=None, pool_maxsize=None, pool_block=None,
+                       keep_alive=None):
+        """
+        Set the connection pool parameters and replace the shared session.
+
+        `pool_connections` is the number of per-host pools to keep, `pool_maxsize` the number of
+        connections kept open per host and `pool_block` makes callers wait for a free connection
+        instead of opening a throwaway one once `pool_maxsize` is reached. With `keep_alive`
+        disabled every request asks the server to close the connection afterwards.
+        """
+        if pool_connections is not None:
+            GNS3API.pool_connections = pool_connections
+        if pool_maxsize is not None:
+            GNS3API.pool_maxsize = pool_maxsize
+        if pool_block is not None:
+            GNS3API.pool_block = pool_block
+        if keep_alive is not None:
+            GNS3API.keep_alive = keep_alive
+        if GNS3API._hedge_executor is not None:
+            # Sized from pool_maxsize, created again on the next hedged GET
+            GNS3API._hedge_executor.shutdown(wait=False)
+            GNS3API._hedge_executor = None
+        GNS3API.close()
+        return GNS3API.get_session()
+
+    @staticmethod
+    def get_session():
+        """Return the shared session, creating it on first use."""
+        if GNS3API.session is None:
+            session = Session()
+            pool = {'pool_connections': int(GNS3API.pool_connections),
+                    'pool_maxsize': int(GNS3API.pool_maxsize),
+                    'pool_block': _as_bool(GNS3API.pool_block)}
+            if GNS3API.cassette is not None:
+                adapter = GNS3CassetteAdapter(GNS3API.cassette, GNS3API.base, **pool)
+            else:
+                adapter = GNS3Adapter(**pool)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            session.auth = GNS3API.cred
+            if not _as_bool(GNS3API.keep_alive):
+                session.headers['Connection'] = 'close'
+            if GNS3API.compression is not None:
+                session.headers['Accept-Encoding'] = GNS3API.compression.accept
+            GNS3API.session = session
+
+        return GNS3API.session
+
+    @staticmethod
+    def use_cassette(path, mode='record', realtime=False):
+        """
+        Record all requests to the cassette file at `path`, or replay them from it with `mode`
+        'replay' (sleeping the recorded latency per request with `realtime`), see pygns3.cassette.
+        Returns the Cassette, a `path` of None switches back to plain requests.
+        """
+        GNS3API.close()
+        GNS3API.cassette = None if path is None else Cassette(path, mode, realtime)
+        return GNS3API.cassette
+
+    @staticmethod
+    def use_compression(compression):
+        """
+        Negotiate compressed responses and compress large request bodies with `compression`, a
+        pygns3.compression.Compression which also keeps the statistics. None switches back to
+        uncompressed requests. Returns the Compression.
+        """
+        GNS3API.compression = compression
+        GNS3API.close()
+        return compression
+
+    @staticmethod
+    def use_codec(name=None):
+        """
+        Encode and decode JSON bodies with codec `name` ('json' or 'orjson'), or with the fastest
+        available one if `name` is None, see pygns3.codec. Returns the codec.
+        """
+        GNS3API.codec = get_codec(name)
+        return GNS3API.codec
+
+    @staticmethod
+    def close():
+        """
+        Close all pooled connections and the cassette file being recorded to. A new session is
+        created on the next request.
+        """
+        if GNS3API.cassette is not None:
+            GNS3API.cassette.close()
+        if GNS3API.session is not None:
+            GNS3API.session.close()
+            GNS3API.session = None
+
+    @staticmethod
+    def pool_stats():
+        """
+        Return a dict with the state of the connection pool per host, e.g.
+        {'http://127.0.0.1:3080': {'connections': 1, 'requests': 42, 'idle': 1}}
+
+        `connections` counts the connections the pool has created and `requests` the requests sent
+        over them, so their ratio shows how well connections are being reused.
+        """
+        stats = {}
+        if GNS3API.session is None:
+            return stats
+
+        adapter = GNS3API.session.get_adapter(f'{GNS3API.protocol or "http"}://')
+        pools = adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools[key]
+            stats[f'{pool.scheme}://{pool.host}:{pool.port}'] = {
+                'connections': pool.num_connections,
+                'requests': pool.num_requests,
+                'idle': pool.pool.qsize() if pool.pool is not None else 0,
+            }
+
+        return stats
+
+    @staticmethod
+    def request(method, path, **kwargs):
+        """
+        performs a `method` request to `path` through the shared session, all other request
+        methods end up here. Mutating requests invalidate the cached responses of the resource.
+        With a GNS3API.limiter the request first waits for a free slot (streams excepted).
+        """
+        limiter = GNS3API.limiter
+        if limiter is None or kwargs.get('stream'):
+            return GNS3API._request(method, path, **kwargs)
+
+        if not limiter.acquire(GNS3API.remaining()):
+            raise DeadlineExceeded(f'GNS3API {method} deadline exceeded waiting for {path}')
+        start = time.perf_counter()
+        ok = False
+        try:
+            response = GNS3API._request(method, path, **kwargs)
+            # Server errors and throttling mean the controller is overloaded
+            ok = response.status_code < 500 and response.status_code != 429
+            return response
+        finally:
+            limiter.release(time.perf_counter() - start, ok)
+
+    @staticmethod
+    def _request(method, path, **kwargs):
+        """performs a `method` request to `path` through the shared session, see request()"""
         url = f'{GNS3API.base}{path}'
+        deadline = _DEADLINE.get()
+        timeout = kwargs.pop('timeout', GNS3API.timeout)
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise DeadlineExceeded(f'GNS3API {method} deadline exceeded before URL: {url}')
+            timeout = remaining if timeout is None else min(float(timeout), remaining)
+        if timeout is not None:
+            # Streams (notifications, captures) may be quiet for long, only bound the connect
+            kwargs['timeout'] = (float(timeout), None) if kwargs.get('stream') else float(timeout)
+
+        compression = GNS3API.compression
+        if compression is not None:
+            compression.prepare(kwargs)
+
+        observers = GNS3API.traces
+        if GNS3API.metrics is not None:
+            observers = [GNS3API.metrics] + observers
+        if observers:
+            route = route_of(path)
+            for observer in observers:
+                observer.started(method, route)
+            started = time.perf_counter()
+        response = error = None
+        # TODO Improve Exception handling in request()
         try:
-            response = delete(url, auth=GNS3API.cred)
+            response = GNS3API.get_session().request(method, url, **kwargs)
+            if compression is not None and isinstance(response, Response):
+                compression.received(response, kwargs.get('stream'))
         except Exception as e:
-            raise Exception(f'GNS3API DELETE Error at URL: {url}') from e
+            error = e
+            if deadline is not None and time.monotonic() >= deadline:
+                raise DeadlineExceeded(f'GNS3API {method} deadline exceeded at URL: {url}') from e
+            raise Exception(f'GNS3API {method} Error at URL: {url}') from e
+        finally:
+            if method != 'GET' and GNS3API.cache is not None:
+                GNS3API.cache.invalidate(path)
+            if observers:
+                record = RequestRecord(method, path, route,
+                                       getattr(response, 'status_code', None), started,
+                                       time.perf_counter() - started, _body_size(kwargs),
+                                       _response_size(response, kwargs.get('stream')), error)
+                for observer in observers:
+                    observer.finished(record)
 
         return response
 
+    @staticmethod
+    @contextmanager
+    def trace():
+        """
+        Context manager which records every request made within the block, from any thread, and
+        yields a pygns3.metrics.Trace holding them, e.g. to profile a slow project load.
+        """
+        trace = Trace()
+        GNS3API.traces = GNS3API.traces + [trace]
+        try:
+            yield trace
+        finally:
+            GNS3API.traces = [t for t in GNS3API.traces if t is not trace]
+            trace.elapsed = time.perf_counter() - trace.start
+
+    @staticmethod
+    @contextmanager
+    def deadline(seconds):
+        """
+        Context manager which gives all requests made within the block, including those made
+        concurrently by get_requests(), a shared budget of `seconds`. Each request times out when
+        the budget runs out, later requests raise DeadlineExceeded without being sent. Nested
+        deadlines can only shorten the budget, None adds no deadline.
+        """
+        if seconds is None:
+            yield
+            return
+        deadline = time.monotonic() + seconds
+        current = _DEADLINE.get()
+        token = _DEADLINE.set(deadline if current is None else min(current, deadline))
+        try:
+            yield
+        finally:
+            _DEADLINE.reset(token)
+
+    @staticmethod
+    def remaining():
+        """Seconds left until the current deadline, None without one"""
+        deadline = _DEADLINE.get()
+        return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+    @staticmethod
+    def delete_request(path):
+        """performs a DELETE request to `path`"""
+        return GNS3API.request('DELETE', path)
+
     @staticmethod
     def get_request(path):
-        """performs a GET request to `path`"""
-        url = f'{GNS3API.base}{path}'
+        """
+        performs a GET request to `path`, served from GNS3API.cache when enabled.
+
+        With `GNS3API.coalesce` (the default) concurrent GETs of the same path share a single
+        request: callers arriving while one is in flight wait for it and get the same response
+        object, whose json() is decoded only once. Treat the decoded json as read-only.
+        """
         # This is still not completely right. Trying to figure out how to best deal with all
         # possible exceptions
         # Invalid path can be actual invalid path (404) or a 404 from GNS3 for an object not found.
         # The latter returns json with a description of the error. Codes differ (409 and others?)
-        # TODO Improve Exception handling in get_request()
+        cache = GNS3API.cache
+        if cache is not None:
+            response = cache.get(path)
+            if response is not None:
+                return response
+
+        if not GNS3API.coalesce:
+            return GNS3API._get_and_cache(path)
+
+        with GNS3API._in_flight_lock:
+            future = GNS3API._in_flight.get(path)
+            leader = future is None
+            if leader:
+                future = GNS3API._in_flight[path] = Future()
+            else:
+                GNS3API.coalesced_requests += 1
+        if not leader:
+            if not wait([future], GNS3API.remaining()).done:
+                raise DeadlineExceeded(f'GNS3API GET deadline exceeded waiting for {path}')
+            return future.result()
+
         try:
-            response = get(url, auth=GNS3API.cred)
-        except Exception as e:
-            raise Exception(f'GNS3API GET Error at URL: {url}') from e
+            response = GNS3API._get_and_cache(path)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with GNS3API._in_flight_lock:
+                del GNS3API._in_flight[path]
+        future.set_result(response)
+        return response
 
+    @staticmethod
+    def _get_and_cache(path):
+        """performs a GET request to `path` and stores the response in GNS3API.cache"""
+        if GNS3API.hedge:
+            response = GNS3API._hedged_get(path)
+        else:
+            response = GNS3API.request('GET', path)
+        if GNS3API.cache is not None and response.ok:
+            GNS3API.cache.put(path, response)
         return response
 
+    @staticmethod
+    def _hedged_get(path):
+        """
+        performs a GET request to `path`, plus a duplicate once the first one takes longer than
+        usual for its route. Returns the first successful response.
+        """
+        route = route_of(path)
+        delay = GNS3API._latencies.quantile(route, GNS3API.hedge_quantile)
+        if delay is None:
+            # Not enough samples of this route yet
+            return GNS3API._timed_get(path, route)
+
+        if GNS3API._hedge_executor is None:
+            # A first attempt and a hedge for as many callers as the pool has connections
+            GNS3API._hedge_executor = ThreadPoolExecutor(2 * int(GNS3API.pool_maxsize),
+                                                         thread_name_prefix='GNS3API-hedge')
+        executor = GNS3API._hedge_executor
+        running = threading.Event()
+
+        def first_get():
+            running.set()
+            return GNS3API._timed_get(path, route)
+
+        first = executor.submit(contextvars.copy_context().run, first_get)
+        # Waiting for a worker thread is not the controller being slow, start timing once it runs
+        running.wait(GNS3API.remaining())
+        if wait([first], max(delay, GNS3API.hedge_min_delay)).done:
+            return first.result()
+
+        second = executor.submit(contextvars.copy_context().run, GNS3API._timed_get, path, route)
+        with GNS3API._in_flight_lock:
+            GNS3API.hedged_requests += 1
+        pending = {first, second}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None and future.result().ok:
+                    if future is second:
+                        with GNS3API._in_flight_lock:
+                            GNS3API.hedge_wins += 1
+                    return future.result()
+        # Both failed, prefer an error response over an exception
+        for future in (first, second):
+            if future.exception() is None:
+                return future.result()
+        return first.result()
+
+    @staticmethod
+    def _timed_get(path, route):
+        """performs a GET request to `path` and records its latency for hedging"""
+        start = time.perf_counter()
+        response = GNS3API.request('GET', path)
+        GNS3API._latencies.observe(route, time.perf_counter() - start)
+        return response
+
+    @staticmethod
+    def get_requests(paths, max_workers=None):
+        """
+        Performs GET requests to all `paths` concurrently, with at most `max_workers` requests in
+        flight (defaults to the connection pool size). Returns a dict of path -> response.
+        """
+        paths = list(dict.fromkeys(paths))
+        if max_workers is None:
+            max_workers = int(GNS3API.pool_maxsize)
+        max_workers = max(1, min(max_workers, len(paths)))
+        if max_workers == 1:
+            return {path: GNS3API.get_request(path) for path in paths}
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # Each in a copy of the caller's context, so its deadline applies
+            futures = [executor.submit(contextvars.copy_context().run, GNS3API.get_request, path)
+                       for path in paths]
+            return {path: future.result() for path, future in zip(paths, futures)}
+
+    @staticmethod
+    def stream_request(path):
+        """
+        performs a GET request to `path` without reading the body, for endpoints which stream
+        (notifications, captures, exports). The caller should close the response when done.
+        """
+        return GNS3API.request('GET', path, stream=True)
+
+    @staticmethod
+    def iter_request(path, chunk_size=64 * 1024):
+        """
+        performs a GET request to `path` and yields the items of the JSON array it returns while
+        the body is being received, for listings too large to buffer, see pygns3.codec.iter_array().
+        The response is not cached. Raises a ValueError with the message of an error response.
+        """
+        response = GNS3API.stream_request(path)
+        try:
+            if not response.ok:
+                raise ValueError(response.json()['message'])
+            yield from iter_array(response.iter_content(chunk_size))
+        finally:
+            response.close()
+
     @staticmethod
     def post_request(path, data):
         """performs a POST request to `path`"""
+        return GNS3API.request('POST', path, data=data)
 
-        url = f'{GNS3API.base}{path}'
-        # TODO Improve Exception handling in post_request()
-        try:
-            response = post(url, data=data, auth=GNS3API.cred)
-        except Exception as e:
-            raise Exception(f'GNS3API POST Error {response.status_code} at URL: {url}') from e
+    @staticmethod
+    def put_request(path, data):
+        """performs a PUT request to `path`"""
+        return GNS3API.request('PUT', path, data=data)
 
-        return response
 
+class GNS3Response(Response):
+    """
+    requests.Response which decodes its json body only once, so responses shared by coalesced
+    or cached requests are not parsed again by every caller. Built by GNS3Adapter.
+    """
+
+    def __init__(self, response=None):
+        """`response` optionally is a requests.Response whose state is taken over"""
+        super().__init__()
+        if response is not None:
+            self.__dict__.update(response.__dict__)
+        self._json_lock = threading.Lock()
+
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        self._json_lock = threading.Lock()
+
+    def json(self, **kwargs):
+        if kwargs:
+            return super().json(**kwargs)
+        with self._json_lock:
+            if '_json' not in self.__dict__:
+                # JSON is UTF-8, so the body is decoded as is instead of going through self.text
+                self._json = GNS3API.codec.loads(self.content)
+        return self._json
+
+    def iter_content(self, chunk_size=1, decode_unicode=False):
+        chunks = super().iter_content(chunk_size, decode_unicode)
+        # Streamed responses are counted by GNS3API.compression as they are read
+        if '_compression' not in self.__dict__:
+            return chunks
+        compression, encoded = self.__dict__.pop('_compression')
+        return compression.count_received(self, encoded, chunks)
+
+
+class GNS3Adapter(HTTPAdapter):
+    """Transport adapter of the GNS3API session, its responses are GNS3Response objects"""
+
+    def build_response(self, req, resp):
+        return GNS3Response(super().build_response(req, resp))
 
-class GNS3Compute:
+
+class GNS3CassetteAdapter(GNS3Adapter, CassetteAdapter):
+    """CassetteAdapter whose recorded and replayed responses are GNS3Response objects"""
+
+    response_class = GNS3Response
+
+
+class LazyCollection:
+    """
+    Descriptor for a collection which is fetched on first access by calling the method named
+    `loader` on the instance. The result is cached in the instance __dict__, so later lookups are
+    plain attribute access. Assigning to the attribute replaces the cached value and deleting it
+    makes the next access fetch the collection again.
+    """
+
+    def __init__(self, loader):
+        self.loader = loader
+        self.name = None
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        value = getattr(instance, self.loader)()
+        instance.__dict__[self.name] = value
+        return value
+
+
+class DataView:
+    """
+    Mixin which reads the attributes a class does not define from the json dict held in the
+    attribute named by `data`, through `Struct.get()`, e.g. class GNS3Node(DataView, data='_node')
+    """
+    __slots__ = ()
+
+    def __init_subclass__(cls, data=None, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if data is not None:
+            cls._data_attribute = data
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return Struct.get(getattr(self, self._data_attribute), name)
+
+
+class GNS3Compute(DataView, data='_response'):
     """
     Compute endpoint which handles the actual simulation.
     """
 
-    def __init__(self, compute_id):
+    def __init__(self, compute_id, response=None):
+        """`response` optionally holds an already fetched /computes/{compute_id} response"""
         self.id = compute_id
-        self.connected = False
+        self._response = {'connected': False}
 
-        response = GNS3API.get_request(f'/computes/{self.id}')
+        if response is None:
+            response = GNS3API.get_request(f'/computes/{self.id}')
         if response.ok:
-            self._response = response.json()
+            # Copy, responses may be shared (see GNS3Response)
+            self._response = dict(response.json())
             # Pulling up the capabilities one level, makes more sense to me for now
             if self._response['connected']:
                 self._response.update(self._response['capabilities'])
             del self._response['capabilities']
 
-            self.__dict__.update(Struct(**self._response).__dict__)
-
     def __str__(self):
         max_key_width = max(map(len, self._response.keys()))
         return 'GNS3Compute settings:\n' + '\n'.join(
@@ -156,22 +686,232 @@ class GNS3Controller:
     almost all other (collections of) objects in GNS3.
     """
 
-    def __init__(self):
+    computes = LazyCollection('_load_computes')
+    projects = LazyCollection('_load_projects')
+
+    def __init__(self, max_workers=None, preload=False, cache_dir=None, max_age=None,
+                 timeout=None):
+        """
+        Only the version is fetched, computes and projects are loaded on first access. With
+        `preload` all computes and projects, including the collections of every project, are
+        fetched up front. Requests are made concurrently with at most `max_workers` in flight
+        (defaults to the connection pool size, 1 loads everything sequentially). `timeout` is
+        the budget in seconds for all requests of the load together, see GNS3API.deadline().
 
-        # Set version attribute
-        response = GNS3API.get_request('/version')
+        `cache_dir` enables the on-disk state cache, see preload().
+        """
+        self.max_workers = max_workers
+        with GNS3API.deadline(timeout):
+            if preload or cache_dir is not None:
+                self.preload(cache_dir, max_age)
+            else:
+                self._load_version()
+
+    def _load_version(self, response=None):
+        if response is None:
+            response = GNS3API.get_request('/version')
         self.version = response.json()['version']
 
-        self.computes = []
-        response = GNS3API.get_request(f'/computes')
-        for p in response.json():
-            self.computes.append(GNS3Compute(p['compute_id']))
+    def _load_computes(self, response=None):
+        if response is None:
+            response = GNS3API.get_request('/computes')
+        compute_ids = [c['compute_id'] for c in response.json()]
+        responses = GNS3API.get_requests([f'/computes/{c}' for c in compute_ids], self.max_workers)
+        return [GNS3Compute(c, responses[f'/computes/{c}']) for c in compute_ids]
 
+    def _load_projects(self, response=None):
+        if response is None:
+            response = GNS3API.get_request('/projects')
         # TODO check empty projects corner case behaviour
-        self.projects = []
-        response = GNS3API.get_request(f'/projects')
-        for p in response.json():
-            self.projects.append(GNS3Project(p['project_id']))
+        return [GNS3Project.from_settings(p, self.max_workers) for p in response.json()]
+
+    def iter_projects(self):
+        """Yield the projects one by one while /projects is being received, see iter_request()"""
+        for p in GNS3API.iter_request('/projects'):
+            yield GNS3Project.from_settings(p, self.max_workers)
+
+    def preload(self, cache_dir=None, max_age=None):
+        """
+        Fetch the version, all computes and all projects including their drawings, links, nodes
+        and snapshots in two concurrent batches.
+
+        With `cache_dir` the project payloads are also stored on disk (one file per controller
+        URL) and reused by the next preload. A cached project is used when the controller
+        version, its settings in the /projects listing and the hash of its .gns3 file (the
+        topology the controller saves on every change) are unchanged. The file is hashed for
+        closed projects as well, the listing does not change when a project is opened, edited
+        and closed again. Entries older than `max_age` seconds are always re-fetched. Runtime
+        state which is not saved in the .gns3 file, such as node status, may be stale in cached
+        projects.
+        """
+        responses = GNS3API.get_requests(['/version', '/computes', '/projects'], self.max_workers)
+        self._load_version(responses['/version'])
+
+        compute_ids = [c['compute_id'] for c in responses['/computes'].json()]
+        listing = responses['/projects'].json()
+        project_ids = [p['project_id'] for p in listing]
+
+        cached, digests = {}, {}
+        if cache_dir is not None:
+            cache_path = os.path.join(cache_dir, _state_cache_name(GNS3API.base))
+            cached, digests = self._valid_cache_entries(cache_path, listing, max_age)
+
+        paths = [f'/computes/{c}' for c in compute_ids]
+        for p in project_ids:
+            if p not in cached:
+                paths += GNS3Project.paths(p)
+        responses = GNS3API.get_requests(paths, self.max_workers)
+        for p, entry in cached.items():
+            responses.update({path: _StoredResponse(entry[key]) for path, key in
+                              zip(GNS3Project.paths(p), ('settings',) + GNS3Project.collections)})
+
+        self.computes = [GNS3Compute(c, responses[f'/computes/{c}']) for c in compute_ids]
+        self.projects = [GNS3Project(p, self.max_workers, responses) for p in project_ids]
+
+        if cache_dir is not None:
+            now = time.time()
+            entries = {}
+            for project in self.projects:
+                entries[project.project_id] = cached.get(project.project_id) or {
+                    'time': now,
+                    'digest': digests.get(project.project_id),
+                    'settings': project._response,
+                    'drawings': project._drawings,
+                    'nodes': project._nodes,
+                    'links': project._links,
+                    'snapshots': project._snapshots,
+                }
+            os.makedirs(cache_dir, exist_ok=True)
+            _write_atomic(cache_path, marshal.dumps({'format': STATE_CACHE_FORMAT,
+                                                     'version': self.version,
+                                                     'projects': entries}))
+
+    def _valid_cache_entries(self, cache_path, listing, max_age):
+        """Return the still valid cache entries and the current .gns3 digests of the projects"""
+        try:
+            with open(cache_path, 'rb') as f:
+                cache = marshal.load(f)
+        except (OSError, EOFError, ValueError, TypeError):
+            cache = {}
+        if cache.get('format') != STATE_CACHE_FORMAT or cache.get('version') != self.version:
+            cache = {}
+
+        files = {p['project_id']: f'/projects/{p["project_id"]}/files/{p["filename"]}'
+                 for p in listing}
+        responses = GNS3API.get_requests(files.values(), self.max_workers)
+        digests = {project_id: hashlib.sha256(responses[path].content).hexdigest()
+                   if responses[path].ok else None for project_id, path in files.items()}
+
+        now = time.time()
+        valid = {}
+        for settings in listing:
+            project_id = settings['project_id']
+            entry = cache.get('projects', {}).get(project_id)
+            if (entry is not None and entry['settings'] == settings
+                    and digests[project_id] is not None
+                    and entry['digest'] == digests[project_id]
+                    and (max_age is None or now - entry['time'] < max_age)):
+                valid[project_id] = entry
+        return valid, digests
+
+    def refresh(self):
+        """Re-fetch the version and the computes and projects which have been loaded."""
+        loaded = [name for name in ('computes', 'projects') if name in self.__dict__]
+        responses = GNS3API.get_requests(['/version'] + [f'/{name}' for name in loaded],
+                                         self.max_workers)
+        self._load_version(responses['/version'])
+        if 'computes' in loaded:
+            self.computes = self._load_computes(responses['/computes'])
+        if 'projects' in loaded:
+            self.projects = self._load_projects(responses['/projects'])
+
+    def export_all(self, dest_dir, workers=4, compress=None, compress_workers=None,
+                   include_images=False, force=False):
+        """
+        Export every project to `dest_dir` as <project name>.gns3project, e.g. for backups.
+
+        Projects are exported concurrently by `workers` threads. With `compress` ('gzip', 'bz2'
+        or 'xz') each archive is compressed afterwards by a pool of `compress_workers` processes,
+        while the remaining exports continue. Archives are written to a temporary file first and
+        renamed when complete, so `dest_dir` never holds partial archives.
+
+        A manifest in `dest_dir` records a hash of each project's .gns3 file. Projects whose file
+        is unchanged since the last run (and whose archive still exists and was exported with the
+        same `include_images`) are skipped, unless `force` is set. Returns a list of ExportResult
+        tuples.
+        """
+        if compress is not None and compress not in _COMPRESSORS:
+            raise ValueError(f'Unknown compression {compress}, use one of {list(_COMPRESSORS)}')
+        os.makedirs(dest_dir, exist_ok=True)
+        manifest_path = os.path.join(dest_dir, EXPORT_MANIFEST)
+        manifest = {}
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+
+        def export(project):
+            start = time.perf_counter()
+            name = project.name.replace(os.sep, '_')
+            archive = os.path.join(dest_dir, f'{name}.gns3project')
+            if compress is not None:
+                archive += _COMPRESSORS[compress][1]
+            try:
+                digest = hashlib.sha256(project.get_file(project.filename)).hexdigest()
+                previous = manifest.get(project.project_id, {})
+                if (not force and previous.get('digest') == digest
+                        and previous.get('archive') == os.path.basename(archive)
+                        and previous.get('include_images') == include_images
+                        and os.path.exists(archive)):
+                    return ExportResult(project.project_id, project.name, archive, 'skipped',
+                                        time.perf_counter() - start, 0, None), digest, None
+
+                handle, temp = tempfile.mkstemp(dir=dest_dir, prefix=f'.{name}.', suffix='.tmp')
+                os.close(handle)
+                try:
+                    size = project.export(temp, include_images=include_images)
+                    if compress is None:
+                        os.replace(temp, archive)
+                        temp = None
+                except Exception:
+                    os.remove(temp)
+                    raise
+                return ExportResult(project.project_id, project.name, archive, 'exported',
+                                    time.perf_counter() - start, size, None), digest, temp
+            except Exception as e:  # pylint: disable=broad-except
+                return ExportResult(project.project_id, project.name, archive, 'failed',
+                                    time.perf_counter() - start, 0, e), None, None
+
+        results = []
+        compressing = {}
+        compressor = ProcessPoolExecutor(compress_workers) if compress is not None else None
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for future in as_completed([executor.submit(export, p) for p in self.projects]):
+                    result, digest, temp = future.result()
+                    if temp is not None:
+                        job = compressor.submit(_compress_file, temp, result.path, compress)
+                        compressing[job] = (result, digest)
+                    else:
+                        results.append((result, digest))
+
+            for job in as_completed(compressing):
+                result, digest = compressing[job]
+                try:
+                    job.result()
+                except Exception as e:  # pylint: disable=broad-except
+                    result, digest = result._replace(status='failed', error=e), None
+                results.append((result, digest))
+        finally:
+            if compressor is not None:
+                compressor.shutdown()
+
+        for result, digest in results:
+            if digest is not None:
+                manifest[result.project_id] = {'digest': digest,
+                                               'archive': os.path.basename(result.path),
+                                               'include_images': include_images}
+        _write_atomic(manifest_path, json.dumps(manifest, indent=2).encode())
+        return [result for result, _ in results]
 
     def __repr__(self):
         return 'GNS3Controller()'
@@ -190,7 +930,7 @@ class GNS3Controller:
         """Checks if the server is running version corresponding to 'version_string'"""
 
         path = '/version'
-        data = json.dumps({'version': version_string})
+        data = GNS3API.codec.dumps({'version': version_string})
 
         response = GNS3API.post_request(path, data)
         return response.ok
@@ -214,14 +954,14 @@ class GNS3Controller:
             print(f'The server refused the command {response}')
 
 
-class GNS3Drawing:
+class GNS3Drawing(DataView, data='_drawing'):
     """An SVG object inside a project"""
+    __slots__ = ('_drawing', 'project_id', 'drawing_id')
 
     def __init__(self, drawing):
         self._drawing = drawing
         self.project_id = drawing['project_id']
         self.drawing_id = drawing['drawing_id']
-        self.__dict__.update(Struct(**drawing).__dict__)
 
     def __repr__(self):
         return f'GNS3Drawing({self.project_id}, {self.drawing_id})'
@@ -233,24 +973,31 @@ class GNS3Drawing:
         return 'GNS3Drawing:\n' + settings + ''
 
     @classmethod
-    def create(cls):
-        """ creates a new drawing object"""
-        # TODO implement create drawing
-        pass
+    def create(cls, project_id, svg, x=0, y=0, **kwargs):
+        """Creates a new drawing in the project with `project_id` and returns it
+
+        Additional properties (z, rotation) may be given through **kwargs"""
+        data = {'svg': svg, 'x': x, 'y': y}
+        data.update(kwargs)
+        response = GNS3API.post_request(f'/projects/{project_id}/drawings',
+                                        GNS3API.codec.dumps(data))
+        return cls(_created(response))
 
     def delete(self):
         """Deletes a drawing"""
-        # TODO implement delete drawing
-        pass
+        response = GNS3API.delete_request(f'/projects/{self.project_id}/drawings/{self.drawing_id}')
+        if not response.ok:
+            raise ValueError(response.json()['message'])
 
 
-class GNS3Image:
+class GNS3Image(DataView, data='image'):
     """An image available on a Compute node for a given emulator"""
 
+    __slots__ = ('image',)
+
     # TODO would also be easier if you could request an image by id. Check with devs.
     def __init__(self, image):
         self.image = image
-        self.__dict__.update(Struct(**image).__dict__)
 
     def __str__(self):
         max_key_width = max(map(len, self.image.keys()))
@@ -261,18 +1008,25 @@ class GNS3Image:
         return f'GNS3Image({self.image})'
 
 
-class GNS3Link:
+class GNS3Link(DataView, data='_link'):
     """A link between two GNS3Node objects"""
+    __slots__ = ('_link', 'project_id', 'link_id', '_nodes', 'from_node', 'to_node',
+                 'from_adapter_number', 'to_adapter_number', 'from_port_number', 'to_port_number',
+                 'from_port_name', 'to_port_name')
 
-    def __init__(self, link):
+    def __init__(self, link, nodes=None):
+        """
+        `nodes` optionally maps node ids to the GNS3Node objects of the project. Endpoints are
+        resolved from it, only nodes missing from the index are fetched from the API.
+        """
         self._link = link
         self.project_id = link['project_id']
         self.link_id = link['link_id']
         self._nodes = link['nodes']
-        # Instantiate GNS3Node objects to look up the pretty name of the ports
+        # GNS3Node objects are needed to look up the pretty name of the ports
         # TODO review this mess (too-many-instance-attributes)
-        self.from_node = GNS3Node.from_id(self.project_id, self._nodes[0]['node_id'])
-        self.to_node = GNS3Node.from_id(self.project_id, self._nodes[1]['node_id'])
+        self.from_node = self._resolve_node(self._nodes[0]['node_id'], nodes)
+        self.to_node = self._resolve_node(self._nodes[1]['node_id'], nodes)
         self.from_adapter_number = self._nodes[0]['adapter_number']
         self.to_adapter_number = self._nodes[1]['adapter_number']
         self.from_port_number = self._nodes[0]['port_number']
@@ -281,7 +1035,6 @@ class GNS3Link:
                                                        self.from_port_number)
         self.to_port_name = self.to_node.port_name(self.to_adapter_number,
                                                    self.to_port_number)
-        self.__dict__.update(Struct(**link).__dict__)
 
     def __repr__(self):
         return f'GNS3link({self.project_id}, {self.link_id})'
@@ -297,66 +1050,197 @@ class GNS3Link:
                 f'    {"from":{max_key_width + 1}} {from_port}\n'
                 f'    {"to":{max_key_width + 1}} {to_port}\n')
 
+    def _resolve_node(self, node_id, nodes):
+        if nodes is not None and node_id in nodes:
+            return nodes[node_id]
+        return GNS3Node.from_id(self.project_id, node_id)
+
     @classmethod
-    def create(cls):
-        """ creates a new link object"""
-        # TODO implement create link
-        pass
+    def create(cls, from_node, from_port, to_node, to_port):
+        """Creates a link between two GNS3Node objects and returns it
+
+        Ports are given as a name (e.g. 'f0/0') or an (adapter_number, port_number) tuple"""
+        data = cls._endpoints(from_node, from_port, to_node, to_port)
+        response = GNS3API.post_request(f'/projects/{from_node.project_id}/links',
+                                        GNS3API.codec.dumps(data))
+        nodes = {from_node.node_id: from_node, to_node.node_id: to_node}
+        return cls(_created(response), nodes)
+
+    @staticmethod
+    def _endpoints(from_node, from_port, to_node, to_port):
+        """Return the body of a request which creates a link, see create()"""
+        endpoints = []
+        for node, port in ((from_node, from_port), (to_node, to_port)):
+            node_port = node.port(*port) if isinstance(port, tuple) else node.port_by_name(port)
+            if node_port is None:
+                raise ValueError(f'Node {node.name} has no port {port}')
+            endpoints.append({'node_id': node.node_id,
+                              'adapter_number': node_port.adapter_number,
+                              'port_number': node_port.port_number})
+        return {'nodes': endpoints}
 
     def delete(self):
         """Deletes a link"""
-        # TODO implement delete link
-        pass
-
+        response = GNS3API.delete_request(f'/projects/{self.project_id}/links/{self.link_id}')
+        if not response.ok:
+            raise ValueError(response.json()['message'])
+
+    def start_capture(self, capture_file_name=None, data_link_type='DLT_EN10MB'):
+        """Start a packet capture on the link"""
+        data = {'data_link_type': data_link_type}
+        if capture_file_name is not None:
+            data['capture_file_name'] = capture_file_name
+        self._capture_request('start_capture', data)
+
+    def stop_capture(self):
+        """Stop the packet capture on the link"""
+        self._capture_request('stop_capture', {})
+
+    def _capture_request(self, action, data):
+        path = f'/projects/{self.project_id}/links/{self.link_id}/{action}'
+        response = GNS3API.post_request(path, GNS3API.codec.dumps(data))
+        # Refresh in place from the returned link, e.g. capturing and capture_file_path
+        nodes = {self.from_node.node_id: self.from_node, self.to_node.node_id: self.to_node}
+        self.__init__(_created(response), nodes)
+
+    def capture_stream(self, tee=None, chunk_size=64 * 1024, tee_buffer_size=1024 * 1024):
+        """
+        Generator which yields the captured packets (PcapPacket tuples) as they arrive. The
+        capture is read in chunks of `chunk_size` and never held in memory as a whole. The
+        stream does not end by itself: stop iterating (or close the generator) when done.
 
-class GNS3Node:
+        With `tee` the raw pcap stream is also written to the file at that path, using a write
+        buffer of `tee_buffer_size` bytes. The file is a valid pcap file which can be opened in
+        Wireshark.
+        """
+        path = f'/projects/{self.project_id}/links/{self.link_id}/pcap'
+        response = GNS3API.stream_request(path)
+        tee_file = None
+        try:
+            if not response.ok:
+                raise ValueError(f'No capture available on link {self.link_id}')
+            chunks = response.iter_content(chunk_size=chunk_size)
+            if tee is not None:
+                tee_file = open(tee, 'wb', buffering=tee_buffer_size)
+                chunks = _tee(chunks, tee_file)
+            yield from _pcap_packets(chunks)
+        finally:
+            if tee_file is not None:
+                tee_file.close()
+            response.close()
+
+
+class GNS3Node(DataView, data='_node'):
     """Represents a node in a GNS3Project"""
+    __slots__ = ('_node', 'project_id', 'node_id', 'properties', 'ports', '_ports_by_number',
+                 '_ports_by_name')
 
     def __init__(self, node):
-        self.name = None
         self._node = node
-        ports = node['ports']
         self.project_id = node['project_id']
         self.node_id = node['node_id']
-        self.__dict__.update(Struct(**node).__dict__)
-        self.properties = GNS3NodeProperties(self._node['properties'])
-        self.ports = [GNS3NodePort(p) for p in ports]
+        self.properties = GNS3NodeProperties(node['properties'])
+        self.ports = [GNS3NodePort(p) for p in node['ports']]
+        # Port lookup indexes, the first port wins in case of duplicates
+        self._ports_by_number = {}
+        self._ports_by_name = {}
+        for port in self.ports:
+            self._ports_by_number.setdefault((port.adapter_number, port.port_number), port)
+            for name in (port.short_name, port._node_port.get('name')):
+                if name is not None:
+                    self._ports_by_name.setdefault(name, port)
 
     def __repr__(self):
         return f'GNS3Node({self._node})'
 
     def __str__(self):
-        items = self._node
+        items = dict(self._node)
         items['ports'] = str(len(items['ports']))
         del items['properties']
         max_key_width = max(map(len, self._node.keys()))
         settings = '\n'.join([f'    {k:{max_key_width + 1}} {v}' for k, v in items.items()]) + '\n'
         return 'GNSNode settings:\n' + settings
 
+    @classmethod
+    def create(cls, project_id, name, node_type, compute_id='local', **kwargs):
+        """Creates a new node in the project with `project_id` and returns it
+
+        Additional settings (properties, symbol, x, y, ...) may be given through **kwargs"""
+        data = {'name': name, 'node_type': node_type, 'compute_id': compute_id}
+        data.update(kwargs)
+        response = GNS3API.post_request(f'/projects/{project_id}/nodes', GNS3API.codec.dumps(data))
+        return cls(_created(response))
+
+    def delete(self):
+        """Deletes a node"""
+        response = GNS3API.delete_request(f'/projects/{self.project_id}/nodes/{self.node_id}')
+        if not response.ok:
+            raise ValueError(response.json()['message'])
+
     @classmethod
     def from_id(cls, project_id, node_id):
         """Return a GNS3Node object from project- and node id"""
         response = GNS3API.get_request(f'/projects/{project_id}/nodes/{node_id}').json()
         return cls(response)
 
+    def refresh(self):
+        """Re-fetch the node and update it in place"""
+        response = GNS3API.get_request(f'/projects/{self.project_id}/nodes/{self.node_id}')
+        if not response.ok:
+            raise ValueError(response.json()['message'])
+        self.__init__(response.json())
+
+    def start(self):
+        """Start the node, the status may still be 'stopped' when this returns"""
+        self._action('start')
+
+    def stop(self):
+        """Stop the node"""
+        self._action('stop')
+
+    def suspend(self):
+        """Suspend the node"""
+        self._action('suspend')
+
+    def reload(self):
+        """Reload (restart) the node"""
+        self._action('reload')
+
+    def _action(self, action):
+        path = f'/projects/{self.project_id}/nodes/{self.node_id}/{action}'
+        response = GNS3API.post_request(path, data={})
+        if not response.ok:
+            raise ValueError(response.json()['message'])
+        # Controllers return the updated node, older ones answer 204 without a body
+        if response.status_code != 204:
+            self.__init__(response.json())
+
+    def port(self, adapter_number, port_number):
+        """Return the GNS3NodePort with adapter number/port number, or None"""
+        return self._ports_by_number.get((adapter_number, port_number))
+
+    def port_by_name(self, name):
+        """Return the GNS3NodePort with short name (e.g. f0/0) or full name, or None"""
+        return self._ports_by_name.get(name)
+
     def port_name(self, adapter_number, port_number):
         """Return a port name (e.g. f0/0) given its adapter number/port number"""
-        for port in self.ports:
-            if (port.adapter_number == adapter_number) & (port.port_number == port_number):
-                return port.short_name
+        port = self._ports_by_number.get((adapter_number, port_number))
+        if port is None:
+            return 'Unknown'
+        return port.short_name
 
-        return 'Unknown'
 
-
-class GNS3NodePort:
+class GNS3NodePort(DataView, data='_node_port'):
     """A port on a GNS3Node."""
 
+    __slots__ = ('_node_port', 'adapter_number', 'port_number', 'short_name')
+
     def __init__(self, node_port):
-        self.adapter_number = None
-        self.port_number = None
-        self.short_name = None
         self._node_port = node_port
-        self.__dict__.update(Struct(**node_port).__dict__)
+        self.adapter_number = node_port.get('adapter_number')
+        self.port_number = node_port.get('port_number')
+        self.short_name = node_port.get('short_name')
 
     def __repr__(self):
         return f'GNS3NodePort({self._node_port})'
@@ -368,12 +1252,13 @@ class GNS3NodePort:
         return 'GNSNodePort:\n' + settings
 
 
-class GNS3NodeProperties:
+class GNS3NodeProperties(DataView, data='_node_properties'):
     """Property section of a GNS3Node settings"""
 
+    __slots__ = ('_node_properties',)
+
     def __init__(self, node_properties):
         self._node_properties = node_properties
-        self.__dict__.update(Struct(**node_properties).__dict__)
 
     def __repr__(self):
         return f'GNS3NodeProperties({self._node_properties})'
@@ -385,20 +1270,38 @@ class GNS3NodeProperties:
         return 'GNSNodeProperties:\n' + settings + ''
 
 
-class GNS3Project:
+class GNS3Project(DataView, data='_response'):
     """A project is a collection of nodes, links, drawings and snapshots."""
 
-    def __init__(self, project_id):
+    # Nodes come before links, links are resolved against them
+    collections = ('drawings', 'nodes', 'links', 'snapshots')
+    listener = None
+    drawings = LazyCollection('_load_drawings')
+    links = LazyCollection('_load_links')
+    nodes = LazyCollection('_load_nodes')
+    snapshots = LazyCollection('_load_snapshots')
+
+    def __init__(self, project_id, max_workers=None, responses=None, preload=False,
+                 timeout=None):
+        """
+        Only the project settings are fetched, the drawings, links, nodes and snapshots are
+        loaded on first access. With `preload` they are all fetched up front, concurrently with
+        at most `max_workers` requests in flight. `responses` optionally holds already fetched
+        responses for (some of) `GNS3Project.paths(project_id)`. `timeout` is the budget in
+        seconds for all requests of the load together, see GNS3API.deadline().
+        """
         self.project_id = project_id
-        self._load_settings()
-        self._drawings = GNS3API.get_request(f'/projects/{self.project_id}/drawings').json()
-        self.drawings = [GNS3Drawing(d) for d in self._drawings]
-        self._links = GNS3API.get_request(f'/projects/{self.project_id}/links').json()
-        self.links = [GNS3Link(l) for l in self._links]
-        self._nodes = GNS3API.get_request(f'/projects/{self.project_id}/nodes').json()
-        self.nodes = [GNS3Node(n) for n in self._nodes]
-        self._snapshots = GNS3API.get_request(f'/projects/{self.project_id}/snapshots').json()
-        self.snapshots = [GNS3Snapshot(s) for s in self._snapshots]
+        self.max_workers = max_workers
+        path = f'/projects/{self.project_id}'
+        if responses is None:
+            paths = self.paths(project_id) if preload else [path]
+            with GNS3API.deadline(timeout):
+                responses = GNS3API.get_requests(paths, max_workers)
+
+        self._set_settings(responses[path])
+        for name in self.collections:
+            if f'{path}/{name}' in responses:
+                setattr(self, name, getattr(self, f'_load_{name}')(responses[f'{path}/{name}']))
 
     def __repr__(self):
         return f'GNS3Project(\'{self.project_id}\')'
@@ -421,38 +1324,154 @@ class GNS3Project:
         Returns a GNS3Project instance"""
         data = {'name': name}
         data.update(kwargs)
-        response = GNS3API.post_request('/projects', json.dumps(data))
+        response = GNS3API.post_request('/projects', GNS3API.codec.dumps(data))
 
         if response.status_code == 201:
-            project_id = json.loads(response.content)['project_id']
+            project_id = GNS3API.codec.loads(response.content)['project_id']
             return GNS3Project(project_id)
         else:
-            msg = json.loads(response.content)['message']
+            msg = GNS3API.codec.loads(response.content)['message']
             raise ValueError(msg)
 
     def delete(self):
         """Delete the project from the compute"""
         response = GNS3API.delete_request(f'/projects/{self.project_id}')
         if response.status_code == 404:
-            msg = json.loads(response.content)['message']
+            msg = GNS3API.codec.loads(response.content)['message']
             raise ValueError(msg)
 
 
-    def _load_settings(self):
-        response = GNS3API.get_request(f'/projects/{self.project_id}')
-        if response.ok:
-            self._response = response.json()
-            self.__dict__.update(Struct(**self._response).__dict__)
+    @classmethod
+    def from_settings(cls, settings, max_workers=None):
+        """Return a GNS3Project from its settings (e.g. an item of /projects) without requests"""
+        project = cls.__new__(cls)
+        project.project_id = settings['project_id']
+        project.max_workers = max_workers
+        project._update_settings(settings)
+        return project
 
-    def add_drawing(self, drawing: GNS3Drawing):
-        """adds a drawing to the project"""
-        # TODO implement add_drawing
-        pass
+    @classmethod
+    def paths(cls, project_id):
+        """Return the API paths which are fetched to load the project with `project_id`"""
+        path = f'/projects/{project_id}'
+        return [path] + [f'{path}/{c}' for c in cls.collections]
 
-    def add_link(self, link: GNS3Link):
-        """adds a link to the project"""
-        # TODO implement add_link
-        pass
+    def refresh(self):
+        """
+        Re-fetch the project settings and the collections which have been loaded. Objects which
+        still exist are updated in place, so references to them (e.g. from links) stay valid.
+        """
+        path = f'/projects/{self.project_id}'
+        loaded = [name for name in self.collections if name in self.__dict__]
+        responses = GNS3API.get_requests([path] + [f'{path}/{name}' for name in loaded],
+                                         self.max_workers)
+        self._set_settings(responses[path])
+        for name in loaded:
+            self._merge(name, getattr(self, f'_load_{name}')(responses[f'{path}/{name}']))
+
+    def _merge(self, name, fresh):
+        # Fresh objects replace the ones which are gone, the others take over their data by id
+        id_key = f'{name[:-1]}_id'
+        current = {getattr(o, id_key): o for o in self.__dict__[name]}
+        args = ({n.node_id: n for n in self.nodes},) if name == 'links' else ()
+        merged = []
+        for obj in fresh:
+            existing = current.get(getattr(obj, id_key))
+            if existing is not None:
+                existing.__init__(getattr(obj, obj._data_attribute), *args)
+                obj = existing
+            merged.append(obj)
+        setattr(self, name, merged)
+
+    def _get_collection(self, name, response):
+        if response is None:
+            response = GNS3API.get_request(f'/projects/{self.project_id}/{name}')
+        return response.json()
+
+    def _load_drawings(self, response=None):
+        self._drawings = self._get_collection('drawings', response)
+        return [GNS3Drawing(d) for d in self._drawings]
+
+    def _load_links(self, response=None):
+        self._links = self._get_collection('links', response)
+        # Links resolve their endpoints from the bulk node list instead of one GET per endpoint
+        node_index = {n.node_id: n for n in self.nodes}
+        return [GNS3Link(l, node_index) for l in self._links]
+
+    def _load_nodes(self, response=None):
+        self._nodes = self._get_collection('nodes', response)
+        return [GNS3Node(n) for n in self._nodes]
+
+    def _load_snapshots(self, response=None):
+        self._snapshots = self._get_collection('snapshots', response)
+        return [GNS3Snapshot(s) for s in self._snapshots]
+
+    def iter_nodes(self):
+        """
+        Yield the nodes one by one while they are being received, see GNS3API.iter_request().
+        Unlike the nodes attribute the nodes are not kept, so memory use stays flat.
+        """
+        for n in GNS3API.iter_request(f'/projects/{self.project_id}/nodes'):
+            yield GNS3Node(n)
+
+    def iter_links(self):
+        """Yield the links one by one while they are being received, see iter_nodes()"""
+        # Endpoints are resolved against the nodes attribute, which is loaded if need be
+        node_index = {n.node_id: n for n in self.nodes}
+        for l in GNS3API.iter_request(f'/projects/{self.project_id}/links'):
+            yield GNS3Link(l, node_index)
+
+    def _load_settings(self):
+        # A running listener keeps the settings current, no need to poll
+        if self.listener is not None and self.listener.is_alive():
+            return
+        self._set_settings(GNS3API.get_request(f'/projects/{self.project_id}'))
+
+    def listen(self, callback=None):
+        """
+        Start a GNS3ProjectListener which applies the project notifications to this object (and
+        its loaded collections) in the background. `callback` is called with every notification.
+        """
+        if self.listener is None or not self.listener.is_alive():
+            self.listener = GNS3ProjectListener(self, callback)
+            self.listener.start()
+        return self.listener
+
+    def stop_listening(self):
+        """Stop the background listener started with listen()"""
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+
+    def _set_settings(self, response):
+        if response.ok:
+            self._update_settings(response.json())
+
+    def _update_settings(self, settings):
+        self._response = settings
+
+    def add_drawing(self, svg, x=0, y=0, **kwargs):
+        """adds a drawing to the project, see GNS3Drawing.create()"""
+        drawing = GNS3Drawing.create(self.project_id, svg, x, y, **kwargs)
+        self._add_to_collection('drawings', drawing)
+        return drawing
+
+    def add_link(self, from_node, from_port, to_node, to_port):
+        """adds a link to the project, see GNS3Link.create()"""
+        link = GNS3Link.create(from_node, from_port, to_node, to_port)
+        self._add_to_collection('links', link)
+        return link
+
+    def add_node(self, name, node_type, compute_id='local', **kwargs):
+        """adds a node to the project, see GNS3Node.create()"""
+        node = GNS3Node.create(self.project_id, name, node_type, compute_id, **kwargs)
+        self._add_to_collection('nodes', node)
+        return node
+
+    def _add_to_collection(self, name, *objects):
+        # Only collections which have been loaded, the others include new objects when fetched
+        if name in self.__dict__:
+            setattr(self, name, self.__dict__[name] + list(objects))
 
     def add_snapshot(self, name):
         """Takes a snapshot of the project"""
@@ -497,15 +1516,60 @@ class GNS3Project:
         self._load_settings()
         print('All nodes have been suspended.')
 
-    def import_project(self):
-        """import a project"""
-        # TODO Implement import_project function
-        pass
+    @classmethod
+    def import_project(cls, source, name=None, project_id=None, path=None,
+                       chunk_size=1024 * 1024, progress=None):
+        """
+        Import a portable project archive (.gns3project) and return the new GNS3Project.
 
-    def export(self):
-        """import a project"""
-        # TODO Implement export function
-        pass
+        `source` is the path of the archive or a binary file-like object (an open file, an
+        mmap.mmap, ...). It is uploaded in chunks of `chunk_size` bytes, so the archive is never
+        held in memory as a whole. `progress` is called with (bytes_sent, bytes_per_second) after
+        every chunk. `path` (local server only) is where the project is created on the server.
+        """
+        project_id = project_id or str(uuid.uuid4())
+        query = {k: v for k, v in (('name', name), ('path', path)) if v is not None}
+        url = f'/projects/{project_id}/import'
+        if query:
+            url += f'?{urlencode(query)}'
+
+        file = open(source, 'rb') if isinstance(source, (str, Path)) else source
+        try:
+            chunks = iter(lambda: file.read(chunk_size), b'')
+            response = GNS3API.post_request(url, _with_progress(chunks, progress))
+        finally:
+            if file is not source:
+                file.close()
+
+        if not response.ok:
+            raise ValueError(f'Unable to import project: {response.text}')
+        return cls(response.json()['project_id'])
+
+    def export(self, path, include_images=False, chunk_size=1024 * 1024, progress=None):
+        """
+        Export the project as a portable archive (.gns3project) to the file at `path`.
+
+        The archive is streamed straight to disk in chunks of `chunk_size` bytes, so it is never
+        held in memory as a whole. `progress` is called with (bytes_received, bytes_per_second)
+        after every chunk. Returns the number of bytes written.
+        """
+        url = f'/projects/{self.project_id}/export'
+        if include_images:
+            url += '?include_images=1'
+
+        response = GNS3API.stream_request(url)
+        try:
+            if not response.ok:
+                raise ValueError(f'Unable to export project {self.project_id}: {response.text}')
+            written = 0
+            with open(path, 'wb') as file:
+                chunks = response.iter_content(chunk_size=chunk_size)
+                for chunk in _with_progress(chunks, progress):
+                    written += file.write(chunk)
+        finally:
+            response.close()
+
+        return written
 
     def duplicate(self):
         """import a project"""
@@ -516,13 +1580,20 @@ class GNS3Project:
         """Get a file from a project. Beware you have warranty to be able to access only to file
         global to the project (for example README.txt)
         """
-        # TODO Implement get_file function
-        pass
+        response = GNS3API.get_request(f'/projects/{self.project_id}/files/{file}')
+        if not response.ok:
+            raise FileNotFoundError(f'No file {file} in project {self.project_id}')
+        return response.content
 
-    def write_file(self, file):
-        """Write a file to a project"""
-        # TODO Implement write_file function
-        pass
+    def write_file(self, file, data):
+        """
+        Write a file to a project. `data` is bytes, a binary file-like object or an iterable of
+        bytes, the latter two are uploaded in chunks.
+        """
+        response = GNS3API.post_request(f'/projects/{self.project_id}/files/{file}', data)
+        if not response.ok:
+            raise ValueError(f'Unable to write {file} to project {self.project_id}: '
+                             f'{response.text}')
 
     @classmethod
     def from_name(cls, name):
@@ -531,20 +1602,128 @@ class GNS3Project:
         all_projects = response.json()
         for p in all_projects:
             if p['name'] == name:
-                return cls(p['project_id'])
+                return cls.from_settings(p)
         raise FileNotFoundError(f'No project found with name {name}')
 
         # TODO check out notifications and how to implement
 
 
-class GNS3Snapshot:
+class GNS3ProjectListener(threading.Thread):
+    """
+    Background thread which follows /projects/{project_id}/notifications and applies the events
+    (node.updated, link.created, drawing.deleted, project.updated, ...) in place to a GNS3Project.
+    Only collections which have been loaded are updated, the others are fetched fresh on access.
+    Collections are replaced rather than mutated, so readers iterating over them are not affected.
+
+    The project is refreshed on every connection, as notifications may have been missed before
+    it, and on snapshot.restored. Objects which still exist are updated in place.
+    """
+    wrappers = {
+        'drawing': ('drawings', 'drawing_id', GNS3Drawing),
+        'link': ('links', 'link_id', GNS3Link),
+        'node': ('nodes', 'node_id', GNS3Node),
+    }
+
+    def __init__(self, project, callback=None, retry_interval=1.0):
+        super().__init__(name=f'GNS3ProjectListener-{project.project_id}', daemon=True)
+        self.project = project
+        self.callback = callback
+        self.retry_interval = retry_interval
+        self.condition = threading.Condition()
+        self.connected = threading.Event()
+        self.received = 0
+        self._response = None
+        self._stopped = threading.Event()
+
+    def run(self):
+        path = f'/projects/{self.project.project_id}/notifications'
+        while not self._stopped.is_set():
+            try:
+                self._response = GNS3API.stream_request(path)
+                # Catch up on whatever happened since the project was loaded or the connection
+                # dropped, notifications are only sent from now on
+                self.project.refresh()
+                self.connected.set()
+                for line in self._response.iter_lines():
+                    if self._stopped.is_set():
+                        break
+                    if line:
+                        self.apply(GNS3API.codec.loads(line))
+            except Exception:  # pylint: disable=broad-except
+                if not self._stopped.is_set():
+                    time.sleep(self.retry_interval)
+            finally:
+                self.connected.clear()
+                if self._response is not None:
+                    self._response.close()
+
+    def stop(self):
+        """Stop following notifications"""
+        self._stopped.set()
+        if self._response is not None:
+            self._response.close()
+
+    def wait_for(self, predicate, timeout=None):
+        """Block until `predicate()` is true, re-evaluating it after every notification."""
+        with self.condition:
+            return self.condition.wait_for(predicate, timeout)
+
+    def apply(self, notification):
+        """Apply a single notification ({'action': ..., 'event': ...}) to the project"""
+        action = notification.get('action', '')
+        event = notification.get('event')
+        kind, _, change = action.partition('.')
+
+        if kind in self.wrappers and isinstance(event, dict):
+            self._apply_collection(kind, change, event)
+        elif action == 'project.updated':
+            self.project._update_settings(event)
+        elif action == 'project.closed':
+            self.project._update_settings(dict(self.project._response, status='closed'))
+        elif action == 'snapshot.restored':
+            self.restored()
+
+        self.received += 1
+        with self.condition:
+            self.condition.notify_all()
+        if self.callback is not None:
+            self.callback(notification)
+
+    def restored(self):
+        """Called when a snapshot has been restored, refreshes the project"""
+        self.project.refresh()
+
+    def _apply_collection(self, kind, change, event):
+        name, id_key, wrapper = self.wrappers[kind]
+        if name not in self.project.__dict__:
+            return
+
+        current = self.project.__dict__[name]
+        existing = [o for o in current if getattr(o, id_key) == event[id_key]]
+        if change == 'deleted':
+            setattr(self.project, name, [o for o in current if getattr(o, id_key) != event[id_key]])
+            return
+
+        if kind == 'link':
+            args = (event, {n.node_id: n for n in self.project.nodes})
+        else:
+            args = (event,)
+        if existing:
+            # Update in place, other objects (e.g. links to a node) keep a valid reference
+            existing[0].__init__(*args)
+        elif change in ('created', 'updated'):
+            setattr(self.project, name, current + [wrapper(*args)])
+
+
+class GNS3Snapshot(DataView, data='_snapshot'):
     """Project snapshot"""
 
+    __slots__ = ('_snapshot', 'project_id', 'snapshot_id')
+
     def __init__(self, snapshot):
         self._snapshot = snapshot
         self.project_id = snapshot['project_id']
         self.snapshot_id = snapshot['snapshot_id']
-        self.__dict__.update(Struct(**snapshot).__dict__)
 
     def __str__(self):
         max_key_width = max(map(len, self._snapshot.keys()))
@@ -556,15 +1735,15 @@ class GNS3Snapshot:
         return f'GNS3Snapshot({self._snapshot})'
 
 
-class GNS3VM:
+class GNS3VM(DataView, data='_response'):
     """Holds information on the GNS3 VM"""
 
     # TODO figure out what happens if the GNS3 VM is not configured / other issues
     def __init__(self):
+        self._response = {}
         response = GNS3API.get_request(f'/gns3vm')
         if response.ok:
             self._response = response.json()
-            self.__dict__.update(Struct(**self._response).__dict__)
 
         self.engines = []
         response = GNS3API.get_request(f'/gns3vm/engines')
@@ -582,16 +1761,16 @@ class GNS3VM:
         return f'GNS3VM()'
 
 
-class GNS3VMEngine:
+
+class GNS3VMEngine(DataView, data='_engine_info'):
     """Holds information on the GNS3 VM Engine"""
 
     # TODO Ask why GNS3VMEngine is not in API with an id.
     # e.g. /gns3vm/engines/{engine_id}  Like most other objects.
     # TODO figure out what happens if the GNS3 VM is not configured / other issues
     def __init__(self, engine_info):
-        self.engine_id = None
-        self._engine_info = engine_info
-        self.__dict__.update(Struct(**engine_info).__dict__)
+        self._engine_info = dict(engine_info)
+        self.engine_id = engine_info.get('engine_id')
 
         self.vms = []
         response = GNS3API.get_request(f'/gns3vm/engines/{self.engine_id}/vms')
@@ -608,23 +1787,210 @@ class GNS3VMEngine:
 
     # Bit of a hack, should clean up later, but built from dict which is botched on __init__
     def __repr__(self):
-        original_info = self._engine_info
+        original_info = dict(self._engine_info)
         del original_info['vms']
         return f'GNS3VMEngine({original_info})'
 
 
-class Struct:
+
+EXPORT_MANIFEST = '.pygns3-export.json'
+ExportResult = namedtuple('ExportResult', 'project_id name path status seconds size error')
+PcapPacket = namedtuple('PcapPacket', 'timestamp original_length data')
+
+# Compression for GNS3Controller.export_all: module and file extension
+_COMPRESSORS = {
+    'bz2': (bz2, '.bz2'),
+    'gzip': (gzip, '.gz'),
+    'xz': (lzma, '.xz'),
+}
+
+
+STATE_CACHE_FORMAT = 1
+
+
+class _StoredResponse:
+    """Stands in for a response, for payloads which come from the state cache"""
+    ok = True
+    status_code = 200
+
+    def __init__(self, payload):
+        self.payload = payload
+
+    def json(self):
+        """Return the stored payload"""
+        return self.payload
+
+
+def _state_cache_name(base):
+    """File name of the state cache for the controller at URL `base`"""
+    return f'pygns3-state-{hashlib.sha1(str(base).encode()).hexdigest()}.cache'
+
+
+def _compress_file(source, destination, method):
+    """Compress `source` to `destination` (atomically) and remove `source`. Runs in a worker
+    process of GNS3Controller.export_all."""
+    temp = f'{source}.{method}'
+    try:
+        with open(source, 'rb') as src, _COMPRESSORS[method][0].open(temp, 'wb') as dst:
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+        os.replace(temp, destination)
+    finally:
+        for path in (source, temp):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def _write_atomic(path, data):
+    """Write `data` to a temporary file next to `path` and rename it into place"""
+    handle, temp = tempfile.mkstemp(dir=os.path.dirname(path) or '.', suffix='.tmp')
+    try:
+        with os.fdopen(handle, 'wb') as f:
+            f.write(data)
+        os.replace(temp, path)
+    except Exception:
+        os.remove(temp)
+        raise
+
+
+def _pcap_packets(chunks):
+    """Parse a pcap stream given as an iterable of byte chunks, yields PcapPacket tuples"""
+    parser = PcapParser()
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+
+
+class PcapParser:
+    """Incremental parser of a pcap stream, fed its chunks as they arrive"""
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.header = None
+        self.resolution = None
+
+    def feed(self, chunk):
+        """Return the PcapPacket tuples completed by bytes `chunk`"""
+        buffer = self.buffer
+        buffer += chunk
+        offset = 0
+        if self.header is None:
+            if len(buffer) < 24:
+                return []
+            magic = buffer[:4]
+            if magic in (b'\xd4\xc3\xb2\xa1', b'\x4d\x3c\xb2\xa1'):
+                endian = '<'
+            elif magic in (b'\xa1\xb2\xc3\xd4', b'\xa1\xb2\x3c\x4d'):
+                endian = '>'
+            else:
+                raise ValueError('Not a pcap stream')
+            # Microseconds or nanoseconds resolution
+            self.resolution = 1e-9 if magic in (b'\x4d\x3c\xb2\xa1', b'\xa1\xb2\x3c\x4d') else 1e-6
+            self.header = struct.Struct(f'{endian}IIII')
+            offset = 24
+
+        packets = []
+        while len(buffer) - offset >= 16:
+            seconds, fraction, included, original = self.header.unpack_from(buffer, offset)
+            if len(buffer) - offset - 16 < included:
+                break
+            data = bytes(buffer[offset + 16:offset + 16 + included])
+            offset += 16 + included
+            packets.append(PcapPacket(seconds + fraction * self.resolution, original, data))
+
+        # Drop what has been parsed, so memory stays bounded by a chunk plus one packet
+        del buffer[:offset]
+        return packets
+
+
+def _with_progress(chunks, progress):
+    """Pass chunks on, calling progress(total_bytes, bytes_per_second) after each of them"""
+    if progress is None:
+        yield from chunks
+        return
+
+    start = time.perf_counter()
+    total = 0
+    for chunk in chunks:
+        yield chunk
+        total += len(chunk)
+        elapsed = time.perf_counter() - start
+        progress(total, total / elapsed if elapsed > 0 else 0.0)
+
+
+def _tee(chunks, file):
+    """Write every chunk to `file` before passing it on"""
+    for chunk in chunks:
+        file.write(chunk)
+        yield chunk
+
+
+def _body_size(kwargs):
+    """Size in bytes of the body of a request, None if unknown (e.g. a streamed upload)"""
+    data = kwargs.get('data')
+    if data is None:
+        return 0
+    if isinstance(data, dict):
+        data = urlencode(data)
+    if isinstance(data, str):
+        data = data.encode()
+    return len(data) if isinstance(data, (bytes, bytearray)) else None
+
+
+def _response_size(response, stream):
+    """Size in bytes of the body of a response, without reading streamed bodies"""
+    if stream:
+        length = getattr(response, 'headers', {}).get('Content-Length')
+        return int(length) if isinstance(length, str) else None
+    content = getattr(response, 'content', None)
+    return len(content) if isinstance(content, bytes) else None
+
+
+def _created(response):
+    """Return the json of a 201 Created response, raise ValueError with the message otherwise"""
+    if response.status_code == 201:
+        return response.json()
+    raise ValueError(response.json()['message'])
+
+
+def _as_bool(value):
+    """Interpret booleans coming from the configuration file, which are read as strings."""
+    if isinstance(value, str):
+        return value.strip().lower() in ('1', 'yes', 'true', 'on')
+    return bool(value)
+
+
+class Struct(DataView, data='_data'):
     """
-    The Struct class is used to create a temporary nested object from json data. This allows
-    for the dynamic import of attributes so whatever the underlying API spits out, you can use
-    dot notation for accessing all (nested) members.
+    The Struct class is a read-only view on json data. This allows for dot notation access to
+    whatever the underlying API spits out, including nested members. Nothing is copied: nested
+    dicts are wrapped in a new Struct only when they are accessed.
+
+    The wrapper classes fall back to `Struct.get()` for any attribute they do not define.
     """
+    __slots__ = ('_data',)
+
+    def __init__(self, *data, **entries):
+        """Wraps the dict `data`, or keyword `entries` as in Struct(**entries)"""
+        self._data = data[0] if data else entries
+
+    def __dir__(self):
+        return list(self._data.keys())
+
+    def __eq__(self, other):
+        return isinstance(other, Struct) and self._data == other._data
 
-    def __init__(self, **entries):
-        self.__dict__.update(entries)
-        for k, v in self.__dict__.items():
-            if isinstance(v, dict):
-                setattr(self, k, Struct(**v))
+    def __repr__(self):
+        return f'Struct({self._data})'
+
+    @staticmethod
+    def get(data, name):
+        """Return `data[name]` as an attribute, wrapping dicts in a Struct."""
+        try:
+            value = data[name]
+        except KeyError:
+            raise AttributeError(name) from None
+        if isinstance(value, dict):
+            return Struct(value)
+        return value
 
 
 def main():
@@ -0,0 +1,103 @@
+"""
+Adaptive concurrency limit for GNS3API.
+
+The GNS3 controller is a single process: past a certain number of concurrent requests it only
+gets slower. The AdaptiveLimiter finds that point by itself, so bulk jobs can use many workers
+without hand-tuning:
+
+    >>> GNS3API.limiter = AdaptiveLimiter(initial_limit=8, max_limit=64)
+    >>> GNS3API.limiter.register(GNS3API.metrics)   # optional, exports limit and queue depth
+
+Requests over the limit wait for a free slot. The limit follows the gradient between the long
+term and the recent latency of the controller: while requests are about as fast as usual it
+grows, once they slow down it shrinks proportionally. Errors (5xx, 429 and failed requests)
+shrink it multiplicatively, like TCP congestion control (AIMD).
+"""
+import math
+import threading
+
+
+class AdaptiveLimiter:
+    """
+    Concurrency limit between `min_limit` and `max_limit`, starting at `initial_limit`.
+
+    `tolerance` is how much slower than the long term latency requests may get before the limit
+    shrinks, `backoff` the factor applied on errors and `smoothing` how fast the limit moves.
+    """
+
+    def __init__(self, initial_limit=10, min_limit=1, max_limit=200, tolerance=1.5, backoff=0.9,
+                 smoothing=0.2):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.tolerance = tolerance
+        self.backoff = backoff
+        self.smoothing = smoothing
+        self.in_flight = 0
+        self.queued = 0
+        self.errors = 0
+        self.long_rtt = None
+        self.short_rtt = None
+        self._limit = float(initial_limit)
+        self._condition = threading.Condition()
+
+    def __repr__(self):
+        return f'AdaptiveLimiter(limit={self.limit}, in_flight={self.in_flight})'
+
+    @property
+    def limit(self):
+        """The current number of requests allowed in flight"""
+        return int(self._limit)
+
+    def acquire(self, timeout=None):
+        """Wait for a free slot, returns False if none came free within `timeout` seconds"""
+        with self._condition:
+            self.queued += 1
+            try:
+                if not self._condition.wait_for(lambda: self.in_flight < self.limit, timeout):
+                    return False
+            finally:
+                self.queued -= 1
+            self.in_flight += 1
+            return True
+
+    def release(self, seconds, ok=True):
+        """Free a slot, with the latency and outcome of the request which used it"""
+        with self._condition:
+            in_flight = self.in_flight
+            self.in_flight -= 1
+            if ok:
+                self._on_sample(seconds, in_flight)
+            else:
+                self.errors += 1
+                self._limit = max(self.min_limit, self._limit * self.backoff)
+            self._condition.notify_all()
+
+    def _on_sample(self, seconds, in_flight):
+        if self.long_rtt is None:
+            self.long_rtt = self.short_rtt = seconds
+            return
+        self.short_rtt = 0.8 * self.short_rtt + 0.2 * seconds
+        self.long_rtt = 0.99 * self.long_rtt + 0.01 * seconds
+        # After a period of overload the long term latency has crept up, let it recover
+        if self.long_rtt > 2 * self.short_rtt:
+            self.long_rtt *= 0.95
+        # Do not grow a limit which is not being used
+        if in_flight < self._limit / 2:
+            return
+
+        gradient = max(0.5, min(1.0, self.tolerance * self.long_rtt / self.short_rtt))
+        target = self._limit * gradient + math.sqrt(self._limit)
+        limit = (1 - self.smoothing) * self._limit + self.smoothing * target
+        self._limit = max(self.min_limit, min(self.max_limit, limit))
+
+    def stats(self):
+        """Return the current limit, requests in flight and waiting, and latencies as a dict"""
+        with self._condition:
+            return {'limit': self.limit, 'in_flight': self.in_flight, 'queued': self.queued,
+                    'errors': self.errors, 'long_rtt': self.long_rtt, 'short_rtt': self.short_rtt}
+
+    def register(self, metrics):
+        """Export the limit and queue depth as gauges of a pygns3.metrics.Metrics"""
+        metrics.add_gauge('concurrency_limit', lambda: self.limit)
+        metrics.add_gauge('concurrency_queued', lambda: self.queued)
+
@@ -0,0 +1,293 @@
+"""
+Request metrics and traces for GNS3API.
+
+Metrics are collected per route, that is the path with its ids replaced by placeholders
+(/projects/{project_id}/nodes), so the number of series stays bounded:
+
+    >>> GNS3API.metrics = Metrics()
+    >>> controller = GNS3Controller(preload=True)
+    >>> GNS3API.metrics.snapshot()['routes']['GET /projects/{project_id}/nodes']
+    {'requests': 12, 'seconds': 0.41, 'p50': 0.025, 'p95': 0.05, ...}
+    >>> print(GNS3API.metrics.prometheus())
+
+Hooks are called with a RequestRecord after every request, to forward the measurements to
+Prometheus, OpenTelemetry or anything else, e.g.:
+
+    >>> duration = meter.create_histogram('gns3.request.duration', unit='s')
+    >>> GNS3API.metrics.add_hook(
+    ...     lambda r: duration.record(r.seconds, {'method': r.method, 'route': r.route}))
+
+Traces capture every request made within a block, from any thread, independent of metrics:
+
+    >>> with GNS3API.trace() as trace:
+    ...     project = GNS3Project(project_id, preload=True)
+    >>> print(trace)
+"""
+import re
+import threading
+import time
+from collections import Counter, deque, namedtuple
+
+RequestRecord = namedtuple('RequestRecord', 'method path route status started seconds '
+                                            'request_bytes response_bytes error')
+
+# Upper bounds in seconds of the latency histogram buckets
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_UUID = re.compile(r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$', re.I)
+
+# Placeholders for the path segment following a collection
+_PLACEHOLDERS = {
+    'appliances': '{appliance_id}',
+    'computes': '{compute_id}',
+    'drawings': '{drawing_id}',
+    'links': '{link_id}',
+    'nodes': '{node_id}',
+    'projects': '{project_id}',
+    'snapshots': '{snapshot_id}',
+    'templates': '{template_id}',
+}
+
+
+def route_of(path):
+    """Return the route of `path`, e.g. /projects/{project_id}/nodes for /projects/<uuid>/nodes"""
+    segments = path.split('?', 1)[0].split('/')
+    for i in range(1, len(segments)):
+        previous, segment = segments[i - 1], segments[i]
+        if previous == 'files':
+            segments[i:] = ['{path}']
+            break
+        # Compute ids are names (e.g. local) rather than UUIDs
+        if previous == 'computes' or _UUID.match(segment):
+            segments[i] = _PLACEHOLDERS.get(previous, '{id}')
+    return '/'.join(segments)
+
+
+class Histogram:
+    """Latency histogram with fixed `buckets` (upper bounds in seconds)"""
+
+    __slots__ = ('buckets', 'counts', 'count', 'sum')
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        # One count per bucket plus one for everything above the last bucket
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        """Add a measurement"""
+        i = 0
+        while i < len(self.buckets) and value > self.buckets[i]:
+            i += 1
+        self.counts[i] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """Estimate quantile `q` (0..1) as the upper bound of the bucket it falls in"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float('inf')
+
+
+class LatencyWindow:
+    """The latencies of the last `size` requests per route, for quantiles over recent traffic"""
+
+    def __init__(self, size=100):
+        self.size = size
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def observe(self, route, seconds):
+        """Add a measurement for `route`"""
+        with self._lock:
+            if route not in self._samples:
+                self._samples[route] = deque(maxlen=self.size)
+            self._samples[route].append(seconds)
+
+    def quantile(self, route, q, min_samples=10):
+        """Return quantile `q` (0..1) of the recent latencies of `route`, None below min_samples"""
+        with self._lock:
+            samples = sorted(self._samples.get(route, ()))
+        if len(samples) < min_samples:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+
+class Metrics:
+    """
+    Request metrics for GNS3API: latency histograms and request counts per method and route,
+    bytes sent and received per route, errors per status code and the requests in flight.
+    Error statuses are the HTTP status for responses of 400 and up, or 'exception' for requests
+    which failed without a response.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.hooks = []
+        self.gauges = {}
+        self._lock = threading.Lock()
+        self.reset()
+
+    def __repr__(self):
+        return f'Metrics({sum(self.requests.values())} requests, {len(self.histograms)} routes)'
+
+    def reset(self):
+        """Clear all measurements, the hooks are kept"""
+        with self._lock:
+            self.histograms = {}
+            self.requests = Counter()
+            self.errors = Counter()
+            self.bytes_sent = Counter()
+            self.bytes_received = Counter()
+            self.in_flight = Counter()
+
+    def add_hook(self, hook):
+        """Call `hook` with a RequestRecord after every request"""
+        self.hooks = self.hooks + [hook]
+
+    def remove_hook(self, hook):
+        """Stop calling `hook`"""
+        self.hooks = [h for h in self.hooks if h is not hook]
+
+    def add_gauge(self, name, function):
+        """Export the value returned by `function` as gauge `name`, e.g. a concurrency limit"""
+        self.gauges = dict(self.gauges, **{name: function})
+
+    @property
+    def in_flight_total(self):
+        """Number of requests in flight over all routes"""
+        return sum(self.in_flight.values())
+
+    def started(self, method, route):
+        """Called by GNS3API when a request is sent"""
+        with self._lock:
+            self.in_flight[f'{method} {route}'] += 1
+
+    def finished(self, record):
+        """Called by GNS3API with the RequestRecord of a finished request"""
+        key = f'{record.method} {record.route}'
+        with self._lock:
+            self.in_flight[key] -= 1
+            if key not in self.histograms:
+                self.histograms[key] = Histogram(self.buckets)
+            self.histograms[key].observe(record.seconds)
+            self.requests[(key, record.status)] += 1
+            if record.error is not None:
+                self.errors['exception'] += 1
+            elif record.status >= 400:
+                self.errors[record.status] += 1
+            self.bytes_sent[key] += record.request_bytes or 0
+            self.bytes_received[key] += record.response_bytes or 0
+        for hook in self.hooks:
+            hook(record)
+
+    def snapshot(self):
+        """Return the current measurements as a dict"""
+        with self._lock:
+            routes = {}
+            for key, histogram in self.histograms.items():
+                routes[key] = {
+                    'requests': histogram.count,
+                    'seconds': histogram.sum,
+                    'p50': histogram.quantile(0.5),
+                    'p95': histogram.quantile(0.95),
+                    'p99': histogram.quantile(0.99),
+                    'bytes_sent': self.bytes_sent[key],
+                    'bytes_received': self.bytes_received[key],
+                    'in_flight': self.in_flight[key],
+                }
+            return {
+                'requests': sum(self.requests.values()),
+                'errors': dict(self.errors),
+                'in_flight': sum(self.in_flight.values()),
+                'routes': routes,
+                'gauges': {name: function() for name, function in self.gauges.items()},
+            }
+
+    def prometheus(self, prefix='pygns3'):
+        """Return the measurements in the Prometheus text exposition format"""
+        lines = [f'# TYPE {prefix}_request_duration_seconds histogram']
+        with self._lock:
+            for key, histogram in sorted(self.histograms.items()):
+                labels = _labels(key)
+                cumulative = 0
+                for bound, count in zip(self.buckets + ('+Inf',), histogram.counts):
+                    cumulative += count
+                    lines.append(f'{prefix}_request_duration_seconds_bucket'
+                                 f'{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'{prefix}_request_duration_seconds_sum{{{labels}}} {histogram.sum}')
+                lines.append(f'{prefix}_request_duration_seconds_count{{{labels}}} '
+                             f'{histogram.count}')
+
+            lines.append(f'# TYPE {prefix}_requests_total counter')
+            for (key, status), count in sorted(self.requests.items(), key=str):
+                lines.append(f'{prefix}_requests_total{{{_labels(key)},status="{status}"}} {count}')
+            lines.append(f'# TYPE {prefix}_request_errors_total counter')
+            for status, count in sorted(self.errors.items(), key=str):
+                lines.append(f'{prefix}_request_errors_total{{status="{status}"}} {count}')
+            for name, counter in (('sent', self.bytes_sent), ('received', self.bytes_received)):
+                lines.append(f'# TYPE {prefix}_bytes_{name}_total counter')
+                for key, count in sorted(counter.items()):
+                    lines.append(f'{prefix}_bytes_{name}_total{{{_labels(key)}}} {count}')
+            lines.append(f'# TYPE {prefix}_requests_in_flight gauge')
+            for key, count in sorted(self.in_flight.items()):
+                lines.append(f'{prefix}_requests_in_flight{{{_labels(key)}}} {count}')
+        for name, function in sorted(self.gauges.items()):
+            lines.append(f'# TYPE {prefix}_{name} gauge')
+            lines.append(f'{prefix}_{name} {function()}')
+        return '\n'.join(lines) + '\n'
+
+
+class Trace:
+    """The RequestRecords of all requests made within a GNS3API.trace() block"""
+
+    def __init__(self):
+        self.records = []
+        self.start = time.perf_counter()
+        self.elapsed = None
+
+    def __repr__(self):
+        return f'Trace({len(self.records)} requests)'
+
+    def __str__(self):
+        elapsed = self.elapsed if self.elapsed is not None else time.perf_counter() - self.start
+        lines = [f'{len(self.records)} requests in {elapsed:.3f}s, '
+                 f'{sum(r.seconds for r in self.records):.3f}s spent in requests']
+        for r in sorted(self.records, key=lambda r: r.started):
+            lines.append(f'    {r.started - self.start:8.3f}s {r.seconds:8.3f}s  {r.status}  '
+                         f'{r.method} {r.path}')
+        return '\n'.join(lines) + '\n'
+
+    def started(self, method, route):
+        """Called by GNS3API when a request is sent"""
+
+    def finished(self, record):
+        """Called by GNS3API with the RequestRecord of a finished request"""
+        self.records.append(record)
+
+    def slowest(self, count=10):
+        """Return the `count` slowest requests"""
+        return sorted(self.records, key=lambda r: r.seconds, reverse=True)[:count]
+
+    def by_route(self):
+        """Return {'METHOD route': (requests, seconds)} for the traced requests"""
+        routes = {}
+        for r in self.records:
+            key = f'{r.method} {r.route}'
+            count, seconds = routes.get(key, (0, 0.0))
+            routes[key] = (count + 1, seconds + r.seconds)
+        return routes
+
+
+def _labels(key):
+    """Prometheus labels for a 'METHOD route' key"""
+    method, route = key.split(' ', 1)
+    return f'method="{method}",route="{route}"'
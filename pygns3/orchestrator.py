@@ -0,0 +1,240 @@
+"""
+Start, stop, suspend or reload the nodes of a GNS3Project in parallel and wait until they are done.
+
+At most `max_workers` nodes are in transition at any time. A node is done when its status reaches
+the target: 'started' for start and reload, 'stopped' or 'suspended'. With a running
+GNS3ProjectListener (see GNS3Project.listen()) the status is followed through notifications,
+otherwise the node is polled every `poll_interval` seconds.
+
+Dependencies map node names to the names of the nodes they depend on. A node is started after its
+dependencies have started, and stopped or suspended before them:
+
+    >>> project.listen()
+    >>> orchestrator = NodeOrchestrator(project, max_workers=8, timeout=300)
+    >>> report = orchestrator.start(depends_on={'web': ['db'], 'db': ['switch']})
+    >>> print(report)
+    >>> assert report.ready, report.errors
+"""
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from .controller import GNS3API, GNS3Node
+
+NodeResult = namedtuple('NodeResult', 'name node action status request_seconds seconds error')
+
+# Status a node reaches after each action
+TARGET_STATUS = {'start': 'started', 'reload': 'started', 'stop': 'stopped', 'suspend': 'suspended'}
+
+
+class OrchestrationReport:
+    """Outcome of NodeOrchestrator.run(): one NodeResult per node plus the total time"""
+
+    def __init__(self, action, results, elapsed):
+        self.action = action
+        self.results = results
+        self.elapsed = elapsed
+
+    def __repr__(self):
+        return (f'OrchestrationReport({self.action!r}, {len(self.results)} results, '
+                f'{self.elapsed:.3f}s)')
+
+    def __str__(self):
+        stats = self.stats()
+        lines = [f'{len(self.results)} nodes {TARGET_STATUS[self.action]} in {self.elapsed:.3f}s, '
+                 f'{len(self.errors)} failed',
+                 f'    min {stats["min"]:.3f}s  median {stats["median"]:.3f}s  '
+                 f'p95 {stats["p95"]:.3f}s  max {stats["max"]:.3f}s']
+        for r in self.errors:
+            lines.append(f'    {r.name}: {r.error}')
+        return '\n'.join(lines) + '\n'
+
+    @property
+    def errors(self):
+        """Results of nodes which did not reach the target status"""
+        return [r for r in self.results if r.error is not None]
+
+    @property
+    def ready(self):
+        """True when every node reached the target status"""
+        return not self.errors
+
+    def stats(self):
+        """Return count, min, median, p95 and max of the seconds it took nodes to get ready"""
+        seconds = sorted(r.seconds for r in self.results if r.error is None)
+        if not seconds:
+            return {'count': 0, 'min': 0.0, 'median': 0.0, 'p95': 0.0, 'max': 0.0}
+        return {
+            'count': len(seconds),
+            'min': seconds[0],
+            'median': seconds[len(seconds) // 2],
+            'p95': seconds[min(len(seconds) - 1, int(len(seconds) * 0.95))],
+            'max': seconds[-1],
+        }
+
+
+class NodeOrchestrator:
+    """
+    Drives the nodes of `project` with at most `max_workers` nodes in transition (defaults to the
+    connection pool size). Nodes which do not reach the target status within `timeout` seconds
+    are reported as failed.
+    """
+
+    def __init__(self, project, max_workers=None, timeout=300.0, poll_interval=1.0):
+        self.project = project
+        self.max_workers = int(max_workers or GNS3API.pool_maxsize)
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+
+    def start(self, nodes=None, depends_on=None):
+        """Start `nodes` (all nodes by default), see run()"""
+        return self.run('start', nodes, depends_on)
+
+    def stop(self, nodes=None, depends_on=None):
+        """Stop `nodes` (all nodes by default), see run()"""
+        return self.run('stop', nodes, depends_on)
+
+    def suspend(self, nodes=None, depends_on=None):
+        """Suspend `nodes` (all nodes by default), see run()"""
+        return self.run('suspend', nodes, depends_on)
+
+    def reload(self, nodes=None, depends_on=None):
+        """Reload `nodes` (all nodes by default), see run()"""
+        return self.run('reload', nodes, depends_on)
+
+    def run(self, action, nodes=None, depends_on=None):
+        """
+        Apply `action` to `nodes` (names or GNS3Node objects) and wait until each has reached the
+        target status, returns an OrchestrationReport. Dependencies on nodes which are not part of
+        `nodes` are ignored. Nodes whose dependencies failed are not touched and reported as failed.
+        """
+        if action not in TARGET_STATUS:
+            raise ValueError(f'Unknown action {action}')
+        selected = self._select(nodes)
+        blockers = self._blockers(selected, depends_on or {}, reverse=action in ('stop', 'suspend'))
+        dependents = {name: [] for name in selected}
+        for name, names in blockers.items():
+            for blocker in names:
+                dependents[blocker].append(name)
+
+        results = []
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pending = {}
+
+            def submit(name):
+                pending[executor.submit(self._drive, selected[name], action)] = name
+
+            for name, names in blockers.items():
+                if not names:
+                    submit(name)
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = pending.pop(future)
+                    node = selected[name]
+                    try:
+                        request_seconds, seconds = future.result()
+                        error = None
+                    except Exception as e:  # pylint: disable=broad-except
+                        request_seconds, seconds, error = 0.0, 0.0, e
+                    results.append(NodeResult(name, node, action, node.status, request_seconds,
+                                              seconds, error))
+                    if error is not None:
+                        results.extend(self._skip(name, dependents, selected, action))
+                        continue
+                    for dependent in dependents[name]:
+                        blockers[dependent].discard(name)
+                        if not blockers[dependent]:
+                            submit(dependent)
+
+        return OrchestrationReport(action, results, time.perf_counter() - start)
+
+    def _select(self, nodes):
+        """Return {name: node} for `nodes`, using the project's node objects where possible"""
+        by_name = {n.name: n for n in self.project.nodes}
+        by_id = {n.node_id: n for n in self.project.nodes}
+        if nodes is None:
+            return by_name
+
+        selected = {}
+        for node in nodes:
+            if isinstance(node, GNS3Node):
+                # The project's own objects are kept current by its listener
+                node = by_id.get(node.node_id, node)
+            elif node in by_name:
+                node = by_name[node]
+            else:
+                raise ValueError(f'Unknown node {node}')
+            selected[node.name] = node
+        return selected
+
+    def _blockers(self, selected, depends_on, reverse):
+        """Return {name: set of names which have to be done first}, raise ValueError on cycles"""
+        known = {n.name for n in self.project.nodes} | selected.keys()
+        blockers = {name: set() for name in selected}
+        for name, names in depends_on.items():
+            for dependency in names:
+                unknown = {name, dependency} - known
+                if unknown:
+                    raise ValueError(f'Unknown node {unknown.pop()}')
+                if name in selected and dependency in selected:
+                    if reverse:
+                        blockers[dependency].add(name)
+                    else:
+                        blockers[name].add(dependency)
+
+        # Kahn's algorithm, whatever cannot be ordered is part of a cycle
+        remaining = {name: set(names) for name, names in blockers.items()}
+        ready = [name for name, names in remaining.items() if not names]
+        while ready:
+            done = ready.pop()
+            del remaining[done]
+            for name, names in remaining.items():
+                if done in names:
+                    names.discard(done)
+                    if not names:
+                        ready.append(name)
+        if remaining:
+            raise ValueError(f'Dependency cycle between nodes {sorted(remaining)}')
+        return blockers
+
+    def _skip(self, failed, dependents, selected, action):
+        """Results for the nodes which (indirectly) depend on the failed node"""
+        results = []
+        skipped = set()
+        stack = [(failed, name) for name in dependents[failed]]
+        while stack:
+            blocker, name = stack.pop()
+            if name in skipped:
+                continue
+            skipped.add(name)
+            results.append(NodeResult(name, selected[name], action, selected[name].status, 0.0,
+                                      0.0, ValueError(f'dependency {blocker} failed')))
+            stack.extend((name, dependent) for dependent in dependents[name])
+        return results
+
+    def _drive(self, node, action):
+        """Apply `action` to `node` and wait for its status, returns (request_seconds, seconds)"""
+        start = time.perf_counter()
+        getattr(node, action)()
+        request_seconds = time.perf_counter() - start
+        self._wait_for_status(node, TARGET_STATUS[action], start + self.timeout)
+        return request_seconds, time.perf_counter() - start
+
+    def _wait_for_status(self, node, status, deadline):
+        """Block until `node` has `status`, through notifications when the project is listening"""
+        while node.status != status:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                raise TimeoutError(f'Node {node.name} is {node.status}, not {status}, '
+                                   f'after {self.timeout}s')
+            listener = self.project.listener
+            if listener is not None and listener.connected.is_set():
+                # Re-check the connection at least every poll_interval, no requests needed
+                listener.wait_for(lambda: node.status == status,
+                                  min(remaining, self.poll_interval))
+            else:
+                time.sleep(min(remaining, self.poll_interval))
+                node.refresh()
@@ -0,0 +1,172 @@
+"""
+Build complete topologies in a GNS3Project from a declarative description.
+
+Nodes and drawings are created concurrently on a bounded thread pool. Links are pipelined: each
+link is submitted as soon as both of its endpoints exist, instead of waiting for all nodes first.
+
+    >>> builder = TopologyBuilder(project, max_workers=16)
+    >>> builder.add_node('R1', 'dynamips', properties={'platform': 'c7200', ...})
+    >>> builder.add_node('R2', 'dynamips', properties={'platform': 'c7200', ...})
+    >>> builder.add_link('R1', 'f0/0', 'R2', 'f0/0')
+    >>> print(builder.build())
+
+or, from a dict (e.g. loaded from YAML/JSON):
+
+    >>> TopologyBuilder.from_dict(project, {
+    ...     'nodes': [{'name': 'R1', 'node_type': 'vpcs'}, {'name': 'R2', 'node_type': 'vpcs'}],
+    ...     'links': [['R1', 'e0', 'R2', 'e0']],
+    ... }).build()
+"""
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from .controller import GNS3API, GNS3Drawing, GNS3Link, GNS3Node
+
+BuildResult = namedtuple('BuildResult', 'kind name object seconds error')
+
+
+class TopologyReport:
+    """Outcome of TopologyBuilder.build(): one BuildResult per object plus the total time"""
+
+    def __init__(self, results, elapsed):
+        self.results = results
+        self.elapsed = elapsed
+
+    def __repr__(self):
+        return f'TopologyReport({len(self.results)} results, {self.elapsed:.3f}s)'
+
+    def __str__(self):
+        lines = [f'Topology built in {self.elapsed:.3f}s']
+        for kind in ('node', 'link', 'drawing'):
+            results = [r for r in self.results if r.kind == kind]
+            if results:
+                seconds = sorted(r.seconds for r in results)
+                lines.append(f'    {kind + "s":9} {len(results):5} created  '
+                             f'{sum(1 for r in results if r.error):4} failed  '
+                             f'median {seconds[len(seconds) // 2]:.3f}s  max {seconds[-1]:.3f}s')
+        for r in self.errors:
+            lines.append(f'    {r.kind} {r.name}: {r.error}')
+        return '\n'.join(lines) + '\n'
+
+    @property
+    def errors(self):
+        """Results of objects which could not be created"""
+        return [r for r in self.results if r.error is not None]
+
+    def created(self, kind):
+        """Return the created objects of `kind` ('node', 'link' or 'drawing')"""
+        return [r.object for r in self.results if r.kind == kind and r.error is None]
+
+
+class TopologyBuilder:
+    """
+    Collects nodes, links and drawings and creates them in `project` with at most `max_workers`
+    requests in flight (defaults to the connection pool size).
+    """
+
+    def __init__(self, project, max_workers=None):
+        self.project = project
+        self.max_workers = int(max_workers or GNS3API.pool_maxsize)
+        self.nodes = {}
+        self.links = []
+        self.drawings = []
+
+    @classmethod
+    def from_dict(cls, project, topology, max_workers=None):
+        """
+        Create a builder from a dict with 'nodes' (dicts with at least name and node_type),
+        'links' ([from_node, from_port, to_node, to_port] lists) and 'drawings' (dicts with svg).
+        """
+        builder = cls(project, max_workers)
+        for node in topology.get('nodes', []):
+            builder.add_node(**node)
+        for link in topology.get('links', []):
+            builder.add_link(*link)
+        for drawing in topology.get('drawings', []):
+            builder.add_drawing(**drawing)
+        return builder
+
+    def add_node(self, name, node_type, compute_id='local', **kwargs):
+        """Add a node, see GNS3Node.create(). Names are used to refer to nodes in links."""
+        if name in self.nodes:
+            raise ValueError(f'Duplicate node name {name}')
+        self.nodes[name] = dict(kwargs, name=name, node_type=node_type, compute_id=compute_id)
+
+    def add_link(self, from_node, from_port, to_node, to_port):
+        """Add a link between two nodes by name, ports are names or (adapter, port) tuples"""
+        for name in (from_node, to_node):
+            if name not in self.nodes:
+                raise ValueError(f'Unknown node {name}')
+        # Ports from JSON/YAML descriptions come in as lists
+        from_port, to_port = [tuple(p) if isinstance(p, list) else p for p in (from_port, to_port)]
+        self.links.append((from_node, from_port, to_node, to_port))
+
+    def add_drawing(self, svg, x=0, y=0, **kwargs):
+        """Add a drawing, see GNS3Drawing.create()"""
+        self.drawings.append(dict(kwargs, svg=svg, x=x, y=y))
+
+    def build(self):
+        """Create everything, returns a TopologyReport. Failures do not stop the build, links to
+        nodes which could not be created are reported as failed as well."""
+        project_id = self.project.project_id
+        created = {}
+        results = []
+        # Links waiting for their endpoints, per node name
+        waiting = {name: [] for name in self.nodes}
+        for link in self.links:
+            waiting[link[0]].append(link)
+            if link[2] != link[0]:
+                waiting[link[2]].append(link)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pending = {}
+            for name, node in self.nodes.items():
+                kwargs = dict(node)
+                del kwargs['name'], kwargs['node_type'], kwargs['compute_id']
+                future = executor.submit(_timed, GNS3Node.create, project_id, name,
+                                         node['node_type'], node['compute_id'], **kwargs)
+                pending[future] = ('node', name)
+            for i, drawing in enumerate(self.drawings):
+                future = executor.submit(_timed, GNS3Drawing.create, project_id, **drawing)
+                pending[future] = ('drawing', f'drawing {i}')
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    kind, name = pending.pop(future)
+                    obj, seconds, error = future.result()
+                    results.append(BuildResult(kind, name, obj, seconds, error))
+                    if kind != 'node':
+                        continue
+
+                    created[name] = obj
+                    for link in waiting.pop(name):
+                        from_name, from_port, to_name, to_port = link
+                        link_name = f'{from_name} {from_port} - {to_name} {to_port}'
+                        if from_name not in created or to_name not in created:
+                            continue
+                        if created[from_name] is None or created[to_name] is None:
+                            results.append(BuildResult('link', link_name, None, 0.0,
+                                                       'endpoint could not be created'))
+                            continue
+                        future = executor.submit(_timed, GNS3Link.create, created[from_name],
+                                                 from_port, created[to_name], to_port)
+                        pending[future] = ('link', link_name)
+
+        report = TopologyReport(results, time.perf_counter() - start)
+        self.project._add_to_collection('nodes', *report.created('node'))
+        self.project._add_to_collection('links', *report.created('link'))
+        self.project._add_to_collection('drawings', *report.created('drawing'))
+        return report
+
+
+def _timed(function, *args, **kwargs):
+    """Call function, returns (result, seconds, error) where error is None or the exception"""
+    start = time.perf_counter()
+    try:
+        result, error = function(*args, **kwargs), None
+    except Exception as e:  # pylint: disable=broad-except
+        result, error = None, e
+    return result, time.perf_counter() - start, error
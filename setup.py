@@ -21,5 +21,6 @@ setup(
     author='mvdwrd',
     author_email='maarten@vanderwoord.nl',
     install_requires=['requests', ],
+    extras_require={'async': ['aiohttp', ], 'fast': ['orjson', ]},
     long_description=readme(),
 )
@@ -0,0 +1,341 @@
+"""
+Tests for the asyncio wrapper classes, against the same dictionary of cached API responses as
+the synchronous tests.
+"""
+import asyncio
+import json
+import os
+import struct
+import tempfile
+import unittest
+from unittest import mock
+from pygns3 import *
+from pygns3 import aio
+from test import mock_get
+from tools.benchmark.server import FakeController
+from tools.benchmark.synthetic import synthetic_project
+
+TEST_PROJECT_NAME = 'Basic 4 Routers'
+
+
+async def mocked_async_get_json(path):
+    await asyncio.sleep(0)
+    if path in mock_get.keys():
+        return json.loads(mock_get[path])
+    raise Exception(f'AsyncGNS3API GET Error at URL: {path}')
+
+
+class MockAsyncResponse:
+    """The parts of an aiohttp response used by the async classes, with the body already read"""
+
+    def __init__(self, content, status=200):
+        self.content = json.dumps(content).encode()
+        self.status = status
+        self.ok = status < 400
+
+    async def read(self):
+        return self.content
+
+
+class MockAsyncStream:
+    """A streamed aiohttp response, for `async with AsyncGNS3API.stream_request(path)`"""
+
+    def __init__(self, data, chunk=7):
+        self.data = data
+        self.chunk = chunk
+        self.ok = True
+        self.status = 200
+        self.closed = False
+        self.content = self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.closed = True
+
+    async def iter_chunked(self, chunk_size):
+        for i in range(0, len(self.data), self.chunk):
+            await asyncio.sleep(0)
+            yield self.data[i:i + self.chunk]
+
+    async def __aiter__(self):
+        for line in self.data.splitlines(keepends=True):
+            yield line
+        # The stream stays open until the listener is stopped
+        await asyncio.Event().wait()
+
+
+@mock.patch('pygns3.AsyncGNS3API.get_json', side_effect=mocked_async_get_json)
+class TestAsyncController(unittest.TestCase):
+
+    def test_controller_load(self, patch):
+        controller = asyncio.run(AsyncGNS3Controller.load())
+
+        self.assertEqual(controller.version, '2.0.3')
+        self.assertEqual(len(controller.computes), 2)
+        self.assertTrue(controller.computes[0].connected)
+        self.assertEqual(len(controller.projects), 2)
+
+    def test_project_by_name(self, patch):
+        test_project = asyncio.run(AsyncGNS3Project.from_name(TEST_PROJECT_NAME))
+
+        self.assertEqual(test_project.name, TEST_PROJECT_NAME)
+        self.assertEqual(len(test_project.drawings), 6)
+        self.assertEqual(len(test_project.links), 6)
+        self.assertEqual(len(test_project.nodes), 6)
+        self.assertEqual(len(test_project.snapshots), 1)
+
+    def test_links_resolve_nodes_without_requests(self, patch):
+        test_project = asyncio.run(AsyncGNS3Project.from_name(TEST_PROJECT_NAME))
+        node_paths = [c[0][0] for c in patch.call_args_list if '/nodes/' in c[0][0]]
+
+        self.assertEqual(node_paths, [])
+        for link in test_project.links:
+            self.assertIn(link.from_node, test_project.nodes)
+            self.assertNotEqual(link.from_port_name, 'Unknown')
+
+    def test_refresh(self, patch):
+        controller = asyncio.run(AsyncGNS3Controller.load())
+        asyncio.run(controller.refresh())
+        self.assertEqual(len(controller.projects), 2)
+
+        project = asyncio.run(AsyncGNS3Project.from_name(TEST_PROJECT_NAME))
+        node, link = project.nodes[0], project.links[0]
+        path = f'/projects/{project.project_id}/nodes'
+        listing = mock_get[path]
+        self.addCleanup(mock_get.__setitem__, path, listing)
+        changed = json.loads(listing)
+        changed[0]['status'] = 'suspended'
+        mock_get[path] = json.dumps(changed)
+
+        asyncio.run(project.refresh())
+        self.assertIs(project.nodes[0], node)
+        self.assertIs(project.links[0], link)
+        self.assertEqual(node.status, 'suspended')
+        self.assertEqual(type(project.nodes[-1]).__name__, 'AsyncGNS3Node')
+        self.assertIn(link.from_node, project.nodes)
+
+    def test_node_actions(self, patch):
+        project = asyncio.run(AsyncGNS3Project.from_name(TEST_PROJECT_NAME))
+        node = project.nodes[0]
+        started = MockAsyncResponse(dict(node._node, status='started'))
+        with mock.patch('pygns3.AsyncGNS3API.post_request', return_value=started) as post:
+            asyncio.run(node.start())
+        self.assertEqual(post.call_args[0][0], f'/projects/{node.project_id}/nodes/'
+                                               f'{node.node_id}/start')
+        self.assertEqual(node.status, 'started')
+
+    def test_create(self, patch):
+        project = asyncio.run(AsyncGNS3Project.from_name(TEST_PROJECT_NAME))
+        node, link, drawing = project.nodes[0], project.links[0], project.drawings[0]
+        created = [MockAsyncResponse(dict(node._node, node_id='new-node'), status=201),
+                   MockAsyncResponse(dict(drawing._drawing, drawing_id='new'), status=201),
+                   MockAsyncResponse(link._link, status=201)]
+
+        with mock.patch('pygns3.AsyncGNS3API.post_request', side_effect=created) as post:
+            new_node = asyncio.run(project.add_node('R5', 'dynamips'))
+            new_drawing = asyncio.run(project.add_drawing('<svg/>', x=10))
+            new_link = asyncio.run(project.add_link(link.from_node, (0, 0), link.to_node, (0, 0)))
+
+        self.assertEqual(json.loads(post.call_args_list[0][0][1])['name'], 'R5')
+        self.assertEqual(len(json.loads(post.call_args_list[2][0][1])['nodes']), 2)
+        self.assertEqual(type(new_node).__name__, 'AsyncGNS3Node')
+        self.assertIs(project.nodes[-1], new_node)
+        self.assertIs(project.drawings[-1], new_drawing)
+        self.assertIs(project.links[-1], new_link)
+        self.assertIs(new_link.from_node, link.from_node)
+
+        conflict = MockAsyncResponse({'message': 'Node name exists'}, status=409)
+        with mock.patch('pygns3.AsyncGNS3API.post_request', return_value=conflict):
+            with self.assertRaisesRegex(ValueError, 'exists'):
+                asyncio.run(aio.AsyncGNS3Node.create(project.project_id, 'R5', 'dynamips'))
+
+    def test_start_capture(self, patch):
+        link = asyncio.run(AsyncGNS3Project.from_name(TEST_PROJECT_NAME)).links[0]
+        started = MockAsyncResponse(dict(link._link, capturing=True), status=201)
+        with mock.patch('pygns3.AsyncGNS3API.post_request', return_value=started) as post:
+            asyncio.run(link.start_capture('capture.pcap'))
+
+        self.assertTrue(link.capturing)
+        self.assertEqual(json.loads(post.call_args[0][1])['capture_file_name'], 'capture.pcap')
+
+    def test_iter_nodes(self, patch):
+        project = asyncio.run(AsyncGNS3Project.from_name(TEST_PROJECT_NAME))
+        stream = MockAsyncStream(mock_get[f'/projects/{project.project_id}/nodes'].encode())
+
+        async def iter_nodes():
+            return [n async for n in project.iter_nodes()]
+
+        with mock.patch('pygns3.AsyncGNS3API.stream_request', return_value=stream):
+            nodes = asyncio.run(iter_nodes())
+        self.assertEqual([n.node_id for n in nodes], [n.node_id for n in project.nodes])
+        self.assertTrue(stream.closed)
+
+    def test_capture_stream(self, patch):
+        link = asyncio.run(AsyncGNS3Project.from_name(TEST_PROJECT_NAME)).links[0]
+        packets = [bytes(range(i, i + 60)) for i in range(5)]
+        data = struct.pack('<IHHiIII', 0xa1b2c3d4, 2, 4, 0, 0, 65535, 1)
+        for i, packet in enumerate(packets):
+            data += struct.pack('<IIII', 1500000000 + i, 250000, len(packet), len(packet)) + packet
+        stream = MockAsyncStream(data)
+
+        async def capture():
+            return [p async for p in link.capture_stream()]
+
+        with mock.patch('pygns3.AsyncGNS3API.stream_request', return_value=stream) as request:
+            captured = asyncio.run(capture())
+        self.assertTrue(request.call_args[0][0].endswith(f'/links/{link.link_id}/pcap'))
+        self.assertEqual([p.data for p in captured], packets)
+        self.assertEqual(captured[1].timestamp, 1500000001.25)
+
+    def test_listen(self, patch):
+        project = asyncio.run(AsyncGNS3Project.from_name(TEST_PROJECT_NAME))
+        node = project.nodes[0]
+        notifications = [{'action': 'node.updated', 'event': dict(node._node, status='started')},
+                         {'action': 'node.deleted', 'event': project.nodes[-1]._node}]
+        stream = MockAsyncStream(b''.join(json.dumps(n).encode() + b'\n\n' for n in notifications))
+        received = []
+
+        async def listen():
+            task = project.listen(received.append)
+            while len(received) < len(notifications):
+                await asyncio.sleep(0)
+            project.stop_listening()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        with mock.patch('pygns3.AsyncGNS3API.stream_request', return_value=stream):
+            asyncio.run(listen())
+        self.assertEqual(received, notifications)
+        self.assertIs(project.nodes[0], node)
+        self.assertEqual(node.status, 'started')
+        self.assertEqual(len(project.nodes), 5)
+        self.assertIsNone(project.listener)
+
+    def test_delete_errors(self, patch):
+        project = asyncio.run(AsyncGNS3Project.from_name(TEST_PROJECT_NAME))
+        missing = MockAsyncResponse({'message': 'Link not found'}, status=404)
+        with mock.patch('pygns3.AsyncGNS3API.delete_request', return_value=missing):
+            for item in (project.links[0], project.nodes[0], project.drawings[0]):
+                with self.assertRaisesRegex(ValueError, 'not found'):
+                    asyncio.run(item.delete())
+
+
+@mock.patch('builtins.print')
+class TestAsyncControllerCommands(unittest.TestCase):
+
+    def test_debug(self, printed):
+        response = MockAsyncResponse(None, status=201)
+        with mock.patch('pygns3.AsyncGNS3API.post_request', return_value=response) as post:
+            asyncio.run(AsyncGNS3Controller.debug())
+        self.assertEqual(post.call_args[0][0], '/debug')
+        printed.assert_called_once_with('Debug information written to configuration directory')
+
+    def test_shutdown(self, printed):
+        response = MockAsyncResponse(None, status=403)
+        with mock.patch('pygns3.AsyncGNS3API.post_request', return_value=response) as post:
+            asyncio.run(AsyncGNS3Controller.shutdown())
+        self.assertEqual(post.call_args[0][0], '/shutdown')
+        self.assertIn('refused', printed.call_args[0][0])
+
+    def test_not_a_controller_subclass(self, printed):
+        self.assertFalse(issubclass(AsyncGNS3Controller, GNS3Controller))
+        self.assertFalse(hasattr(AsyncGNS3Controller, 'export_all'))
+
+
+@unittest.skipIf(aio.aiohttp is None, 'aiohttp is not installed')
+class TestAsyncFakeController(unittest.TestCase):
+    """Requests which send or receive bodies in chunks, against a local fake controller"""
+
+    def setUp(self):
+        self.server = FakeController(export_size=3 * 1024 * 1024 + 5).start()
+        self.addCleanup(self.server.stop)
+        self.addCleanup(GNS3API.close)
+        self.server.configure()
+        self.project_id = self.server.add_project(synthetic_project(nodes=20, seed=2))
+
+    def test_export_and_import(self):
+        progress = []
+
+        async def export_and_import(path):
+            project = await AsyncGNS3Project.from_id(self.project_id)
+            written = await project.export(path, chunk_size=1024 * 1024,
+                                           progress=lambda *p: progress.append(p))
+            imported = await AsyncGNS3Project.import_project(path, chunk_size=1024 * 1024)
+            return written, imported
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'lab.gns3project')
+            written, imported = asyncio.run(export_and_import(path))
+            self.assertEqual(os.path.getsize(path), written)
+
+        self.assertEqual(written, self.server.export_size)
+        self.assertEqual(progress[-1][0], written)
+        self.assertEqual(type(imported).__name__, 'AsyncGNS3Project')
+        archive = self.server.files[(imported.project_id, f'{imported.name}.gns3project')]
+        self.assertEqual(len(archive), written)
+
+    def test_files(self):
+        content = b'hostname R1\n' * 10000
+
+        async def write_and_get():
+            project = await AsyncGNS3Project.from_id(self.project_id)
+            chunks = (content[i:i + 4096] for i in range(0, len(content), 4096))
+            await project.write_file('config.txt', chunks)
+            return await project.get_file('config.txt')
+
+        self.assertEqual(asyncio.run(write_and_get()), content)
+        self.assertEqual(self.server.files[(self.project_id, 'config.txt')], content)
+
+    def test_add_and_iter(self):
+        async def add_and_iter():
+            project = await AsyncGNS3Project.from_id(self.project_id)
+            nodes = [await project.add_node(f'R{i}', 'vpcs') for i in range(2)]
+            link = await project.add_link(nodes[0], (0, 0), nodes[1], (0, 0))
+            links = [l async for l in project.iter_links()]
+            return project, link, links
+
+        project, link, links = asyncio.run(add_and_iter())
+        self.assertEqual(len(project.nodes), 22)
+        self.assertIn(link.link_id, [l.link_id for l in links])
+        self.assertIs(next(l for l in links if l.link_id == link.link_id).to_node,
+                      project.nodes[-1])
+
+
+class TestAsyncGNS3API(unittest.TestCase):
+
+    def test_get_json_raises_on_errors(self):
+        response = MockAsyncResponse({'message': 'Project not found'}, status=404)
+        with mock.patch('pygns3.AsyncGNS3API.get_request', return_value=response):
+            with self.assertRaisesRegex(ValueError, 'Project not found'):
+                asyncio.run(AsyncGNS3API.get_json('/projects/missing'))
+
+    @unittest.skipIf(aio.aiohttp is None, 'aiohttp is not installed')
+    def test_one_session_per_loop(self):
+        loops = [asyncio.new_event_loop() for _ in range(2)]
+        try:
+            sessions = [l.run_until_complete(AsyncGNS3API.get_session()) for l in loops]
+            self.assertIsNot(sessions[0], sessions[1])
+            self.assertIs(loops[0].run_until_complete(AsyncGNS3API.get_session()), sessions[0])
+            for l in loops:
+                l.run_until_complete(AsyncGNS3API.close())
+            self.assertTrue(all(s.closed for s in sessions))
+            self.assertEqual(AsyncGNS3API.sessions, {})
+        finally:
+            for l in loops:
+                l.close()
+
+    @unittest.skipIf(aio.aiohttp is None, 'aiohttp is not installed')
+    def test_sessions_of_closed_loops(self):
+        # asyncio.run() finalizes the async generators of its loop, which closes the session
+        session = asyncio.run(AsyncGNS3API.get_session())
+        self.assertTrue(session.closed)
+        self.assertEqual(AsyncGNS3API.sessions, {})
+
+        loop = asyncio.new_event_loop()
+        unfinalized = loop.run_until_complete(AsyncGNS3API.get_session())
+        loop.close()
+        asyncio.run(AsyncGNS3API.get_session())
+        self.assertIsNone(unfinalized.connector)
+        self.assertEqual(AsyncGNS3API.sessions, {})
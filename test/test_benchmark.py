@@ -0,0 +1,93 @@
+"""
+Tests for the benchmark stand-in controller and harness, over real HTTP on localhost.
+"""
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+from pygns3 import GNS3API, GNS3Controller, GNS3Project, NodeOrchestrator
+from tools.benchmark import run
+from tools.benchmark.server import FakeController
+from tools.benchmark.synthetic import mock_responses, synthetic_project
+
+
+class TestFakeController(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeController().start()
+        self.addCleanup(self.server.stop)
+        self.addCleanup(GNS3API.close)
+        self.server.configure()
+
+    def test_synthetic_project(self):
+        project = synthetic_project(nodes=200, links=300, drawings=5, snapshots=3, seed=7)
+        self.assertEqual(synthetic_project(nodes=200, links=300, drawings=5, snapshots=3,
+                                           seed=7), project)
+        self.assertNotEqual(synthetic_project(nodes=200, links=300, seed=8)['nodes'],
+                            project['nodes'])
+        self.assertEqual(len(project['snapshots']), 3)
+        self.assertGreater(len({n['node_type'] for n in project['nodes']}), 3)
+
+        ports = {(n['node_id'], p['adapter_number'], p['port_number'])
+                 for n in project['nodes'] for p in n['ports']}
+        used = [(n['node_id'], n['adapter_number'], n['port_number'])
+                for link in project['links'] for n in link['nodes']]
+        self.assertEqual(len(used), len(set(used)))
+        self.assertLessEqual(set(used), ports)
+        self.assertRaises(ValueError, synthetic_project, nodes=2, links=5, ports=2)
+
+    def test_mock_responses(self):
+        project = synthetic_project(nodes=30, links=40, seed=1)
+        responses = mock_responses(project)
+        with mock.patch('pygns3.GNS3API.get_request',
+                        side_effect=lambda path: mock.Mock(
+                            ok=True, json=lambda: json.loads(responses[path]))):
+            loaded = GNS3Project(project['project']['project_id'], preload=True)
+        self.assertEqual(len(loaded.links), 40)
+        self.assertTrue(all(l.from_port_name != 'Unknown' for l in loaded.links))
+
+    def test_load_over_http(self):
+        project_id = self.server.add_project(synthetic_project(nodes=20, links=25, drawings=3,
+                                                               node_types='qemu'))
+        controller = GNS3Controller(preload=True)
+
+        project = next(p for p in controller.projects if p.project_id == project_id)
+        self.assertEqual(len(project.nodes), 20)
+        self.assertEqual(len(project.links), 25)
+        self.assertEqual(len(project.drawings), 3)
+        self.assertRegex(project.links[0].from_port_name, r'^e[0-3]$')
+        self.assertEqual(controller.computes[0].id, 'local')
+
+    def test_create_and_start_nodes(self):
+        project = GNS3Project.create('created')
+        r1 = project.add_node('R1', 'qemu')
+        r2 = project.add_node('R2', 'qemu')
+        link = project.add_link(r1, 'e0', r2, (1, 0))
+        self.assertEqual(link.to_port_name, 'e1')
+
+        report = NodeOrchestrator(project, poll_interval=0.01).start()
+        self.assertTrue(report.ready)
+        self.assertEqual(GNS3Project(project.project_id, preload=True).nodes[0].status,
+                         'started')
+
+
+class TestBenchmarkRun(unittest.TestCase):
+
+    def test_results_are_recorded_and_compared(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'results.jsonl')
+            argv = ['--projects', '1', '--nodes', '5', '--build', '3', '--repeat', '1',
+                    '--latency', '0', '--export-size', '1024', '--output', output]
+            self.assertEqual(run.main(argv), 0)
+            with open(output) as f:
+                record = json.loads(f.readline())
+        self.assertEqual(set(record['results']) - {'requests'},
+                         {'controller', 'controller_preload', 'project_load', 'nodes_list',
+                          'nodes_stream', 'topology_build', 'export_all'})
+        self.assertGreater(record['results']['nodes_stream']['peak_bytes'], 0)
+
+        slower = {'project_load': {'median': 2.0}, 'requests': 10}
+        self.assertEqual([r[0] for r in run.compare({'project_load': {'median': 1.0}}, slower,
+                                                    0.2)], ['project_load'])
+        self.assertEqual(run.compare({'project_load': {'median': 1.9}}, slower, 0.2), [])
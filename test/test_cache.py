@@ -0,0 +1,118 @@
+"""
+Tests for the ResponseCache and its use in GNS3API.
+"""
+import json
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+from pygns3 import GNS3API, ResponseCache
+from pygns3.controller import GNS3Response
+
+
+class TestResponseCache(unittest.TestCase):
+
+    def test_routes_and_ttl(self):
+        cache = ResponseCache({'/version': 60, '/computes/{compute_id}/{emulator}/images': 0.05})
+
+        self.assertEqual(cache.ttl('/version'), 60)
+        self.assertEqual(cache.ttl('/computes/local/qemu/images'), 0.05)
+        self.assertIsNone(cache.ttl('/computes/local'))
+
+        cache.put('/computes/local', 'not cached')
+        cache.put('/computes/local/qemu/images', 'images')
+        self.assertIsNone(cache.get('/computes/local'))
+        self.assertEqual(cache.get('/computes/local/qemu/images'), 'images')
+        time.sleep(0.06)
+        self.assertIsNone(cache.get('/computes/local/qemu/images'))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_lru_eviction(self):
+        cache = ResponseCache({'/projects/{project_id}': 60}, max_size=2)
+        for project_id in 'abc':
+            cache.put(f'/projects/{project_id}', project_id)
+            cache.get('/projects/a')
+
+        self.assertEqual(cache.get('/projects/a'), 'a')
+        self.assertIsNone(cache.get('/projects/b'))
+        self.assertEqual(cache.get('/projects/c'), 'c')
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_invalidate_resource(self):
+        cache = ResponseCache({'/projects': 60, '/projects/{project_id}': 60, '/version': 60})
+        for path in ('/projects', '/projects/a', '/projects/b', '/version'):
+            cache.put(path, path)
+
+        cache.invalidate('/projects/a/nodes/n1/start')
+
+        self.assertEqual([p for p in ('/projects', '/projects/a', '/projects/b', '/version')
+                          if cache.get(p)], ['/projects/b', '/version'])
+        self.assertEqual(cache.invalidations, 2)
+
+
+class TestGNS3APICache(unittest.TestCase):
+
+    def setUp(self):
+        GNS3API.cache = ResponseCache()
+        self.session = mock.Mock()
+        self.session.request.side_effect = lambda method, url, **kwargs: mock.Mock(ok=True,
+                                                                                   url=url)
+        patch = mock.patch('pygns3.GNS3API.get_session', return_value=self.session)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def tearDown(self):
+        GNS3API.cache = None
+
+    def test_get_request_cached_until_mutation(self):
+        first = GNS3API.get_request('/projects/a')
+        self.assertIs(GNS3API.get_request('/projects/a'), first)
+        GNS3API.get_request('/projects/a/nodes')
+        GNS3API.get_request('/projects/a/nodes')
+        self.assertEqual(self.session.request.call_count, 3)
+
+        GNS3API.post_request('/projects/a/close', {})
+        self.assertIsNot(GNS3API.get_request('/projects/a'), first)
+        self.assertEqual(GNS3API.cache.stats()['hits'], 1)
+
+
+class TestCoalescing(unittest.TestCase):
+
+    def setUp(self):
+        self.session = mock.Mock()
+        self.session.request.side_effect = self.slow_request
+        patch = mock.patch('pygns3.GNS3API.get_session', return_value=self.session)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    @staticmethod
+    def slow_request(method, url, **kwargs):
+        time.sleep(0.1)
+        # As built by the GNS3Adapter of the real session
+        response = GNS3Response()
+        response.status_code = 200
+        response._content = json.dumps([{'node_id': url}]).encode()
+        return response
+
+    def test_concurrent_gets_share_one_request(self):
+        paths = ['/projects/a/nodes'] * 8 + ['/projects/b/nodes'] * 2
+        with ThreadPoolExecutor(max_workers=10) as executor:
+            responses = list(executor.map(GNS3API.get_request, paths))
+
+        self.assertEqual(self.session.request.call_count, 2)
+        self.assertEqual(len({id(r) for r in responses}), 2)
+        self.assertIs(responses[0].json(), responses[7].json())
+        self.assertEqual(GNS3API._in_flight, {})
+
+    def test_sequential_gets_are_not_shared(self):
+        GNS3API.get_request('/projects/a/nodes')
+        GNS3API.get_request('/projects/a/nodes')
+        self.assertEqual(self.session.request.call_count, 2)
+
+    def test_errors_reach_every_caller(self):
+        self.session.request.side_effect = lambda *args, **kwargs: time.sleep(0.1) or 1 / 0
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            futures = [executor.submit(GNS3API.get_request, '/version') for _ in range(3)]
+        for future in futures:
+            self.assertRaises(Exception, future.result)
+        self.assertEqual(self.session.request.call_count, 1)
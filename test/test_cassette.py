@@ -0,0 +1,93 @@
+"""
+Tests for recording GNS3API traffic to a cassette and replaying it without a controller.
+"""
+import json
+import os
+import tempfile
+import time
+import unittest
+from pygns3 import GNS3API, GNS3Controller, GNS3Project
+from pygns3.cassette import Cassette
+from pygns3.controller import GNS3Response
+from tools.benchmark.server import FakeController
+from tools.benchmark.synthetic import synthetic_project
+
+
+class TestCassette(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.addCleanup(GNS3API.use_cassette, None)
+        self.path = os.path.join(directory.name, 'session.jsonl.gz')
+        self.project = synthetic_project(nodes=10, links=12, seed=3)
+        self.project_id = self.project['project']['project_id']
+
+        with FakeController(latency=0.02) as server:
+            server.add_project(self.project)
+            server.configure()
+            GNS3API.use_cassette(self.path)
+            controller = GNS3Controller(preload=True)
+            self.nodes = [n.name for n in controller.projects[0].nodes]
+            project = GNS3Project(self.project_id)
+            project.add_node('added', 'qemu')
+            self.added = [n.name for n in project.nodes]
+            self.assertIsInstance(GNS3API.get_request('/projects/missing'), GNS3Response)
+        GNS3API.use_cassette(None)
+
+    def test_record(self):
+        cassette = Cassette(self.path, 'replay')
+        methods = [e['method'] for e in cassette.entries]
+        self.assertEqual(methods.count('POST'), 1)
+        post = next(e for e in cassette.entries if e['method'] == 'POST')
+        self.assertEqual(json.loads(post['body'])['name'], 'added')
+        self.assertEqual(post['status'], 201)
+        self.assertTrue(all(e['seconds'] >= 0.02 for e in cassette.entries))
+        self.assertIn(f'/projects/{self.project_id}/nodes', cassette.responses())
+        self.assertNotIn('/projects/missing', cassette.responses())
+
+    def test_replay_offline(self):
+        GNS3API.base = 'http://127.0.0.1:9/v2'
+        GNS3API.use_cassette(self.path, mode='replay')
+        start = time.perf_counter()
+        controller = GNS3Controller(preload=True)
+        self.assertLess(time.perf_counter() - start, 0.1)
+        self.assertEqual([n.name for n in controller.projects[0].nodes], self.nodes)
+
+        # The same path replays its recorded responses in order
+        project = GNS3Project(self.project_id)
+        project.add_node('added', 'qemu')
+        self.assertEqual([n.name for n in project.nodes], self.added)
+        self.assertEqual(GNS3API.get_request('/projects/missing').status_code, 404)
+
+        # Replayed responses decode their json once, like the ones of the controller
+        response = GNS3API.get_request('/version')
+        self.assertIsInstance(response, GNS3Response)
+        self.assertIs(response.json(), response.json())
+        with self.assertRaises(Exception):
+            GNS3API.get_request('/never/recorded')
+
+    def test_replay_realtime(self):
+        GNS3API.use_cassette(self.path, mode='replay', realtime=True)
+        start = time.perf_counter()
+        GNS3API.get_request('/version')
+        self.assertGreaterEqual(time.perf_counter() - start, 0.02)
+
+    def test_compact(self):
+        # One gzip stream for the whole recording, not a gzip member per request
+        with open(self.path, 'rb') as f:
+            self.assertEqual(f.read().count(b'\x1f\x8b\x08'), 1)
+
+    def test_unclosed_recording(self):
+        path = self.path.replace('session', 'unclosed')
+        with FakeController() as server:
+            server.configure()
+            GNS3API.use_cassette(path)
+            GNS3API.get_request('/version')
+            GNS3API.get_request('/computes')
+            # Replayed while still being recorded, as if the process had stopped
+            self.assertEqual(len(Cassette(path, 'replay').entries), 2)
+
+    def test_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            Cassette(self.path, 'rewind')
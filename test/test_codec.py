@@ -0,0 +1,109 @@
+"""
+Tests for the JSON codecs of GNS3API.
+"""
+import json
+import unittest
+from pygns3 import GNS3API, GNS3Controller, GNS3Project
+from pygns3.codec import available, get_codec, iter_array
+from tools.benchmark import codec as codec_benchmark
+from tools.benchmark.server import FakeController
+from tools.benchmark.synthetic import synthetic_project
+
+
+class TestCodecs(unittest.TestCase):
+
+    def test_round_trip(self):
+        data = {'name': 'R1 – café', 'x': -10, 'ports': [{'adapter_number': 0}], 'label': None}
+        for name in available():
+            codec = get_codec(name)
+            encoded = codec.dumps(data)
+            self.assertIsInstance(encoded, bytes)
+            self.assertEqual(codec.loads(encoded), data)
+            self.assertEqual(codec.loads(encoded.decode()), data)
+
+    def test_invalid_json(self):
+        for name in available():
+            with self.assertRaises(ValueError):
+                get_codec(name).loads(b'{"name": ')
+
+    def test_unknown_codec(self):
+        self.assertRaises(ValueError, get_codec, 'yaml')
+        self.assertIn(get_codec().name, available())
+
+    def test_responses_use_the_codec(self):
+        self.addCleanup(GNS3API.use_codec)
+        self.addCleanup(GNS3API.close)
+        with FakeController() as server:
+            server.configure()
+            project_id = server.add_project(synthetic_project(nodes=20, links=10, seed=4))
+            for count, name in enumerate(available(), 20):
+                GNS3API.use_codec(name)
+                project = GNS3Project(project_id, preload=True)
+                self.assertEqual(len(project.nodes), count)
+                project.add_node(f'added with {name}', 'qemu')
+                self.assertIn(f'added with {name}', [n.name for n in project.nodes])
+
+    def test_benchmark(self):
+        results = codec_benchmark.run(nodes=20, repeat=1)
+        self.assertEqual(set(results), set(available()))
+        self.assertGreater(results['json']['bytes'], 0)
+
+
+class TestIterArray(unittest.TestCase):
+
+    def test_any_chunking(self):
+        data = [{'name': f'R{i} – café', 'x': i * 1.5, 'ports': [], 'label': None}
+                for i in range(50)]
+        data += [12345, 'text', [], {}, True]
+        content = json.dumps(data, indent=2).encode()
+        for size in (1, 2, 7, 1000, len(content)):
+            chunks = [content[i:i + size] for i in range(0, len(content), size)]
+            self.assertEqual(list(iter_array(chunks)), data)
+        self.assertEqual(list(iter_array([b' [ ] '])), [])
+        # A number split over two chunks
+        self.assertEqual(list(iter_array([b'[1', b'23]'])), [123])
+
+    def test_split_at_every_offset(self):
+        content = b'[1,23,456,-7.5e3,0.25,-0,1E-2,true,false,null,"a,]",{"b":[1.5]},[],"\xc3\xa9"]'
+        data = json.loads(content)
+        for i in range(len(content) + 1):
+            self.assertEqual(list(iter_array([content[:i], content[i:]])), data, i)
+
+    def test_items_before_the_end(self):
+        consumed = []
+
+        def chunks():
+            for chunk in (b'[{"a": 1},', b' {"a": 2},', b' {"a": 3}]'):
+                consumed.append(chunk)
+                yield chunk
+        items = iter_array(chunks())
+        self.assertEqual(next(items), {'a': 1})
+        self.assertEqual(len(consumed), 1)
+
+    def test_invalid(self):
+        for content in (b'{}', b'[1,', b'[1 2]', b'[1]x', b'', b'[1,]'):
+            with self.assertRaises(ValueError):
+                list(iter_array([content]))
+
+
+class TestStreamedListings(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeController().start()
+        self.addCleanup(self.server.stop)
+        self.addCleanup(GNS3API.close)
+        self.server.configure()
+        self.project_id = self.server.add_project(synthetic_project(nodes=300, links=200, seed=5))
+
+    def test_iter_collections(self):
+        project = GNS3Project(self.project_id, preload=True)
+        self.assertEqual([n.node_id for n in project.iter_nodes()],
+                         [n.node_id for n in project.nodes])
+        self.assertEqual([(l.link_id, l.from_port_name) for l in project.iter_links()],
+                         [(l.link_id, l.from_port_name) for l in project.links])
+        controller = GNS3Controller()
+        self.assertEqual([p.project_id for p in controller.iter_projects()], [self.project_id])
+
+    def test_error_response(self):
+        with self.assertRaises(ValueError):
+            list(GNS3Project.from_settings({'project_id': 'missing'}).iter_nodes())
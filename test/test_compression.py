@@ -0,0 +1,92 @@
+"""
+Tests for compressed requests and responses, against the local controller stand-in.
+"""
+import io
+import os
+import tempfile
+import unittest
+from pygns3 import Compression, GNS3API, GNS3Project, Metrics
+from pygns3.compression import compress, decompress, encodings
+from tools.benchmark.server import FakeController
+from tools.benchmark.synthetic import synthetic_project
+
+
+class TestStreams(unittest.TestCase):
+
+    def test_round_trip(self):
+        data = b''.join(f'line {i}\n'.encode() for i in range(20000))
+        for encoding in encodings():
+            chunks = [data[i:i + 1000] for i in range(0, len(data), 1000)]
+            compressed = list(compress(chunks, encoding))
+            self.assertLess(sum(map(len, compressed)), len(data) / 4)
+            self.assertEqual(b''.join(decompress(compressed, encoding)), data)
+        self.assertEqual(b''.join(decompress([b'as', b'is'], 'identity')), b'asis')
+
+    def test_unsupported(self):
+        self.assertRaises(ValueError, Compression, encoding='lz4')
+        with self.assertRaises(ValueError):
+            list(decompress([b''], 'lz4'))
+
+
+class TestCompression(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeController(compress=True, export_size=4 * 1024 * 1024).start()
+        self.addCleanup(self.server.stop)
+        self.addCleanup(GNS3API.close)
+        self.addCleanup(GNS3API.use_compression, None)
+        self.server.configure()
+        self.project_id = self.server.add_project(synthetic_project(nodes=200, seed=6))
+        self.compression = GNS3API.use_compression(Compression(threshold=16 * 1024))
+
+    def test_large_bodies_are_compressed(self):
+        project = GNS3Project(self.project_id)
+        content = b''.join(f'hostname R{i}\n'.encode() for i in range(20000))
+        project.write_file('config.txt', content)
+        self.assertEqual(self.server.files[(self.project_id, 'config.txt')], content)
+        self.assertLess(self.server.received, len(content) / 5)
+
+        # Small bodies are sent as they are
+        project.add_node('R1', 'qemu')
+        sent = self.compression.stats()['sent']
+        self.assertEqual((sent['messages'], sent['compressed']), (1, 1))
+        self.assertLess(sent['ratio'], 0.2)
+
+    def test_streamed_uploads(self):
+        archive = b'node config ' * 200000
+        project = GNS3Project.import_project(io.BytesIO(archive), chunk_size=64 * 1024)
+        self.assertEqual(self.server.files[(project.project_id, f'{project.name}.gns3project')],
+                         archive)
+        self.assertLess(self.server.received, len(archive) / 10)
+
+        # Incompressible data, like a zipped archive, is sent as is
+        received = self.server.received
+        noise = os.urandom(256 * 1024)
+        GNS3Project(self.project_id).write_file('image.zip', iter([noise[:65536], noise[65536:]]))
+        self.assertEqual(self.server.files[(self.project_id, 'image.zip')], noise)
+        self.assertGreaterEqual(self.server.received - received, len(noise))
+        sent = self.compression.stats()['sent']
+        self.assertEqual((sent['messages'], sent['compressed']), (2, 1))
+
+    def test_responses(self):
+        project = GNS3Project(self.project_id, preload=True)
+        self.assertEqual(len(project.nodes), 200)
+        with tempfile.TemporaryDirectory() as directory:
+            written = project.export(os.path.join(directory, 'lab.gns3project'))
+        self.assertEqual(written, self.server.export_size)
+
+        stats = self.compression.stats()
+        self.assertGreater(stats['received']['bytes'], self.server.export_size)
+        self.assertLess(stats['received']['ratio'], 0.1)
+        self.assertGreater(stats['seconds_saved'], 1)
+
+        metrics = Metrics()
+        self.compression.register(metrics)
+        self.assertIn('pygns3_compression_received_ratio', metrics.prometheus())
+
+    def test_identity(self):
+        GNS3API.use_compression(Compression(accept='identity'))
+        GNS3Project(self.project_id, preload=True)
+        received = GNS3API.compression.stats()['received']
+        self.assertEqual(received['compressed'], 0)
+        self.assertEqual(received['ratio'], 1.0)
@@ -7,9 +7,18 @@ I should define a better test project file, to be able to import that and test a
 file can then be included in the test directory for distribution.
 """
 import unittest
+import gzip
+import io
 import json
+import os
+import struct
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from unittest import mock
 from pygns3 import *
+from pygns3.controller import EXPORT_MANIFEST, GNS3Node, Struct
 from test import mock_get
 
 TEST_PROJECT_NAME = 'Basic 4 Routers'
@@ -58,3 +67,508 @@ class TestController(unittest.TestCase):
         self.assertTrue(len(test_project.links) == 6)
         self.assertTrue(len(test_project.nodes) == 6)
         self.assertTrue(len(test_project.snapshots) == 1)
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    """Answers every GET with the static /version response over a persistent connection."""
+    protocol_version = 'HTTP/1.1'
+    clients = set()
+
+    def do_GET(self):
+        self.clients.add(self.client_address)
+        body = mock_get['/version'].encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestGNS3APIPool(unittest.TestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), KeepAliveHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        KeepAliveHandler.clients = set()
+        GNS3API.protocol = 'http'
+        GNS3API.base = f'http://127.0.0.1:{self.server.server_port}/v2'
+
+    def tearDown(self):
+        GNS3API.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_connections_are_reused(self):
+        GNS3API.configure_pool(pool_maxsize=2)
+        for _ in range(20):
+            self.assertEqual(GNS3API.get_request('/version').json()['version'], '2.0.3')
+
+        stats = GNS3API.pool_stats()[f'http://127.0.0.1:{self.server.server_port}']
+        self.assertEqual(stats['connections'], 1)
+        self.assertEqual(stats['requests'], 20)
+        self.assertEqual(len(KeepAliveHandler.clients), 1)
+
+    def test_keep_alive_disabled(self):
+        GNS3API.configure_pool(keep_alive=False)
+        for _ in range(3):
+            GNS3API.get_request('/version')
+
+        self.assertEqual(len(KeepAliveHandler.clients), 3)
+        GNS3API.configure_pool(keep_alive=True)
+
+
+def synthetic_project_responses(project_id, link_count):
+    """Cached responses for a project with a chain of `link_count` links between routers."""
+    nodes = [{'project_id': project_id, 'node_id': f'node-{i}', 'name': f'R{i}',
+              'properties': {},
+              'ports': [{'adapter_number': a, 'port_number': 0, 'short_name': f'f{a}/0'}
+                        for a in range(2)]}
+             for i in range(link_count + 1)]
+    links = [{'project_id': project_id, 'link_id': f'link-{i}',
+              'nodes': [{'node_id': f'node-{i}', 'adapter_number': 1, 'port_number': 0},
+                        {'node_id': f'node-{i + 1}', 'adapter_number': 0, 'port_number': 0}]}
+             for i in range(link_count)]
+    path = f'/projects/{project_id}'
+    responses = {path: {'project_id': project_id, 'name': 'synthetic'},
+                 f'{path}/drawings': [],
+                 f'{path}/links': links,
+                 f'{path}/nodes': nodes,
+                 f'{path}/snapshots': []}
+    responses.update({f'{path}/nodes/{n["node_id"]}': n for n in nodes})
+    return {k: json.dumps(v) for k, v in responses.items()}
+
+
+class TestProjectLoad(unittest.TestCase):
+
+    def load_counting_requests(self, link_count):
+        responses = synthetic_project_responses('synthetic', link_count)
+
+        def get_request(path):
+            return mock.Mock(ok=True, json=lambda: json.loads(responses[path]))
+
+        with mock.patch('pygns3.GNS3API.get_request', side_effect=get_request) as patch:
+            project = GNS3Project('synthetic', preload=True)
+            links = project.links
+        return project, patch.call_count
+
+    def test_request_count_independent_of_links(self):
+        _, small = self.load_counting_requests(2)
+        project, large = self.load_counting_requests(400)
+
+        self.assertEqual(small, large)
+        self.assertEqual(large, 5)
+        self.assertEqual(len(project.links), 400)
+        self.assertIs(project.links[0].to_node, project.nodes[1])
+        self.assertEqual(project.links[0].from_port_name, 'f1/0')
+        self.assertEqual(project.links[0].to_port_name, 'f0/0')
+
+
+class TestControllerLoad(unittest.TestCase):
+
+    @staticmethod
+    def slow_get_request(path):
+        time.sleep(0.05)
+        return mocked_gns3api_get_request(path)
+
+    def test_parallel_load_matches_sequential(self):
+        with mock.patch('pygns3.GNS3API.get_request', side_effect=self.slow_get_request):
+            start = time.perf_counter()
+            sequential = GNS3Controller(max_workers=1, preload=True)
+            sequential_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            parallel = GNS3Controller(max_workers=16, preload=True)
+            parallel_time = time.perf_counter() - start
+
+        self.assertEqual([c.id for c in parallel.computes], [c.id for c in sequential.computes])
+        self.assertEqual([p.name for p in parallel.projects],
+                         [p.name for p in sequential.projects])
+        self.assertEqual([len(p.links) for p in parallel.projects],
+                         [len(p.links) for p in sequential.projects])
+        # 15 requests: sequential takes ~15 round trips, parallel two batches
+        self.assertGreater(sequential_time, 0.7)
+        self.assertLess(parallel_time, 0.3)
+
+
+@mock.patch('pygns3.GNS3API.get_request', side_effect=mocked_gns3api_get_request)
+class TestLazyCollections(unittest.TestCase):
+
+    def requested(self, patch):
+        paths = [c[0][0] for c in patch.call_args_list]
+        patch.reset_mock()
+        return paths
+
+    def test_controller_fetches_version_only(self, patch):
+        controller = GNS3Controller()
+
+        self.assertEqual(controller.version, '2.0.3')
+        self.assertEqual(self.requested(patch), ['/version'])
+        self.assertEqual(len(controller.projects), 2)
+        self.assertEqual(self.requested(patch), ['/projects'])
+        self.assertEqual(controller.projects[0].name, TEST_PROJECT_NAME)
+        self.assertEqual(self.requested(patch), [])
+
+    def test_project_collections_on_access(self, patch):
+        project = GNS3Project.from_name(TEST_PROJECT_NAME)
+        path = f'/projects/{project.project_id}'
+        self.assertEqual(self.requested(patch), ['/projects'])
+
+        self.assertEqual(len(project.links), 6)
+        self.assertEqual(sorted(self.requested(patch)), [f'{path}/links', f'{path}/nodes'])
+        self.assertEqual(len(project.nodes), 6)
+        self.assertEqual(self.requested(patch), [])
+
+        project.refresh()
+        self.assertEqual(sorted(self.requested(patch)),
+                         [path, f'{path}/links', f'{path}/nodes'])
+        self.assertEqual(len(project.links), 6)
+        self.assertEqual(self.requested(patch), [])
+
+
+class MockNotificationStream:
+    """Streams the given notifications, then blocks like an idle stream until closed."""
+
+    def __init__(self, notifications):
+        self.lines = [json.dumps(n).encode() for n in notifications]
+        self.closed = threading.Event()
+
+    def iter_lines(self):
+        yield from self.lines
+        self.closed.wait()
+
+    def close(self):
+        self.closed.set()
+
+
+@mock.patch('pygns3.GNS3API.get_request', side_effect=mocked_gns3api_get_request)
+class TestProjectListener(unittest.TestCase):
+
+    def load_project(self):
+        project = GNS3Project.from_name(TEST_PROJECT_NAME)
+        return project, project.nodes, project.links
+
+    def test_apply_updates_in_place(self, patch):
+        project, nodes, links = self.load_project()
+        listener = GNS3ProjectListener(project)
+        node = dict(nodes[0]._node, status='started')
+        link = links[0]._link
+
+        listener.apply({'action': 'node.updated', 'event': node})
+        listener.apply({'action': 'link.deleted', 'event': link})
+        listener.apply({'action': 'project.updated', 'event': dict(project._response, name='x')})
+        listener.apply({'action': 'ping', 'event': {'cpu_usage_percent': 1}})
+        patch.reset_mock()
+
+        self.assertIs(project.nodes[0], nodes[0])
+        self.assertEqual(project.nodes[0].status, 'started')
+        self.assertEqual(len(project.links), len(links) - 1)
+        self.assertEqual(project.name, 'x')
+        self.assertEqual(len(project.drawings), 6)
+        self.assertEqual(patch.call_count, 1)
+
+    def test_listen_applies_stream(self, patch):
+        project, nodes, _ = self.load_project()
+        created = dict(nodes[0]._node, node_id='new-node', name='R9')
+        stream = MockNotificationStream([{'action': 'ping', 'event': {}},
+                                         {'action': 'node.created', 'event': created}])
+
+        with mock.patch('pygns3.GNS3API.stream_request', return_value=stream):
+            listener = project.listen()
+            self.assertTrue(listener.wait_for(lambda: listener.received == 2, timeout=5))
+            project.stop_listening()
+
+        self.assertEqual(project.nodes[-1].name, 'R9')
+        self.assertEqual(len(project.nodes), len(nodes) + 1)
+        self.assertTrue(stream.closed.is_set())
+
+    def test_snapshot_restored_keeps_references(self, patch):
+        project, nodes, links = self.load_project()
+        node, link = nodes[0], links[0]
+        listener = GNS3ProjectListener(project)
+        listener.apply({'action': 'snapshot.restored', 'event': {}})
+        listener.apply({'action': 'node.updated', 'event': dict(node._node, status='started')})
+
+        self.assertIs(project.nodes[0], node)
+        self.assertIs(project.links[0], link)
+        self.assertEqual(node.status, 'started')
+        self.assertIn(link.from_node, project.nodes)
+        self.assertIn(link.to_node, project.nodes)
+
+    def test_first_connect_catches_up(self, patch):
+        project, nodes, _ = self.load_project()
+        path = f'/projects/{project.project_id}/nodes'
+        listing = mock_get[path]
+        self.addCleanup(mock_get.__setitem__, path, listing)
+        # Changed between the load and the connection, no notification is sent for it
+        changed = json.loads(listing)
+        changed[0]['status'] = 'suspended'
+        mock_get[path] = json.dumps(changed)
+
+        with mock.patch('pygns3.GNS3API.stream_request', return_value=MockNotificationStream([])):
+            listener = project.listen()
+            self.assertTrue(listener.connected.wait(5))
+            project.stop_listening()
+
+        self.assertIs(project.nodes[0], nodes[0])
+        self.assertEqual(nodes[0].status, 'suspended')
+
+
+class TestAttributeView(unittest.TestCase):
+
+    def setUp(self):
+        path = '/projects/a1ea2a19-2980-41aa-81ab-f1c80be25ca7/nodes'
+        self.data = json.loads(mock_get[path])[0]
+        self.node = GNS3Node(self.data)
+
+    def test_attributes_read_from_json(self):
+        self.assertEqual(self.node.name, self.data['name'])
+        self.assertEqual(self.node.label.text, self.data['label']['text'])
+        self.assertIs(self.node.properties.platform, self.data['properties']['platform'])
+        with self.assertRaises(AttributeError):
+            self.node.no_such_attribute
+
+    def test_no_copies(self):
+        self.assertFalse(hasattr(self.node, '__dict__'))
+        self.assertFalse(hasattr(self.node.ports[0], '__dict__'))
+        self.assertIs(self.node._node, self.data)
+
+    def test_str_leaves_json_intact(self):
+        str(self.node)
+        self.assertIsInstance(self.node.ports, list)
+        self.assertIn('properties', self.data)
+
+    def test_port_lookup(self):
+        port = self.node.port(0, 1)
+
+        self.assertIs(port, self.node.ports[1])
+        self.assertIs(self.node.port_by_name('f0/1'), port)
+        self.assertIs(self.node.port_by_name('FastEthernet0/1'), port)
+        self.assertEqual(self.node.port_name(0, 1), 'f0/1')
+        self.assertEqual(self.node.port_name(9, 9), 'Unknown')
+        self.assertIsNone(self.node.port(9, 9))
+
+    def test_struct(self):
+        self.assertEqual(Struct(self.data).label.text, self.data['label']['text'])
+        # Keyword entries, as before Struct became a view
+        self.assertEqual(Struct(**self.data).label, Struct(self.data['label']))
+        with self.assertRaises(AttributeError):
+            Struct(self.data)._data_missing
+
+
+class MockPcapStream:
+    """A capture in pcap format, delivered in chunks of an awkward size"""
+
+    def __init__(self, packets, chunk=7):
+        data = struct.pack('<IHHiIII', 0xa1b2c3d4, 2, 4, 0, 0, 65535, 1)
+        for i, packet in enumerate(packets):
+            data += struct.pack('<IIII', 1500000000 + i, 250000, len(packet), len(packet)) + packet
+        self.data = data
+        self.chunk = chunk
+        self.ok = True
+        self.closed = False
+
+    def iter_content(self, chunk_size):
+        for i in range(0, len(self.data), self.chunk):
+            yield self.data[i:i + self.chunk]
+
+    def close(self):
+        self.closed = True
+
+
+@mock.patch('pygns3.GNS3API.get_request', side_effect=mocked_gns3api_get_request)
+class TestLinkCapture(unittest.TestCase):
+
+    def test_capture_stream(self, patch):
+        link = GNS3Project.from_name(TEST_PROJECT_NAME).links[0]
+        packets = [bytes(range(i, i + 60)) for i in range(5)]
+        stream = MockPcapStream(packets)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'capture.pcap')
+            with mock.patch('pygns3.GNS3API.stream_request', return_value=stream):
+                captured = list(link.capture_stream(tee=path))
+            with open(path, 'rb') as f:
+                self.assertEqual(f.read(), stream.data)
+
+        self.assertEqual([p.data for p in captured], packets)
+        self.assertEqual(captured[1].timestamp, 1500000001.25)
+        self.assertTrue(stream.closed)
+
+    def test_start_capture(self, patch):
+        link = GNS3Project.from_name(TEST_PROJECT_NAME).links[0]
+        started = dict(link._link, capturing=True, capture_file_name='capture.pcap')
+        response = mock.Mock(status_code=201, json=lambda: started)
+
+        with mock.patch('pygns3.GNS3API.post_request', return_value=response) as post:
+            link.start_capture('capture.pcap')
+
+        self.assertTrue(link.capturing)
+        self.assertEqual(json.loads(post.call_args[0][1])['capture_file_name'], 'capture.pcap')
+
+
+class MockArchiveStream:
+    def __init__(self, data):
+        self.data = data
+        self.ok = True
+        self.closed = False
+
+    def iter_content(self, chunk_size):
+        for i in range(0, len(self.data), chunk_size):
+            yield self.data[i:i + chunk_size]
+
+    def close(self):
+        self.closed = True
+
+
+@mock.patch('pygns3.GNS3API.get_request', side_effect=mocked_gns3api_get_request)
+class TestExportImport(unittest.TestCase):
+
+    archive = os.urandom(100000)
+
+    def test_export_streams_to_disk(self, patch):
+        project = GNS3Project.from_name(TEST_PROJECT_NAME)
+        stream = MockArchiveStream(self.archive)
+        progress = []
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'export.gns3project')
+            with mock.patch('pygns3.GNS3API.stream_request', return_value=stream) as request:
+                written = project.export(path, include_images=True, chunk_size=4096,
+                                         progress=lambda *args: progress.append(args))
+            with open(path, 'rb') as f:
+                self.assertEqual(f.read(), self.archive)
+
+        self.assertEqual(written, len(self.archive))
+        self.assertTrue(request.call_args[0][0].endswith('/export?include_images=1'))
+        self.assertEqual(len(progress), 25)
+        self.assertEqual(progress[-1][0], len(self.archive))
+        self.assertTrue(stream.closed)
+
+    def test_import_uploads_in_chunks(self, patch):
+        uploaded = []
+
+        def post_request(path, data):
+            for chunk in data:
+                uploaded.append(chunk)
+            project_id = path.split('/')[2]
+            settings = {'project_id': project_id, 'name': 'imported'}
+            mock_get[f'/projects/{project_id}'] = json.dumps(settings)
+            return mock.Mock(ok=True, json=lambda: settings)
+
+        with mock.patch('pygns3.GNS3API.post_request', side_effect=post_request) as post:
+            project = GNS3Project.import_project(io.BytesIO(self.archive), name='imported',
+                                                 chunk_size=8192)
+        del mock_get[f'/projects/{project.project_id}']
+
+        self.assertEqual(project.name, 'imported')
+        self.assertIn('/import?name=imported', post.call_args[0][0])
+        self.assertEqual(b''.join(uploaded), self.archive)
+        self.assertEqual(max(map(len, uploaded)), 8192)
+
+
+class TestExportAll(unittest.TestCase):
+
+    def setUp(self):
+        self.topologies = {}
+        self.exports = []
+        patches = [mock.patch('pygns3.GNS3API.get_request', side_effect=self.get_request),
+                   mock.patch('pygns3.GNS3API.stream_request', side_effect=self.stream_request)]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def get_request(self, path):
+        if '/files/' in path:
+            project_id = path.split('/')[2]
+            content = self.topologies.get(project_id, b'{"topology": {}}')
+            return mock.Mock(ok=True, content=content)
+        return mocked_gns3api_get_request(path)
+
+    def stream_request(self, path):
+        self.exports.append(path)
+        return MockArchiveStream(path.encode() * 1000)
+
+    def test_export_all(self):
+        controller = GNS3Controller()
+        with tempfile.TemporaryDirectory() as directory:
+            results = controller.export_all(directory, workers=2, compress='gzip')
+            self.assertEqual(sorted(r.status for r in results), ['exported', 'exported'])
+            with gzip.open(results[0].path) as f:
+                self.assertTrue(f.read().endswith(b'/export'))
+            self.assertEqual(len(self.exports), 2)
+
+            # Unchanged projects are skipped, changed ones exported again
+            project_id = controller.projects[0].project_id
+            self.topologies[project_id] = b'{"topology": {"nodes": []}}'
+            results = {r.project_id: r.status for r in controller.export_all(directory,
+                                                                             compress='gzip')}
+            self.assertEqual(results[project_id], 'exported')
+            self.assertEqual(list(results.values()).count('skipped'), 1)
+            self.assertEqual(len(self.exports), 3)
+
+            # Archives without images do not stand in for archives with images
+            results = controller.export_all(directory, compress='gzip', include_images=True)
+            self.assertEqual([r.status for r in results], ['exported', 'exported'])
+            self.assertTrue(self.exports[-1].endswith('/export?include_images=1'))
+            results = controller.export_all(directory, compress='gzip', include_images=True)
+            self.assertEqual([r.status for r in results], ['skipped', 'skipped'])
+
+            self.assertEqual(sorted(os.listdir(directory)),
+                             sorted([EXPORT_MANIFEST] +
+                                    [f'{p.name}.gns3project.gz' for p in controller.projects]))
+
+
+class TestStateCache(unittest.TestCase):
+
+    def setUp(self):
+        self.topologies = {}
+        patch = mock.patch('pygns3.GNS3API.get_request', side_effect=self.get_request)
+        self.get = patch.start()
+        self.addCleanup(patch.stop)
+
+    def get_request(self, path):
+        if '/files/' in path:
+            content = self.topologies.get(path.split('/')[2], b'{"topology": {}}')
+            return mock.Mock(ok=True, content=content)
+        return mocked_gns3api_get_request(path)
+
+    def requested(self):
+        paths = sorted(c[0][0] for c in self.get.call_args_list)
+        self.get.reset_mock()
+        return paths
+
+    def test_warm_start(self):
+        opened = GNS3Project.from_name(TEST_PROJECT_NAME)
+        self.get.reset_mock()
+        with tempfile.TemporaryDirectory() as directory:
+            cold = GNS3Controller(cache_dir=directory)
+            self.assertEqual(len(self.requested()), 17)
+
+            # Only the .gns3 files of the projects are fetched
+            warm = GNS3Controller(cache_dir=directory)
+            self.assertEqual([p for p in self.requested() if p.startswith('/projects/')],
+                             sorted(f'/projects/{p.project_id}/files/{p.filename}'
+                                    for p in cold.projects))
+            self.assertEqual([len(p.links) for p in warm.projects],
+                             [len(p.links) for p in cold.projects])
+            self.assertEqual(warm.projects[0].links[0].from_node.name,
+                             cold.projects[0].links[0].from_node.name)
+
+            # A changed topology invalidates that project only
+            self.topologies[opened.project_id] = b'{"topology": {"nodes": []}}'
+            GNS3Controller(cache_dir=directory)
+            self.assertEqual(len([p for p in self.requested() if p.startswith('/projects/')]), 7)
+
+    def test_closed_project_edited(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cold = GNS3Controller(cache_dir=directory)
+            closed = next(p for p in cold.projects if p.status == 'closed')
+            self.get.reset_mock()
+
+            # Opened, edited and closed again: the listing is the same, the .gns3 file is not
+            self.topologies[closed.project_id] = b'{"topology": {"nodes": [{}]}}'
+            GNS3Controller(cache_dir=directory)
+            self.assertIn(f'/projects/{closed.project_id}/nodes', self.requested())
@@ -0,0 +1,99 @@
+"""
+Tests for request deadlines and hedged GETs, against a local controller stand-in which stalls.
+"""
+import time
+import unittest
+from pygns3 import DeadlineExceeded, GNS3API, GNS3Project
+from pygns3.metrics import LatencyWindow, route_of
+from tools.benchmark.server import FakeController
+from tools.benchmark.synthetic import synthetic_project
+
+
+class TestDeadlines(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeController().start()
+        self.addCleanup(self.server.stop)
+        self.addCleanup(GNS3API.close)
+        self.server.configure()
+        self.project_id = self.server.add_project(synthetic_project(nodes=5, seed=1))
+
+    def test_project_load_budget(self):
+        self.server.stall(f'/projects/{self.project_id}/nodes', 2)
+        start = time.perf_counter()
+        with self.assertRaises(DeadlineExceeded):
+            GNS3Project(self.project_id, preload=True, timeout=0.3)
+        self.assertLess(time.perf_counter() - start, 1)
+
+        project = GNS3Project(self.project_id, preload=True, timeout=5)
+        self.assertEqual(len(project.nodes), 5)
+
+    def test_nested_deadlines(self):
+        self.assertIsNone(GNS3API.remaining())
+        with GNS3API.deadline(1):
+            with GNS3API.deadline(5):
+                self.assertLessEqual(GNS3API.remaining(), 1)
+            with GNS3API.deadline(None):
+                self.assertLessEqual(GNS3API.remaining(), 1)
+        self.assertIsNone(GNS3API.remaining())
+
+    def test_expired_deadline_sends_nothing(self):
+        with GNS3API.deadline(0):
+            with self.assertRaises(DeadlineExceeded):
+                GNS3API.get_request('/version')
+        self.assertEqual(sum(self.server.requests.values()), 0)
+
+
+class TestHedging(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeController(latency=0.005).start()
+        self.addCleanup(self.server.stop)
+        self.addCleanup(GNS3API.close)
+        self.server.configure()
+        GNS3API.hedge = True
+        GNS3API._latencies = LatencyWindow()
+
+    def tearDown(self):
+        GNS3API.hedge = False
+        GNS3API._latencies = LatencyWindow()
+
+    def test_stalled_get_is_hedged(self):
+        for _ in range(20):
+            GNS3API.get_request('/version')
+        hedged, wins = GNS3API.hedged_requests, GNS3API.hedge_wins
+
+        self.server.stall('/version', 2)
+        start = time.perf_counter()
+        response = GNS3API.get_request('/version')
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertEqual(response.json()['version'], '2.1.0')
+        self.assertEqual((GNS3API.hedged_requests - hedged, GNS3API.hedge_wins - wins), (1, 1))
+
+    def test_error_response_does_not_win(self):
+        for _ in range(20):
+            GNS3API.get_request('/version')
+        wins = GNS3API.hedge_wins
+
+        # The first request fails before the hedge answers
+        self.server.stall('/version', 0.2, status=500)
+        self.server.stall('/version', 0.4)
+        response = GNS3API.get_request('/version')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(GNS3API.hedge_wins - wins, 1)
+
+        # Both fail, the error response is returned
+        self.server.stall('/version', 0.2, count=2, status=503)
+        self.assertEqual(GNS3API.get_request('/version').status_code, 503)
+
+    def test_concurrent_gets_are_not_hedged(self):
+        self.server.latency = 0.05
+        paths = [f'/projects/{self.server.add_project(synthetic_project(nodes=1, seed=i))}'
+                 for i in range(40)]
+        # The controller answers well within the recent latencies, only the callers compete
+        for _ in range(20):
+            GNS3API._latencies.observe(route_of(paths[0]), 0.1)
+        hedged = GNS3API.hedged_requests
+        responses = GNS3API.get_requests(paths, max_workers=20)
+        self.assertTrue(all(r.ok for r in responses.values()))
+        self.assertEqual(GNS3API.hedged_requests - hedged, 0)
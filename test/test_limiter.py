@@ -0,0 +1,117 @@
+"""
+Tests for the adaptive concurrency limit of GNS3API.
+"""
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from pygns3 import AdaptiveLimiter, DeadlineExceeded, GNS3API, Metrics
+from tools.benchmark.server import FakeController
+from tools.benchmark.synthetic import synthetic_project
+
+
+def _load(limiter, seconds, count, ok=True):
+    """Send `count` samples with all slots in use"""
+    for _ in range(count):
+        for _ in range(limiter.limit):
+            limiter.acquire()
+        for _ in range(limiter.limit):
+            limiter.release(seconds, ok)
+
+
+class TestAdaptiveLimiter(unittest.TestCase):
+
+    def test_grows_while_latency_is_stable(self):
+        limiter = AdaptiveLimiter(initial_limit=4, max_limit=50)
+        _load(limiter, 0.01, 20)
+        self.assertGreater(limiter.limit, 4)
+        self.assertLessEqual(limiter.limit, 50)
+
+    def test_unused_limit_does_not_grow(self):
+        limiter = AdaptiveLimiter(initial_limit=10)
+        for _ in range(100):
+            limiter.acquire()
+            limiter.release(0.01)
+        self.assertEqual(limiter.limit, 10)
+
+    def test_shrinks_when_latency_rises(self):
+        limiter = AdaptiveLimiter(initial_limit=20, max_limit=40)
+        _load(limiter, 0.01, 20)
+        grown = limiter.limit
+        _load(limiter, 0.1, 1)
+        self.assertLess(limiter.limit, grown)
+
+    def test_shrinks_on_errors(self):
+        limiter = AdaptiveLimiter(initial_limit=20, min_limit=2)
+        _load(limiter, 0.01, 10, ok=False)
+        self.assertEqual(limiter.limit, 2)
+        self.assertGreater(limiter.stats()['errors'], 0)
+
+    def test_acquire_waits_for_a_slot(self):
+        limiter = AdaptiveLimiter(initial_limit=1)
+        self.assertTrue(limiter.acquire())
+        self.assertFalse(limiter.acquire(timeout=0.05))
+
+        waiter = threading.Thread(target=limiter.acquire)
+        waiter.start()
+        time.sleep(0.05)
+        self.assertEqual(limiter.stats()['queued'], 1)
+        limiter.release(0.01)
+        waiter.join(1)
+        self.assertFalse(waiter.is_alive())
+        self.assertEqual(limiter.stats(), dict(limiter.stats(), in_flight=1, queued=0))
+
+    def test_gauges(self):
+        metrics = Metrics()
+        AdaptiveLimiter(initial_limit=7).register(metrics)
+        self.assertEqual(metrics.snapshot()['gauges'],
+                         {'concurrency_limit': 7, 'concurrency_queued': 0})
+        self.assertIn('pygns3_concurrency_limit 7\n', metrics.prometheus())
+
+
+class PeakLimiter(AdaptiveLimiter):
+    """AdaptiveLimiter which remembers the most requests it had in flight"""
+
+    peak = 0
+
+    def acquire(self, timeout=None):
+        acquired = super().acquire(timeout)
+        with self._condition:
+            self.peak = max(self.peak, self.in_flight)
+        return acquired
+
+
+class TestLimitedRequests(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeController(latency=0.02).start()
+        self.addCleanup(self.server.stop)
+        self.addCleanup(GNS3API.close)
+        self.addCleanup(setattr, GNS3API, 'limiter', None)
+        self.server.configure()
+        self.project_id = self.server.add_project(synthetic_project(nodes=40, seed=2))
+
+    def test_concurrency_is_bounded(self):
+        GNS3API.limiter = PeakLimiter(initial_limit=4, max_limit=4)
+        nodes = GNS3API.get_request(f'/projects/{self.project_id}/nodes').json()
+        paths = [f'/projects/{self.project_id}/nodes/{n["node_id"]}' for n in nodes]
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            responses = list(executor.map(GNS3API.get_request, paths))
+        self.assertTrue(all(r.ok for r in responses))
+        self.assertEqual(GNS3API.limiter.peak, 4)
+        self.assertEqual(GNS3API.limiter.stats()['in_flight'], 0)
+
+    def test_client_errors_keep_the_limit(self):
+        GNS3API.limiter = AdaptiveLimiter(initial_limit=10)
+        for _ in range(5):
+            GNS3API.get_request(f'/projects/{self.project_id}/nodes/missing')
+        # 404 is the caller's mistake, not overload
+        self.assertEqual(GNS3API.limiter.limit, 10)
+
+    def test_waiting_respects_the_deadline(self):
+        GNS3API.limiter = AdaptiveLimiter(initial_limit=1)
+        GNS3API.limiter.acquire()
+        with GNS3API.deadline(0.05):
+            with self.assertRaises(DeadlineExceeded):
+                GNS3API.get_request('/version')
+        self.assertEqual(sum(self.server.requests.values()), 0)
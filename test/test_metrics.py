@@ -0,0 +1,123 @@
+"""
+Tests for the request metrics and traces of GNS3API.
+"""
+import json
+import time
+import unittest
+from unittest import mock
+import requests
+from pygns3 import GNS3API, GNS3Project, Metrics
+from pygns3.metrics import Histogram, route_of
+
+PROJECT_ID = '0fa1b2c3-d4e5-4f60-8a7b-9c8d7e6f5a4b'
+NODE_ID = '11111111-2222-4333-8444-555555555555'
+
+
+class MockSession:
+    """Answers GETs of a small project, everything else with a 404"""
+
+    def __init__(self):
+        path = f'/projects/{PROJECT_ID}'
+        self.bodies = {path: {'project_id': PROJECT_ID, 'name': 'traced'},
+                       f'{path}/drawings': [], f'{path}/links': [], f'{path}/snapshots': [],
+                       f'{path}/nodes': [{'project_id': PROJECT_ID, 'node_id': NODE_ID,
+                                          'name': 'R1', 'properties': {}, 'ports': []}]}
+
+    def request(self, method, url, **kwargs):
+        time.sleep(0.01)
+        path = url.split('/v2', 1)[-1]
+        response = requests.Response()
+        if method == 'GET' and path in self.bodies:
+            response.status_code = 200
+            response._content = json.dumps(self.bodies[path]).encode()
+        else:
+            response.status_code = 404
+            response._content = b'{"message": "not found"}'
+        return response
+
+
+class TestRoutes(unittest.TestCase):
+
+    def test_route_of(self):
+        self.assertEqual(route_of(f'/projects/{PROJECT_ID}/nodes'), '/projects/{project_id}/nodes')
+        self.assertEqual(route_of(f'/projects/{PROJECT_ID}/nodes/{NODE_ID}/start'),
+                         '/projects/{project_id}/nodes/{node_id}/start')
+        self.assertEqual(route_of('/computes/local/qemu/images'),
+                         '/computes/{compute_id}/qemu/images')
+        self.assertEqual(route_of(f'/projects/{PROJECT_ID}/files/configs/r1.cfg'),
+                         '/projects/{project_id}/files/{path}')
+        self.assertEqual(route_of(f'/projects/{PROJECT_ID}/export?include_images=1'),
+                         '/projects/{project_id}/export')
+        self.assertEqual(route_of('/projects/load'), '/projects/load')
+
+    def test_histogram(self):
+        histogram = Histogram((0.1, 1.0))
+        for value in (0.05, 0.05, 0.5, 5.0):
+            histogram.observe(value)
+        self.assertEqual(histogram.counts, [2, 1, 1])
+        self.assertEqual(histogram.quantile(0.5), 0.1)
+        self.assertEqual(histogram.quantile(0.75), 1.0)
+        self.assertEqual(histogram.quantile(1), float('inf'))
+
+
+class TestGNS3APIMetrics(unittest.TestCase):
+
+    def setUp(self):
+        GNS3API.base = 'http://gns3.test/v2'
+        patch = mock.patch('pygns3.GNS3API.get_session', return_value=MockSession())
+        patch.start()
+        self.addCleanup(patch.stop)
+        GNS3API.metrics = Metrics()
+
+    def tearDown(self):
+        GNS3API.metrics = None
+
+    def test_counters_and_hooks(self):
+        records = []
+        GNS3API.metrics.add_hook(records.append)
+        GNS3Project(PROJECT_ID, preload=True)
+        GNS3API.post_request(f'/projects/{PROJECT_ID}/nodes/{NODE_ID}/start', {'a': 'b'})
+
+        snapshot = GNS3API.metrics.snapshot()
+        self.assertEqual(snapshot['requests'], 6)
+        self.assertEqual(snapshot['errors'], {404: 1})
+        self.assertEqual(snapshot['in_flight'], 0)
+        nodes = snapshot['routes']['GET /projects/{project_id}/nodes']
+        self.assertEqual(nodes['requests'], 1)
+        self.assertGreaterEqual(nodes['seconds'], 0.01)
+        self.assertGreater(nodes['bytes_received'], 0)
+        start = snapshot['routes']['POST /projects/{project_id}/nodes/{node_id}/start']
+        self.assertEqual(start['bytes_sent'], 3)
+        self.assertEqual(len(records), 6)
+
+        text = GNS3API.metrics.prometheus()
+        self.assertIn('pygns3_request_duration_seconds_count{method="GET",'
+                      'route="/projects/{project_id}/nodes"} 1', text)
+        self.assertIn('pygns3_request_errors_total{status="404"} 1', text)
+
+    def test_in_flight_gauge(self):
+        seen = []
+        session = MockSession()
+        request = session.request
+
+        def observing_request(method, url, **kwargs):
+            seen.append(GNS3API.metrics.in_flight_total)
+            return request(method, url, **kwargs)
+
+        session.request = observing_request
+        with mock.patch('pygns3.GNS3API.get_session', return_value=session):
+            GNS3API.get_request(f'/projects/{PROJECT_ID}')
+        self.assertEqual(seen, [1])
+        self.assertEqual(GNS3API.metrics.in_flight_total, 0)
+
+    def test_trace_project_load(self):
+        GNS3API.metrics = None
+        with GNS3API.trace() as trace:
+            GNS3Project(PROJECT_ID, preload=True)
+        GNS3API.get_request(f'/projects/{PROJECT_ID}')
+
+        self.assertEqual(len(trace.records), 5)
+        self.assertEqual(GNS3API.traces, [])
+        self.assertEqual(trace.by_route()['GET /projects/{project_id}/nodes'][0], 1)
+        self.assertEqual(len(trace.slowest(2)), 2)
+        self.assertIn('5 requests', str(trace))
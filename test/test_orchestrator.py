@@ -0,0 +1,136 @@
+"""
+Tests for the NodeOrchestrator, against a mocked controller where nodes take a while to boot.
+"""
+import threading
+import time
+import unittest
+from unittest import mock
+from pygns3.controller import GNS3Node, GNS3Project, GNS3ProjectListener
+from pygns3.orchestrator import NodeOrchestrator
+
+PROJECT_ID = 'c3f0e6a1-0000-4000-8000-000000000000'
+BOOT = 0.05
+
+
+class MockResponse:
+    def __init__(self, json_data, status_code=200):
+        self.json_data = json_data
+        self.status_code = status_code
+        self.ok = status_code < 400
+
+    def json(self):
+        return self.json_data
+
+
+class MockController:
+    """Nodes reach their new status BOOT seconds after the request, like booting VMs"""
+
+    statuses = {'start': 'started', 'reload': 'started', 'stop': 'stopped',
+                'suspend': 'suspended'}
+
+    def __init__(self, names, fail_nodes=(), listener=None):
+        self.fail_nodes = fail_nodes
+        self.listener = listener
+        self.nodes = {f'node-{name}': {'project_id': PROJECT_ID, 'node_id': f'node-{name}',
+                                       'name': name, 'status': 'stopped', 'properties': {},
+                                       'ports': []}
+                      for name in names}
+        self.order = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def post_request(self, path, data):
+        node_id, action = path.split('/')[-2:]
+        node = self.nodes[node_id]
+        if node['name'] in self.fail_nodes:
+            return MockResponse({'message': 'Compute not available'}, 409)
+        with self.lock:
+            self.order.append(node['name'])
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        threading.Timer(BOOT, self.boot, (node_id, self.statuses[action])).start()
+        return MockResponse(dict(node), 201)
+
+    def boot(self, node_id, status):
+        with self.lock:
+            self.in_flight -= 1
+            self.nodes[node_id] = dict(self.nodes[node_id], status=status)
+        if self.listener is not None:
+            self.listener.apply({'action': 'node.updated', 'event': self.nodes[node_id]})
+
+    def get_request(self, path):
+        return MockResponse(dict(self.nodes[path.rsplit('/', 1)[-1]]))
+
+
+class TestNodeOrchestrator(unittest.TestCase):
+
+    def setUp(self):
+        self.project = GNS3Project.from_settings({'project_id': PROJECT_ID, 'name': 'lab'})
+
+    def run_with(self, controller, action, **kwargs):
+        self.project.nodes = [GNS3Node(n) for n in controller.nodes.values()]
+        with mock.patch('pygns3.GNS3API.post_request', side_effect=controller.post_request), \
+                mock.patch('pygns3.GNS3API.get_request', side_effect=controller.get_request):
+            orchestrator = NodeOrchestrator(self.project, max_workers=4, timeout=2,
+                                            poll_interval=0.01)
+            return orchestrator.run(action, **kwargs)
+
+    def test_start_bounded_and_wait_for_status(self):
+        controller = MockController([f'PC{i}' for i in range(12)])
+        report = self.run_with(controller, 'start')
+
+        self.assertTrue(report.ready)
+        self.assertEqual(len(report.results), 12)
+        self.assertEqual({r.status for r in report.results}, {'started'})
+        self.assertEqual(controller.max_in_flight, 4)
+        self.assertEqual({n.status for n in self.project.nodes}, {'started'})
+        stats = report.stats()
+        self.assertEqual(stats['count'], 12)
+        self.assertGreaterEqual(stats['min'], BOOT)
+        self.assertIn('12 nodes started', str(report))
+
+    def test_dependency_order(self):
+        controller = MockController(['web', 'db', 'switch', 'pc'])
+        depends_on = {'web': ['db'], 'db': ['switch']}
+        report = self.run_with(controller, 'start', depends_on=depends_on)
+        self.assertTrue(report.ready)
+        order = controller.order
+        self.assertLess(order.index('switch'), order.index('db'))
+        self.assertLess(order.index('db'), order.index('web'))
+
+        controller.order = []
+        report = self.run_with(controller, 'stop', depends_on=depends_on)
+        self.assertTrue(report.ready)
+        order = controller.order
+        self.assertLess(order.index('web'), order.index('db'))
+        self.assertLess(order.index('db'), order.index('switch'))
+
+    def test_failed_dependency_skips_dependents(self):
+        controller = MockController(['web', 'db', 'switch'], fail_nodes=('db',))
+        report = self.run_with(controller, 'start',
+                               depends_on={'web': ['db'], 'db': ['switch']})
+
+        self.assertFalse(report.ready)
+        self.assertEqual(sorted(r.name for r in report.errors), ['db', 'web'])
+        self.assertNotIn('web', controller.order)
+
+    def test_invalid_dependencies(self):
+        controller = MockController(['a', 'b'])
+        with self.assertRaises(ValueError):
+            self.run_with(controller, 'start', depends_on={'a': ['b'], 'b': ['a']})
+        with self.assertRaises(ValueError):
+            self.run_with(controller, 'start', depends_on={'a': ['c']})
+
+    def test_wait_through_notifications(self):
+        listener = GNS3ProjectListener(self.project)
+        listener.connected.set()
+        self.project.listener = listener
+        controller = MockController(['R1', 'R2'], listener=listener)
+        with mock.patch.object(GNS3Node, 'refresh') as refresh:
+            start = time.perf_counter()
+            report = self.run_with(controller, 'start', nodes=['R1', 'R2'])
+
+        self.assertTrue(report.ready)
+        self.assertLess(time.perf_counter() - start, 1)
+        refresh.assert_not_called()
@@ -0,0 +1,106 @@
+"""
+Tests for the TopologyBuilder, against a mocked POST which creates objects after a fixed delay.
+"""
+import json
+import threading
+import time
+import unittest
+import uuid
+from unittest import mock
+from pygns3.controller import GNS3Project
+from pygns3.topology import TopologyBuilder
+
+PROJECT_ID = 'b7e9d5c6-0000-4000-8000-000000000000'
+DELAY = 0.02
+
+
+class MockCreatedResponse:
+    def __init__(self, json_data, status_code=201):
+        self.json_data = json_data
+        self.status_code = status_code
+        self.ok = status_code < 400
+
+    def json(self):
+        return self.json_data
+
+
+class MockController:
+    """Creates nodes, links and drawings like the controller does and records the requests"""
+
+    def __init__(self, fail_nodes=()):
+        self.fail_nodes = fail_nodes
+        self.nodes = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def post_request(self, path, data):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(DELAY)
+        with self.lock:
+            self.in_flight -= 1
+        data = json.loads(data)
+        collection = path.rsplit('/', 1)[-1]
+
+        if collection == 'nodes':
+            if data['name'] in self.fail_nodes:
+                return MockCreatedResponse({'message': 'Compute not available'}, 409)
+            node = dict(data, project_id=PROJECT_ID, node_id=str(uuid.uuid4()),
+                        properties=data.get('properties', {}),
+                        ports=[{'adapter_number': a, 'port_number': 0, 'short_name': f'e{a}',
+                                'name': f'Ethernet{a}'} for a in range(2)])
+            self.nodes[node['node_id']] = node
+            return MockCreatedResponse(node)
+        if collection == 'links':
+            for endpoint in data['nodes']:
+                assert endpoint['node_id'] in self.nodes
+            return MockCreatedResponse(dict(data, project_id=PROJECT_ID,
+                                            link_id=str(uuid.uuid4())))
+        return MockCreatedResponse(dict(data, project_id=PROJECT_ID, drawing_id=str(uuid.uuid4())))
+
+
+class TestTopologyBuilder(unittest.TestCase):
+
+    def setUp(self):
+        self.project = GNS3Project.from_settings({'project_id': PROJECT_ID, 'name': 'lab'})
+
+    def chain(self, count, **kwargs):
+        return TopologyBuilder.from_dict(self.project, {
+            'nodes': [{'name': f'PC{i}', 'node_type': 'vpcs'} for i in range(count)],
+            'links': [[f'PC{i}', 'e1', f'PC{i + 1}', [0, 0]] for i in range(count - 1)],
+            'drawings': [{'svg': '<svg></svg>', 'x': 10}],
+        }, **kwargs)
+
+    def test_build_concurrently(self):
+        controller = MockController()
+        with mock.patch('pygns3.GNS3API.post_request', side_effect=controller.post_request):
+            report = self.chain(60, max_workers=20).build()
+
+        self.assertEqual(report.errors, [])
+        self.assertEqual(len(report.created('node')), 60)
+        self.assertEqual(len(report.created('link')), 59)
+        self.assertEqual(len(report.created('drawing')), 1)
+        self.assertEqual(controller.max_in_flight, 20)
+        # 120 requests of DELAY each, serially this would take 2.4s
+        self.assertLess(report.elapsed, 40 * DELAY)
+
+        link = report.created('link')[0]
+        self.assertEqual((link.from_port_name, link.to_port_name), ('e1', 'e0'))
+        self.assertIn('nodes', str(report))
+
+    def test_failed_nodes_fail_their_links(self):
+        controller = MockController(fail_nodes=('PC1',))
+        with mock.patch('pygns3.GNS3API.post_request', side_effect=controller.post_request):
+            report = self.chain(4, max_workers=4).build()
+
+        failed = sorted(r.name for r in report.errors)
+        self.assertEqual(failed, ['PC0 e1 - PC1 (0, 0)', 'PC1', 'PC1 e1 - PC2 (0, 0)'])
+        self.assertEqual(len(report.created('link')), 1)
+
+    def test_unknown_node(self):
+        builder = TopologyBuilder(self.project)
+        builder.add_node('R1', 'vpcs')
+        with self.assertRaises(ValueError):
+            builder.add_link('R1', 'e0', 'R2', 'e0')
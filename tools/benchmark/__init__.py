@@ -0,0 +1,6 @@
+"""
+Offline benchmarks for pygns3, against a local stand-in for the GNS3 controller.
+
+    python -m tools.benchmark.run --help
+    python -m tools.benchmark.codec --help
+"""
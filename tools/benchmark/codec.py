@@ -0,0 +1,51 @@
+"""
+Micro-benchmark of the JSON codecs available to GNS3API, e.g.
+
+    python -m tools.benchmark.codec --nodes 5000 --repeat 20
+
+Decodes and encodes the node listing of a synthetic project, as returned by
+/projects/{project_id}/nodes, with every codec which is installed. Decoding starts from the
+response bytes, like GNS3Response.json() does.
+"""
+import argparse
+import json
+
+from pygns3.codec import available, get_codec
+
+from .run import measure
+from .synthetic import synthetic_project
+
+
+def run(nodes=1000, repeat=10, seed=0):
+    """Return {codec: {'decode': timings, 'encode': timings, 'bytes': size}} per codec"""
+    listing = synthetic_project(nodes=nodes, seed=seed)['nodes']
+    content = json.dumps(listing).encode('utf-8')
+    results = {}
+    for name in available():
+        codec = get_codec(name)
+        decode, decoded = measure(lambda: codec.loads(content), repeat)
+        encode, _ = measure(lambda: codec.dumps(listing), repeat)
+        assert decoded == listing
+        results[name] = {'decode': decode, 'encode': encode, 'bytes': len(content)}
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--nodes', type=int, default=1000, help='nodes in the listing')
+    parser.add_argument('--repeat', type=int, default=10, help='runs per measurement')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the synthetic project')
+    args = parser.parse_args(argv)
+
+    results = run(args.nodes, args.repeat, args.seed)
+    baseline = results['json']
+    for name, result in results.items():
+        print(f'{name:8} {result["bytes"] / 1024:.0f} KiB  '
+              f'decode {result["decode"]["median"] * 1000:8.2f}ms '
+              f'({baseline["decode"]["median"] / result["decode"]["median"]:.1f}x)  '
+              f'encode {result["encode"]["median"] * 1000:8.2f}ms '
+              f'({baseline["encode"]["median"] / result["encode"]["median"]:.1f}x)')
+
+
+if __name__ == '__main__':
+    main()
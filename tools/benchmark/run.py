@@ -0,0 +1,181 @@
+"""
+Benchmark the hot paths of pygns3 against a local FakeController, e.g.
+
+    python -m tools.benchmark.run --projects 5 --nodes 500 --links 700 --latency 0.002
+
+Measures loading the controller, loading a project, building a topology and exporting all
+projects. Each result is appended as a JSON line to --output, and compared with the previous
+run with the same parameters: benchmarks whose median got slower by more than --threshold are
+reported as regressions, and make the script exit with status 1.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from pygns3 import GNS3API, GNS3Controller, GNS3Project, TopologyBuilder
+
+from .server import FakeController
+from .synthetic import synthetic_project
+
+# In the working directory rather than the source tree, see .gitignore
+DEFAULT_OUTPUT = 'benchmark-results.jsonl'
+
+
+def measure(function, repeat):
+    """Call `function` `repeat` times, returns (min, median, max) seconds and its last result"""
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - start)
+    return {'min': min(timings), 'median': statistics.median(timings), 'max': max(timings)}, result
+
+
+def peak_memory(function):
+    """Call `function` once, returns the peak of the memory it allocated in bytes"""
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run(args):
+    """Run all benchmarks, returns {benchmark: {'min': .., 'median': .., 'max': .., ...}}"""
+    results = {}
+    with FakeController(latency=args.latency, jitter=args.jitter,
+                        export_size=args.export_size) as server:
+        project_ids = [server.add_project(synthetic_project(
+            args.nodes, args.links, args.ports, args.drawings, f'bench-{i}', args.seed + i,
+            args.snapshots)) for i in range(args.projects)]
+        server.configure()
+        GNS3API.configure_pool(pool_maxsize=args.workers)
+
+        results['controller'], _ = measure(lambda: GNS3Controller(args.workers), args.repeat)
+        results['controller_preload'], _ = measure(
+            lambda: GNS3Controller(args.workers, preload=True), args.repeat)
+        results['project_load'], _ = measure(
+            lambda: GNS3Project(project_ids[0], args.workers, preload=True), args.repeat)
+
+        # Node listing buffered as a whole versus parsed while it is being received. The peak
+        # includes the body built by the in-process server, which is the same for both.
+        project = GNS3Project(project_ids[0])
+        listings = {'nodes_list': lambda: len(project._load_nodes()),
+                    'nodes_stream': lambda: sum(1 for _ in project.iter_nodes())}
+        for name, function in listings.items():
+            results[name], _ = measure(function, args.repeat)
+            results[name]['peak_bytes'] = peak_memory(function)
+
+        def build():
+            project = GNS3Project.create(f'build-{time.perf_counter()}')
+            builder = TopologyBuilder.from_dict(project, {
+                'nodes': [{'name': f'VM{i}', 'node_type': 'qemu'} for i in range(args.build)],
+                'links': [[f'VM{i}', 'e1', f'VM{i + 1}', 'e0'] for i in range(args.build - 1)],
+            }, max_workers=args.workers)
+            report = builder.build()
+            if report.errors:
+                raise RuntimeError(f'Topology build failed: {report.errors[0].error}')
+            server.projects.pop(project.project_id)
+            return report
+        results['topology_build'], _ = measure(build, args.repeat)
+        results['topology_build']['objects'] = 2 * args.build - 1
+
+        controller = GNS3Controller(args.workers)
+        with tempfile.TemporaryDirectory() as dest_dir:
+            results['export_all'], exported = measure(
+                lambda: controller.export_all(dest_dir, workers=args.workers, force=True),
+                args.repeat)
+        size = sum(r.size for r in exported)
+        results['export_all']['bytes_per_second'] = size / results['export_all']['median']
+        results['requests'] = sum(server.requests.values())
+        GNS3API.close()
+    return results
+
+
+def compare(previous, current, threshold):
+    """Return the benchmarks whose median is more than `threshold` (a fraction) slower"""
+    regressions = []
+    for name, result in current.items():
+        before = previous.get(name)
+        if isinstance(result, dict) and isinstance(before, dict) and before.get('median'):
+            ratio = result['median'] / before['median']
+            if ratio > 1 + threshold:
+                regressions.append((name, before['median'], result['median'], ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('--projects', type=int, default=3, help='number of projects')
+    parser.add_argument('--nodes', type=int, default=200, help='nodes per project')
+    parser.add_argument('--links', type=int, default=None, help='links per project')
+    parser.add_argument('--ports', type=int, default=None,
+                        help='ports per node, by default those of the node type')
+    parser.add_argument('--drawings', type=int, default=10, help='drawings per project')
+    parser.add_argument('--snapshots', type=int, default=2, help='snapshots per project')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the synthetic projects')
+    parser.add_argument('--build', type=int, default=50, help='nodes in the built topology')
+    parser.add_argument('--export-size', type=int, default=4 * 1024 * 1024,
+                        help='size in bytes of an exported project')
+    parser.add_argument('--latency', type=float, default=0.002, help='seconds per request')
+    parser.add_argument('--jitter', type=float, default=0.0, help='extra random latency')
+    parser.add_argument('--workers', type=int, default=10, help='concurrent requests')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per benchmark')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help='JSON lines file of results')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='slowdown of the median reported as regression (0.2 = 20%%)')
+    args = parser.parse_args(argv)
+
+    parameters = {k: v for k, v in vars(args).items() if k not in ('output', 'threshold')}
+    record = {'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'commit': _git_commit(),
+              'python': platform.python_version(), 'parameters': parameters,
+              'results': run(args)}
+
+    previous = None
+    if os.path.exists(args.output):
+        with open(args.output) as f:
+            for line in f:
+                entry = json.loads(line)
+                if entry['parameters'] == parameters:
+                    previous = entry
+    with open(args.output, 'a') as f:
+        f.write(json.dumps(record) + '\n')
+
+    for name, result in record['results'].items():
+        if isinstance(result, dict):
+            extra = '  '.join(f'{k} {v:.0f}' for k, v in result.items()
+                              if k not in ('min', 'median', 'max'))
+            print(f'{name:20} min {result["min"]:8.4f}s  median {result["median"]:8.4f}s  '
+                  f'max {result["max"]:8.4f}s  {extra}')
+        else:
+            print(f'{name:20} {result}')
+
+    if previous is not None:
+        regressions = compare(previous['results'], record['results'], args.threshold)
+        for name, before, after, ratio in regressions:
+            print(f'REGRESSION {name}: median {before:.4f}s -> {after:.4f}s ({ratio:.2f}x) '
+                  f'since {previous["commit"] or previous["time"]}')
+        if regressions:
+            return 1
+    return 0
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,324 @@
+"""
+Local stand-in for a GNS3 controller, serving the v2 API routes pygns3 uses from memory.
+
+    >>> with FakeController(latency=0.005) as server:
+    ...     server.add_project(synthetic_project(nodes=500, links=700))
+    ...     server.configure()
+    ...     controller = GNS3Controller(preload=True)
+
+Every request is delayed by `latency` plus up to `jitter` seconds to mimic a remote controller.
+Nodes, links and drawings can be created and deleted, nodes started and stopped, files written,
+and projects imported and exported (as `export_size` bytes of filler), so all wrapper classes
+can be exercised over HTTP. Compressed request bodies are accepted, and with `compress` set
+responses are gzip compressed for clients which accept it.
+"""
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from pygns3 import GNS3API
+from pygns3.compression import compress, decompress
+
+from .synthetic import synthetic_link, synthetic_node
+
+_PROJECT = r'/projects/(?P<project_id>[^/]+)'
+_COLLECTION = _PROJECT + r'/(?P<collection>drawings|links|nodes|snapshots)'
+
+# (method, path regex, handler method) in the order they are matched
+ROUTES = [
+    ('GET', r'/version', '_version'),
+    ('GET', r'/computes', '_computes'),
+    ('GET', r'/computes/(?P<compute_id>[^/]+)', '_compute'),
+    ('GET', r'/projects', '_projects'),
+    ('POST', r'/projects', '_create_project'),
+    ('GET', _PROJECT, '_project'),
+    ('DELETE', _PROJECT, '_delete_project'),
+    ('POST', _PROJECT + r'/(?P<action>open|close)', '_project_action'),
+    ('GET', _PROJECT + r'/export', '_export'),
+    ('POST', _PROJECT + r'/import', '_import'),
+    ('GET', _PROJECT + r'/files/(?P<file>.+)', '_file'),
+    ('POST', _PROJECT + r'/files/(?P<file>.+)', '_write_file'),
+    ('POST', _PROJECT + r'/nodes/(?P<action>start|stop|suspend|reload)', '_nodes_action'),
+    ('POST', _PROJECT + r'/nodes/(?P<node_id>[^/]+)/(?P<action>start|stop|suspend|reload)',
+     '_node_action'),
+    ('GET', _COLLECTION, '_collection'),
+    ('POST', _COLLECTION, '_create'),
+    ('GET', _COLLECTION + r'/(?P<object_id>[^/]+)', '_object'),
+    ('DELETE', _COLLECTION + r'/(?P<object_id>[^/]+)', '_delete'),
+]
+
+_ID_KEYS = {'drawings': 'drawing_id', 'links': 'link_id', 'nodes': 'node_id',
+            'snapshots': 'snapshot_id'}
+_STATUSES = {'start': 'started', 'reload': 'started', 'stop': 'stopped', 'suspend': 'suspended'}
+
+
+class FakeController:
+    """
+    In-memory GNS3 controller on `host`:`port` (a free port by default), started with start() or
+    by using it as a context manager. `requests` counts the requests served per method and route,
+    `received` the request body bytes as they came over the wire and `files` holds the files
+    written (and imported archives) per (project_id, name).
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, export_size=1024 * 1024, host='127.0.0.1',
+                 port=0, compress=False):
+        self.latency = latency
+        self.jitter = jitter
+        self.export_size = export_size
+        self.compress = compress
+        self.received = 0
+        self.files = {}
+        self.host = host
+        self.port = port
+        self.projects = {}
+        self.computes = [{'compute_id': 'local', 'name': 'local', 'connected': True,
+                          'host': '127.0.0.1', 'port': 3080, 'protocol': 'http', 'user': None,
+                          'cpu_usage_percent': 1.0, 'memory_usage_percent': 10.0,
+                          'capabilities': {'node_types': ['vpcs', 'ethernet_switch', 'qemu'],
+                                           'platform': 'linux', 'version': '2.1.0'}}]
+        self.requests = Counter()
+        self.stalls = {}
+        self.routes = [(method, re.compile(regex), handler) for method, regex, handler in ROUTES]
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    @property
+    def base(self):
+        """Base URL of the API, for GNS3API.base"""
+        return f'http://{self.host}:{self.port}/v2'
+
+    def start(self):
+        """Start serving in a background thread"""
+        self._server = ThreadingHTTPServer((self.host, self.port), _handler(self))
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and close the listening socket"""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def configure(self):
+        """Point GNS3API at this controller"""
+        GNS3API.protocol, GNS3API.host, GNS3API.port = 'http', self.host, self.port
+        GNS3API.base = self.base
+        GNS3API.cred = None
+        GNS3API.close()
+
+    def add_project(self, project):
+        """
+        Add a project given as {'project': settings, 'nodes': [...], 'links': [...], ...}, see
+        synthetic_project(). Returns the project id.
+        """
+        project_id = project['project']['project_id']
+        with self._lock:
+            self.projects[project_id] = {
+                'project': dict(project['project']),
+                **{c: {o[k]: o for o in project.get(c, [])} for c, k in _ID_KEYS.items()}}
+        return project_id
+
+    def stall(self, path, seconds, count=1, status=None):
+        """
+        Delay the next `count` requests to `path` by an extra `seconds`, like a stuck call, and
+        answer them with an error of `status` if given
+        """
+        with self._lock:
+            self.stalls.setdefault(path, []).extend([(seconds, status)] * count)
+
+    def handle(self, method, path, body):
+        """Return (status, payload) for a request, payload is json-able or bytes"""
+        delay = self.latency + (random.uniform(0, self.jitter) if self.jitter else 0)
+        status = None
+        with self._lock:
+            if self.stalls.get(path):
+                seconds, status = self.stalls[path].pop(0)
+                delay += seconds
+        if delay:
+            time.sleep(delay)
+        if status is not None:
+            return status, {'message': f'Stalled {method} {path}', 'status': status}
+        for route_method, regex, handler in self.routes:
+            match = regex.fullmatch(path)
+            if match and route_method == method:
+                self.requests[f'{method} {regex.pattern}'] += 1
+                try:
+                    with self._lock:
+                        return getattr(self, handler)(body=body, **match.groupdict())
+                except KeyError as e:
+                    return 404, {'message': f'{e} not found', 'status': 404}
+        return 404, {'message': f'No route for {method} {path}', 'status': 404}
+
+    def _version(self, body):
+        return 200, {'local': True, 'version': '2.1.0'}
+
+    def _computes(self, body):
+        return 200, self.computes
+
+    def _compute(self, body, compute_id):
+        return 200, next(c for c in self.computes if c['compute_id'] == compute_id)
+
+    def _projects(self, body):
+        return 200, [p['project'] for p in self.projects.values()]
+
+    def _create_project(self, body):
+        project_id = body.get('project_id') or str(uuid.uuid4())
+        settings = dict(body, project_id=project_id, status='opened',
+                        filename=f'{body["name"]}.gns3')
+        self.projects[project_id] = {'project': settings, **{c: {} for c in _ID_KEYS}}
+        return 201, settings
+
+    def _project(self, body, project_id):
+        return 200, self.projects[project_id]['project']
+
+    def _delete_project(self, body, project_id):
+        del self.projects[project_id]
+        return 204, None
+
+    def _project_action(self, body, project_id, action):
+        project = self.projects[project_id]['project']
+        project['status'] = 'opened' if action == 'open' else 'closed'
+        return 201, project
+
+    def _export(self, body, project_id):
+        if project_id not in self.projects:
+            raise KeyError(project_id)
+        return 200, bytes(self.export_size)
+
+    def _import(self, body, project_id):
+        name = f'imported-{project_id[:8]}'
+        self.files[(project_id, f'{name}.gns3project')] = body
+        return self._create_project({'name': name, 'project_id': project_id})
+
+    def _file(self, body, project_id, file):
+        if (project_id, file) in self.files:
+            return 200, self.files[(project_id, file)]
+        return 200, json.dumps(self.projects[project_id]['project']).encode()
+
+    def _write_file(self, body, project_id, file):
+        if project_id not in self.projects:
+            raise KeyError(project_id)
+        if not isinstance(body, bytes):
+            body = json.dumps(body).encode()
+        self.files[(project_id, file)] = body
+        return 200, None
+
+    def _nodes_action(self, body, project_id, action):
+        for node in self.projects[project_id]['nodes'].values():
+            node['status'] = _STATUSES[action]
+        return 204, None
+
+    def _node_action(self, body, project_id, node_id, action):
+        node = self.projects[project_id]['nodes'][node_id]
+        node['status'] = _STATUSES[action]
+        return 201, node
+
+    def _collection(self, body, project_id, collection):
+        return 200, list(self.projects[project_id][collection].values())
+
+    def _create(self, body, project_id, collection):
+        project = self.projects[project_id]
+        if collection == 'nodes':
+            data = dict(body)
+            name, node_type = data.pop('name'), data.pop('node_type')
+            obj = synthetic_node(project_id, name, node_type, **data)
+        elif collection == 'links':
+            ends = [(project['nodes'][n['node_id']], n) for n in body['nodes']]
+            ports = [next(p for p in node['ports'] if p['adapter_number'] == n['adapter_number']
+                          and p['port_number'] == n['port_number'])
+                     for node, n in ends]
+            obj = synthetic_link(project_id, ends[0][0], ports[0], ends[1][0], ports[1])
+        else:
+            obj = dict(body, project_id=project_id, drawing_id=str(uuid.uuid4()))
+        project[collection][obj[_ID_KEYS[collection]]] = obj
+        return 201, obj
+
+    def _object(self, body, project_id, collection, object_id):
+        return 200, self.projects[project_id][collection][object_id]
+
+    def _delete(self, body, project_id, collection, object_id):
+        del self.projects[project_id][collection][object_id]
+        return 204, None
+
+
+def _handler(controller):
+    """Request handler class bound to `controller`"""
+
+    class Handler(BaseHTTPRequestHandler):
+        # Keep-alive, like the real controller
+        protocol_version = 'HTTP/1.1'
+        # Headers and body are written separately, Nagle would hold the body for a delayed ACK
+        disable_nagle_algorithm = True
+
+        def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+            pass
+
+        def dispatch(self):
+            url = urlsplit(self.path)
+            length = int(self.headers.get('Content-Length') or 0)
+            if self.headers.get('Transfer-Encoding') == 'chunked':
+                raw = self._read_chunked()
+            else:
+                raw = self.rfile.read(length)
+            with controller._lock:
+                controller.received += len(raw)
+            encoding = self.headers.get('Content-Encoding')
+            if encoding:
+                raw = b''.join(decompress([raw], encoding))
+            # Bodies of file writes and imports are passed on as bytes
+            try:
+                body = json.loads(raw) if raw else {}
+            except ValueError:
+                body = raw
+            status, payload = controller.handle(self.command, url.path[len('/v2'):], body)
+
+            if isinstance(payload, bytes):
+                data, content_type = payload, 'application/octet-stream'
+            else:
+                data = b'' if payload is None else json.dumps(payload).encode()
+                content_type = 'application/json'
+            gzip = controller.compress and 'gzip' in self.headers.get('Accept-Encoding', '')
+            if gzip:
+                data = b''.join(compress([data], 'gzip', 1))
+            try:
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                if gzip:
+                    self.send_header('Content-Encoding', 'gzip')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                for offset in range(0, len(data), 64 * 1024):
+                    self.wfile.write(data[offset:offset + 64 * 1024])
+            except (BrokenPipeError, ConnectionResetError):
+                # The client gave up, e.g. timed out on a stalled request
+                self.close_connection = True
+
+        def _read_chunked(self):
+            chunks = []
+            while True:
+                size = int(self.rfile.readline().strip(), 16)
+                chunk = self.rfile.read(size + 2)[:size]
+                if not size:
+                    return b''.join(chunks)
+                chunks.append(chunk)
+
+        do_GET = do_POST = do_PUT = do_DELETE = dispatch
+
+    return Handler
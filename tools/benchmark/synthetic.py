@@ -0,0 +1,258 @@
+"""
+Synthetic GNS3 projects of configurable size, in the JSON format of the controller API.
+
+Projects mix node types (VPCS, Dynamips and QEMU routers, Docker containers, Ethernet switches)
+with their own port layouts and properties, wired with links on valid adapter/port numbers.
+Generation is reproducible: the same seed yields the same project, ids included.
+
+    >>> project = synthetic_project(nodes=10000, links=15000, drawings=50, snapshots=5, seed=1)
+    >>> server.add_project(project)                 # FakeController
+    >>> responses = mock_responses(project)         # {path: json} like test/mock_api.py
+
+or from the command line:
+
+    python -m tools.benchmark.synthetic --nodes 10000 --seed 1 --mock > responses.json
+"""
+import argparse
+import json
+import random
+import sys
+import uuid
+
+# Per node type: relative weight in mixed projects, symbol, port names, port layout as
+# (adapters, ports per adapter) and a function returning the properties for (rng, name, index)
+NODE_TYPES = {
+    'vpcs': {
+        'weight': 4, 'symbol': ':/symbols/vpcs_guest.svg', 'name': 'PC{i}',
+        'port_names': ('Ethernet{a}', 'e{a}'), 'layout': (1, 1),
+        'properties': lambda rng, name, i: {
+            'startup_script': f'set pcname {name}\nip 10.{i // 250 % 250}.{i % 250}.1 '
+                              f'10.{i // 250 % 250}.{i % 250}.254 24\n',
+            'startup_script_path': 'startup.vpc'},
+    },
+    'dynamips': {
+        'weight': 2, 'symbol': ':/symbols/router.svg', 'name': 'R{i}',
+        'port_names': ('FastEthernet{a}/{p}', 'f{a}/{p}'), 'layout': (3, 2),
+        'properties': lambda rng, name, i: {
+            'platform': 'c7200', 'image': 'c7200-adventerprisek9-mz.124-24.T5.image',
+            'ram': 512, 'nvram': 512, 'idlepc': f'0x{rng.getrandbits(32):08x}',
+            'idlemax': 500, 'idlesleep': 30, 'dynamips_id': i + 1, 'mac_addr': _mac(rng),
+            'slot0': 'C7200-IO-FE', 'slot1': 'PA-2FE-TX', 'slot2': 'PA-2FE-TX',
+            'disk0': 0, 'disk1': 0, 'exec_area': 64, 'auto_delete_disks': True},
+    },
+    'qemu': {
+        'weight': 2, 'symbol': ':/symbols/router.svg', 'name': 'VM{i}',
+        'port_names': ('Ethernet{a}', 'e{a}'), 'layout': (4, 1),
+        'properties': lambda rng, name, i: {
+            'hda_disk_image': 'vEOS-lab-4.21.1.1F.vmdk', 'hda_disk_interface': 'ide',
+            'ram': rng.choice((1024, 2048, 4096)), 'cpus': rng.choice((1, 2)), 'adapters': 4,
+            'adapter_type': 'e1000', 'mac_address': _mac(rng), 'console_type': 'telnet',
+            'boot_priority': 'c', 'kvm': True, 'options': '-nographic'},
+    },
+    'docker': {
+        'weight': 1, 'symbol': ':/symbols/docker_guest.svg', 'name': 'CT{i}',
+        'port_names': ('eth{a}', 'eth{a}'), 'layout': (2, 1),
+        'properties': lambda rng, name, i: {
+            'image': rng.choice(('alpine:latest', 'nginx:latest', 'gns3/ipterm:latest')),
+            'adapters': 2, 'environment': f'HOSTNAME={name}', 'start_command': None,
+            'console_type': 'telnet', 'aux': 5000 + 2 * i},
+    },
+    'ethernet_switch': {
+        'weight': 1, 'symbol': ':/symbols/ethernet_switch.svg', 'name': 'SW{i}',
+        'port_names': ('Ethernet{p}', 'e{p}'), 'layout': (1, 8),
+        'properties': lambda rng, name, i: {
+            'ports_mapping': [{'name': f'Ethernet{p}', 'port_number': p, 'type': 'access',
+                               'vlan': 1 + p % 4} for p in range(8)]},
+    },
+}
+
+
+def synthetic_node(project_id, name, node_type='vpcs', ports=None, compute_id='local', rng=None,
+                   index=0, **kwargs):
+    """
+    Return a node as returned by /projects/{project_id}/nodes. `ports` overrides the number of
+    ports of the node type, `rng` (a random.Random) makes the node id and properties reproducible.
+    """
+    rng = rng or random.Random()
+    profile = NODE_TYPES.get(node_type, NODE_TYPES['qemu'])
+    adapters, per_adapter = profile['layout']
+    count = adapters * per_adapter if ports is None else ports
+    name_format, short_format = profile['port_names']
+    port_list = []
+    for i in range(count):
+        if per_adapter == 1:
+            a, p = i, 0
+        elif adapters == 1:
+            a, p = 0, i
+        else:
+            a, p = divmod(i, per_adapter)
+        port_list.append({'adapter_number': a, 'port_number': p, 'link_type': 'ethernet',
+                          'name': name_format.format(a=a, p=p),
+                          'short_name': short_format.format(a=a, p=p),
+                          'data_link_types': {'Ethernet': 'DLT_EN10MB'}})
+
+    node = {
+        'command_line': None,
+        'compute_id': compute_id,
+        'console': 5000 + 2 * index + 1,
+        'console_host': '127.0.0.1',
+        'console_type': 'telnet',
+        'first_port_name': None,
+        'height': 45,
+        'label': {'rotation': 0, 'text': name, 'x': 5, 'y': -25,
+                  'style': 'font-family: TypeWriter;font-size: 10.0;font-weight: bold;'
+                           'fill: #000000;fill-opacity: 1.0;'},
+        'name': name,
+        'node_directory': f'/opt/gns3/projects/{project_id}/project-files/{node_type}/{name}',
+        'node_id': _uuid(rng),
+        'node_type': node_type,
+        'port_name_format': name_format.replace('{a}', '{0}').replace('{p}', '{1}'),
+        'port_segment_size': 0,
+        'ports': port_list,
+        'project_id': project_id,
+        'properties': profile['properties'](rng, name, index),
+        'status': 'stopped',
+        'symbol': profile['symbol'],
+        'width': 65,
+        'x': (index % 100) * 100,
+        'y': (index // 100) * 100,
+        'z': 1,
+    }
+    node.update(kwargs)
+    return node
+
+
+def synthetic_link(project_id, from_node, from_port, to_node, to_port, rng=None):
+    """Return a link between two (node, port) dicts as returned by /projects/{id}/links"""
+    return {
+        'capture_file_name': None,
+        'capture_file_path': None,
+        'capturing': False,
+        'filters': {},
+        'link_id': _uuid(rng or random.Random()),
+        'link_type': 'ethernet',
+        'project_id': project_id,
+        'suspend': False,
+        'nodes': [{'node_id': node['node_id'], 'adapter_number': port['adapter_number'],
+                   'port_number': port['port_number'],
+                   'label': {'text': port['short_name'], 'x': 0, 'y': 0, 'rotation': 0}}
+                  for node, port in ((from_node, from_port), (to_node, to_port))],
+    }
+
+
+# pylint: disable=too-many-arguments,too-many-locals
+def synthetic_project(nodes=100, links=None, ports=None, drawings=0, name='synthetic', seed=None,
+                      snapshots=0, node_types=None):
+    """
+    Return {'project': settings, 'nodes': [...], 'links': [...], 'drawings': [...],
+    'snapshots': [...]} for a project with `nodes` nodes and `links` links (nodes - 1 by default)
+    between random nodes with free ports, plus `drawings` drawings and `snapshots` snapshots.
+
+    `node_types` is a node type or a {node_type: weight} dict, by default all NODE_TYPES are mixed
+    by their weights. `ports` gives every node that many ports instead of the default of its type.
+    The same `seed` gives the same project.
+    """
+    rng = random.Random(seed)
+    if node_types is None:
+        node_types = {t: p['weight'] for t, p in NODE_TYPES.items()}
+    elif isinstance(node_types, str):
+        node_types = {node_types: 1}
+    project_id = _uuid(rng)
+    links = nodes - 1 if links is None else links
+
+    project = {'project_id': project_id, 'name': name, 'filename': f'{name}.gns3',
+               'status': 'opened', 'auto_close': True, 'auto_open': False, 'auto_start': False,
+               'path': f'/opt/gns3/projects/{project_id}', 'scene_height': 1000,
+               'scene_width': 2000, 'show_grid': False, 'show_interface_labels': False,
+               'show_layers': False, 'snap_to_grid': False, 'zoom': 100}
+
+    types = rng.choices(list(node_types), weights=list(node_types.values()), k=nodes)
+    counters = dict.fromkeys(node_types, 0)
+    node_list = []
+    for i, node_type in enumerate(types):
+        counters[node_type] += 1
+        node_name = NODE_TYPES.get(node_type, NODE_TYPES['qemu'])['name']
+        node_list.append(synthetic_node(project_id, node_name.format(i=counters[node_type]),
+                                        node_type, ports, rng=rng, index=i))
+
+    if links > sum(len(n['ports']) for n in node_list) // 2:
+        raise ValueError(f'{nodes} nodes do not have enough ports for {links} links')
+    free = [list(n['ports']) for n in node_list]
+    # Indexes of the nodes with free ports, nodes are removed once all their ports are used
+    available = [i for i in range(nodes) if free[i]]
+    link_list = []
+    for _ in range(links):
+        if len(available) < 2:
+            raise ValueError(f'Ran out of free ports after {len(link_list)} links')
+        a, b = rng.sample(range(len(available)), 2)
+        ends = []
+        for position in (a, b):
+            i = available[position]
+            ends.append((node_list[i], free[i].pop(rng.randrange(len(free[i])))))
+        for position in sorted((a, b), reverse=True):
+            if not free[available[position]]:
+                available[position] = available[-1]
+                available.pop()
+        link_list.append(synthetic_link(project_id, *ends[0], *ends[1], rng=rng))
+
+    drawing_list = [{'drawing_id': _uuid(rng), 'project_id': project_id, 'rotation': 0,
+                     'svg': f'<svg height="50" width="200"><text>Area {i}</text></svg>'
+                     if i % 2 else
+                     f'<svg height="{rng.randint(100, 400)}" width="{rng.randint(100, 400)}">'
+                     f'<rect fill="#ffffff" fill-opacity="0.5" stroke="#000000" '
+                     f'stroke-width="2" /></svg>',
+                     'x': rng.randint(-1000, 1000), 'y': rng.randint(-500, 500), 'z': 0}
+                    for i in range(drawings)]
+    snapshot_list = [{'snapshot_id': _uuid(rng), 'project_id': project_id,
+                      'name': f'snapshot-{i}', 'created_at': 1500000000 + 3600 * i}
+                     for i in range(snapshots)]
+    return {'project': project, 'nodes': node_list, 'links': link_list,
+            'drawings': drawing_list, 'snapshots': snapshot_list}
+
+
+def mock_responses(*projects):
+    """
+    Return {path: json string} for `projects` in the format of test/mock_api.py, with the
+    project list, every project, its collections and each object by id.
+    """
+    responses = {'/projects': json.dumps([p['project'] for p in projects])}
+    for project in projects:
+        path = f'/projects/{project["project"]["project_id"]}'
+        responses[path] = json.dumps(project['project'])
+        for collection, id_key in (('drawings', 'drawing_id'), ('links', 'link_id'),
+                                   ('nodes', 'node_id'), ('snapshots', 'snapshot_id')):
+            responses[f'{path}/{collection}'] = json.dumps(project[collection])
+            for obj in project[collection]:
+                responses[f'{path}/{collection}/{obj[id_key]}'] = json.dumps(obj)
+    return responses
+
+
+def _uuid(rng):
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def _mac(rng):
+    return 'ca:01:' + ':'.join(f'{rng.getrandbits(8):02x}' for _ in range(4))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Write a synthetic GNS3 project as JSON')
+    parser.add_argument('--nodes', type=int, default=100)
+    parser.add_argument('--links', type=int, default=None)
+    parser.add_argument('--ports', type=int, default=None, help='ports per node')
+    parser.add_argument('--drawings', type=int, default=0)
+    parser.add_argument('--snapshots', type=int, default=0)
+    parser.add_argument('--node-type', default=None, help='only nodes of this type')
+    parser.add_argument('--name', default='synthetic')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--mock', action='store_true',
+                        help='write {path: response} like test/mock_api.py')
+    args = parser.parse_args(argv)
+
+    project = synthetic_project(args.nodes, args.links, args.ports, args.drawings, args.name,
+                                args.seed, args.snapshots, args.node_type)
+    json.dump(mock_responses(project) if args.mock else project, sys.stdout)
+
+
+if __name__ == '__main__':
+    main()